@@ -0,0 +1,162 @@
+# assets.py
+# File statici (index.html, app.js) tenuti in memoria e già compressi.
+#
+# Tutti i file di static/ si leggono una volta all'avvio: per ognuno si calcolano l'hash
+# del contenuto e le versioni gzip (e brotli, se è installato il modulo `brotli`), poi si
+# rispondono solo byte già pronti, scelti in base ad Accept-Encoding.
+#
+# - app.js ha anche un URL con l'hash nel nome (/app.3f2a9c1b.js): index.html viene
+#   riscritto all'avvio per puntare lì, e quell'URL si tiene in cache per un anno
+#   (immutable), perché a contenuto diverso corrisponde un URL diverso.
+# - index.html (e i nomi senza hash, per le pagine vecchie) si rivalidano ad ogni
+#   caricamento: ETag = hash, quindi un ricaricamento senza modifiche costa un 304.
+#
+# Modifiche ai file di static/ si vedono dopo un riavvio del server.
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# file più piccoli di così non si comprimono (come in respcache.py)
+COMPRESS_MIN_BYTES = 512
+
+# pagine che si rivalidano sempre: tutto il resto ha anche l'URL con l'hash
+PAGES = ("index.html",)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# src="/app.js" o href="app.css?v=3" dentro le pagine (la query di versione si scarta)
+_REF_RE = re.compile(r'(src|href)="/?([^"?#:]+)(\?[^"#]*)?"')
+
+
+class Asset:
+    __slots__ = ("name", "media_type", "etag", "hashed_name", "bodies")
+
+    def __init__(self, name: str, body: bytes):
+        self.name = name
+        self.media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.media_type.startswith("text/") or self.media_type == "application/javascript":
+            self.media_type += "; charset=utf-8"
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        self.etag = f'"{digest}"'
+        base, ext = os.path.splitext(name)
+        self.hashed_name = f"{base}.{digest[:8]}{ext}"
+        self.bodies = {"identity": body}  # codifica -> byte
+        if len(body) >= COMPRESS_MIN_BYTES:
+            self.bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=11)
+
+    def pick(self, accept_encoding: str) -> str:
+        """Codifica da usare per questo Accept-Encoding: tra quelle accettate (q > 0) la
+        preferita dal client, a parità di q la più piccola. Il file com'è va bene anche se
+        non è nominato, ma dopo tutte le altre; senza niente di accettabile (es.
+        "identity;q=0") si manda comunque quello."""
+        accepted = _accepted(accept_encoding)
+        best, best_key = "identity", None
+        for encoding, body in self.bodies.items():
+            q = accepted.get(encoding, accepted.get("*"))
+            if q is None and encoding == "identity":
+                q = 0.0001  # non nominato: accettato, sotto ogni q vero (al più 3 decimali)
+            if q is None or q <= 0:
+                continue
+            key = (-q, len(body))
+            if best_key is None or key < best_key:
+                best, best_key = encoding, key
+        return best
+
+
+def _accepted(accept_encoding: str) -> dict:
+    # "gzip, br;q=0.8, *;q=0" -> {"gzip": 1.0, "br": 0.8, "*": 0.0}; un q non valido
+    # scarta solo quella voce
+    out = {}
+    for item in accept_encoding.lower().split(","):
+        encoding, _, params = item.partition(";")
+        encoding = encoding.strip()
+        if not encoding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None and 0 <= q <= 1:
+            out[encoding] = q
+    return out
+
+
+class StaticAssets:
+    """App ASGI da montare su "/" al posto di StaticFiles(directory, html=True)."""
+
+    def __init__(self, directory: str):
+        raw = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and not name.startswith("."):
+                with open(path, "rb") as f:
+                    raw[name] = f.read()
+
+        self._routes = {}  # percorso -> (Asset, Cache-Control)
+        for name, body in raw.items():
+            if name in PAGES:
+                continue
+            asset = Asset(name, body)
+            self._routes["/" + asset.hashed_name] = (asset, IMMUTABLE)
+            self._routes["/" + name] = (asset, REVALIDATE)
+
+        for name in PAGES:
+            if name not in raw:
+                continue
+            page = Asset(name, self._link(raw[name]))
+            self._routes["/" + name] = (page, REVALIDATE)
+            if name == "index.html":
+                self._routes["/"] = (page, REVALIDATE)
+
+    def _link(self, html: bytes) -> bytes:
+        # i riferimenti ai file di static/ diventano gli URL con l'hash
+        def sub(m):
+            found = self._routes.get("/" + m.group(2))
+            if found is None:
+                return m.group(0)
+            return f'{m.group(1)}="/{found[0].hashed_name}"'
+
+        return _REF_RE.sub(sub, html.decode("utf-8")).encode("utf-8")
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        found = self._routes.get(scope["path"])
+        if found is None:
+            response = PlainTextResponse("Not Found", status_code=404)
+        elif request.method not in ("GET", "HEAD"):
+            response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+        else:
+            response = self._respond(request, *found)
+        await response(scope, receive, send)
+
+    def _respond(self, request: Request, asset: Asset, cache_control: str) -> Response:
+        headers = {"ETag": asset.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        sent = request.headers.get("if-none-match", "")
+        if asset.etag in (t.strip() for t in sent.split(",")):
+            return Response(status_code=304, headers=headers)
+        encoding = asset.pick(request.headers.get("accept-encoding", ""))
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.bodies[encoding]
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            body = b""
+        return Response(body, media_type=asset.media_type, headers=headers)
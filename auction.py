@@ -1,140 +1,966 @@
-import time
-import threading
+import asyncio
 
-TIMER_SECONDS = 8  # ⏱️ TIMER PORTATO A 8 SECONDI
-
-_state = {
-    "active": False,
-    "player": None,
-    "leading_team": None,
-    "highest_bid": 0,
-    "timer_end": 0.0,
-    "awaiting_confirmation": False,
-}
-
-_history = []  # [{"id": 1, "player": "...", "winner": "...", "price": 10, "ts": 1700000000}]
-_next_history_id = 1
+import events
+import metrics
+from catalog import ROLE_ORDER, Catalog, parse_player
+from clock import SystemClock
+from scheduler import LoopTimer
+from store import MemoryStore
+from writer import Writer
 
-_lock = threading.Lock()
+TIMER_SECONDS = 8  # ⏱️ TIMER PORTATO A 8 SECONDI
 
+# Stanza delle URL senza /rooms/{id} (la lega di sempre)
+DEFAULT_ROOM = "main"
+
+# Offerte automatiche: di quanto il massimo più alto supera il secondo
+AUTOBID_INCREMENT = 1
+
+# Quante chiamate in coda mostrare nello stato (/status e /stream)
+QUEUE_PREVIEW = 5
+
+# Conferme e cancellazioni rispondono dopo l'fsync del log eventi: massimo di attesa
+JOURNAL_WAIT_SECONDS = 5.0
+
+
+# --- eventi ---
+# Ogni modifica passa da un evento: i metodi pubblici di Room validano, costruiscono
+# l'evento e lo applicano con _apply(); lo stesso codice rigioca il log all'avvio.
+
+
+def _apply(tx, event: dict, now: float):
+    state = tx.state
+    kind = event["type"]
+    if kind == "start":
+        state["active"] = True
+        state["player"] = event["player"]
+        state["leading_team"] = event["team"]
+        state["highest_bid"] = 1
+        state["timer_end"] = now + TIMER_SECONDS
+        state["awaiting_confirmation"] = False
+        tx.clear_proxies()
+        _offer(tx, event["team"], 1)
+    elif kind == "bid":
+        state["highest_bid"] = event["price"]
+        state["leading_team"] = event["team"]
+        state["timer_end"] = now + TIMER_SECONDS
+        _offer(tx, event["team"], event["price"])
+    elif kind == "autobid":
+        tx.set_proxy(event["team"], event["max"], _next_seq(tx.proxies()))
+    elif kind == "close":
+        state["active"] = False
+        state["awaiting_confirmation"] = True
+    elif kind == "confirm":
+        entry = event["entry"]
+        tx.history_append(entry)
+        tx.next_history_id = max(tx.next_history_id, entry["id"] + 1)
+        # il giocatore esce dagli svincolati, il prezzo si scala al vincitore
+        tx.set_available(entry["player"], False)
+        change = {"history_added": entry, "players_removed": [entry["player"]], "remaining": {}, "roster": {}}
+        remaining = tx.remaining(entry["winner"])
+        if remaining is not None:
+            tx.set_remaining(entry["winner"], max(0, remaining - entry["price"]))
+            change["remaining"][entry["winner"]] = max(0, remaining - entry["price"])
+            change["roster"][entry["winner"]] = dict(tx.roster_add(entry["winner"], entry["player"], 1, entry["price"]))
+        tx.record_change(change)
+        tx.clear_proxies()
+        state["awaiting_confirmation"] = False
+        state["player"] = None
+        state["leading_team"] = None
+        state["highest_bid"] = 0
+        state["timer_end"] = 0.0
+    elif kind == "cancel":
+        tx.clear_proxies()
+        state["awaiting_confirmation"] = False
+        state["active"] = False
+        state["leading_team"] = None
+        state["highest_bid"] = 0
+        state["timer_end"] = 0.0
+    elif kind == "queue":
+        state["queue"] = event["queue"]
+    elif kind == "history_delete":
+        removed = tx.history_remove(event["id"])
+        if removed is not None:
+            # restore tra gli svincolati + refund al vincitore
+            tx.set_available(removed["player"], True)
+            change = {
+                "history_removed": removed["id"], "players_added": [removed["player"]], "remaining": {}, "roster": {}
+            }
+            remaining = tx.remaining(removed["winner"])
+            if remaining is not None:
+                tx.set_remaining(removed["winner"], remaining + removed["price"])
+                change["remaining"][removed["winner"]] = remaining + removed["price"]
+                change["roster"][removed["winner"]] = dict(
+                    tx.roster_add(removed["winner"], removed["player"], -1, removed["price"]))
+            tx.record_change(change)
+    elif kind == "catalog":
+        # nuovo listone: cambia solo chi è svincolato (vedi Room.replace_catalog)
+        tx.record_change({"players_added": event["added"], "players_removed": event["removed"]})
+    elif kind == "boot":
+        # riavvio (Room.restore): versione dello storico nuova senza modifica nel registro,
+        # i client con ?since= di prima ricaricano tutto
+        tx.history_version += 1
+
+
+def _next_seq(proxies: dict) -> int:
+    return 1 + max((seq for _, seq in proxies.values()), default=0)
+
+
+def _offer(tx, team: str, price: int):
+    # un rilancio vale come offerta massima pari al prezzo, se la squadra non ne ha già una più alta
+    proxies = tx.proxies()
+    current = proxies.get(team)
+    if current is None or current[0] < price:
+        tx.set_proxy(team, price, _next_seq(proxies))
+
+
+def _resolve_proxies(tx) -> dict | None:
+    """Confronta le offerte massime dell'asta in corso (automatiche e rilanci): vince il
+    massimo più alto (a parità chi l'ha registrato prima) e paga il secondo massimo +
+    AUTOBID_INCREMENT, mai oltre il proprio massimo e mai sotto il prezzo attuale.
+    Ritorna l'evento "bid" da applicare, None se leader e prezzo restano quelli."""
+    proxies = tx.proxies()
+    if len(proxies) < 2:
+        return None
+    # le prime due senza ordinare: questo gira ad ogni rilancio
+    winner = best = runner = None
+    for team, (m, seq) in proxies.items():
+        key = (-m, seq)
+        if best is None or key < best:
+            runner, winner, best = best, team, key
+        elif runner is None or key < runner:
+            runner = key
+    top, second = -best[0], -runner[0]
+    price = max(tx.state["highest_bid"], min(top, second + AUTOBID_INCREMENT))
+    if winner == tx.state["leading_team"] and price == tx.state["highest_bid"]:
+        return None
+    return {"type": "bid", "team": winner, "price": price, "auto": True}
+
+
+def _commit(tx, event: dict, now: float) -> tuple:
+    # applica + registra l'evento; ritorna cosa pubblicare a transazione chiusa.
+    # La versione cambia prima di registrare: uno snapshot preso qui la contiene già.
+    _apply(tx, event, now)
+    _bump_version(tx, event)
+    tx.record(event)
+    return _change(tx, now)
+
+
+def _bump_version(tx, event: dict):
+    # eventi che cambiano lo stato dell'asta visto dai client (l'offerta automatica è privata)
+    if event["type"] not in ("history_delete", "autobid", "catalog"):
+        tx.version += 1
+
+
+def _change(tx, now: float) -> tuple:
+    # (versione, stato per i client, versione storico, copia dello stato per le letture)
+    return tx.version, _status_payload(tx.version, tx.state, now), tx.history_version, dict(tx.state)
+
+
+def _status_payload(version: int, state: dict, now: float) -> dict:
+    # deadline: scadenza in secondi dell'orologio monotono del server (quello di /time);
+    # il client la converte nel suo orologio e fa il countdown da solo. time_left (secondi
+    # interi al momento della risposta) resta per i client vecchi.
+    time_left = 0
+    deadline = None
+    if state["active"]:
+        time_left = max(0, int(state["timer_end"] - now))
+        deadline = state["timer_end"]
+
+    return {
+        "active": state["active"],
+        "player": state["player"],
+        "leading_team": state["leading_team"],
+        "highest_bid": state["highest_bid"],
+        "time_left": time_left,
+        "deadline": deadline,
+        "awaiting_confirmation": state["awaiting_confirmation"],
+        "queue": _queue_summary(state["queue"]),
+        "version": version,
+    }
+
+
+def _queue_summary(queue: dict) -> dict:
+    # le code delle squadre restano private: si vede solo quanti giocatori ha in coda ognuna
+    return {
+        "next": [{"player": p, "team": t} for p, t in queue["order"][:QUEUE_PREVIEW]],
+        "order": len(queue["order"]),
+        "teams": {team: len(players) for team, players in queue["teams"].items()},
+        "turn": queue["turn"],
+        "paused": queue["paused"],
+    }
+
+
+def max_bid(limits: dict, remaining: int, counts: dict, role: str) -> int | None:
+    """Offerta massima per un giocatore di `role`: crediti residui meno 1 credito per ogni
+    altro posto vuoto in rosa. None se i posti di quel ruolo sono già tutti occupati.
+
+    limits = {ruolo: posti} della lega (vuoto = nessun vincolo), counts = {ruolo: presi}.
+    Costa O(numero di ruoli), non dipende dallo storico.
+    """
+    if not limits:
+        return remaining
+    empty = 0
+    for r, n in limits.items():
+        empty += max(0, n - counts.get(r, 0))
+    if role in limits:
+        if counts.get(role, 0) >= limits[role]:
+            return None
+        empty -= 1  # il posto che occuperà questo giocatore
+    return max(0, remaining - empty)
+
+
+class Room:
+    """Un'asta indipendente (una lega, o un tavolo parallelo della stessa lega).
+
+    Ogni stanza ha il suo store (stato, storico, crediti, svincolati e il suo lock),
+    il suo timer e i suoi client /stream: i rilanci di una stanza non aspettano mai
+    quelli di un'altra.
+
+    roster_limits = {ruolo: posti in rosa}, es. {"POR": 3, "DIF": 8, "CEN": 8, "ATT": 6}:
+    nessuno può spendere tanto da non riuscire più a completare la rosa a 1 credito a testa.
+
+    Coda delle chiamate: l'admin può fissare l'ordine dei giocatori da chiamare e ogni
+    squadra può mettere in coda le proprie chiamate (servite a turno tra le squadre).
+    Dopo confirm/cancel la prossima chiamata valida si apre da sola, nella stessa
+    transazione: niente tempi morti tra un'asta e l'altra.
+
+    clock: da dove vengono ore e scadenze (default SystemClock; VirtualClock di clock.py
+    per far girare un'asta intera in tempo simulato, vedi simulate.py).
+
+    Nel server le scritture passano da run() (un solo scrittore per stanza, vedi writer.py)
+    e get_status() legge l'ultimo stato pubblicato, senza lock: i poll non rallentano i
+    rilanci. Chiamati direttamente (bench, simulate.py) i metodi restano sincroni.
+    """
+
+    def __init__(self, room_id: str, admin_team: str, store=None, roster_limits: dict | None = None,
+                 clock=None):
+        self.id = room_id
+        self.admin_team = admin_team
+        self.roster_limits = dict(roster_limits or {})
+        self.clock = clock if clock is not None else SystemClock()
+        self.events = events.Broker()
+        self._timer = self.clock.timer(self.tick, name=f"auction-timer-{room_id}")
+        self.store = store if store is not None else MemoryStore({}, Catalog([]))
+        self.budgets = self.store.budgets()  # fissi: letti una volta
+        self._teams = list(self.budgets)  # ordine dei turni di chiamata
+        self.writer = None  # vedi start_writer()
+        self._snapshot = self.store.read_status()  # (versione, stato) dell'ultimo commit pubblicato
+        self.store.watch(self._on_store_change)
+
+    def start_writer(self):
+        """Da chiamare nell'event loop del server, all'avvio: da qui in poi run() accoda le
+        scritture a un solo task e il timer scatta nel loop (niente thread del timer)."""
+        loop = asyncio.get_running_loop()
+        self.writer = Writer(inline=self.store.IN_MEMORY)
+        previous, self._timer = self._timer, LoopTimer(lambda: self.writer.post(self.tick), loop)
+        previous.cancel()
+        _, state = self._read_status()
+        if state["active"] and not state["awaiting_confirmation"]:
+            self._timer.arm(state["timer_end"])
+
+    async def run(self, fn, *args):
+        """fn(*args) (un metodo di scrittura) nel turno dello scrittore della stanza."""
+        if self.writer is None:
+            return fn(*args)
+        return await self.writer.submit(fn, *args)
+
+    async def wait_durable(self, timeout: float = JOURNAL_WAIT_SECONDS) -> bool:
+        """Aspetta che quanto registrato finora nel log eventi sia su disco, per le
+        operazioni che non possono andare perse in un crash (conferme, cancellazioni).
+        Nel threadpool: l'fsync lo fa il thread del log, il loop continua coi rilanci.
+        True subito senza log; False se il disco non risponde entro `timeout`."""
+        j = self.store.journal
+        if j is None:
+            return True
+        return await asyncio.to_thread(j.wait, j.seq, timeout)
+
+    def _publish(self, change: tuple | None):
+        # da chiamare FUORI dalla transazione
+        if change is None:
+            return
+        version, status, history_version, state = change
+        if version >= self._snapshot[0]:
+            self._snapshot = (version, state)
+        self.events.publish("state", status, version)
+        if history_version > self.events.version("history"):
+            self.events.publish("history", {"remaining": self.store.remaining_all()}, history_version)
+
+    def _on_store_change(self, version: int, history_version: int):
+        # un altro worker ha modificato lo stato: aggiorna i client /stream e il timer
+        v, state = self.store.read_status()
+        if state["active"]:
+            self._timer.arm(state["timer_end"])
+        self._publish((v, _status_payload(v, state, self.clock.monotonic()), history_version, state))
+
+    def _read_status(self) -> tuple:
+        # in memoria lo stato cambia solo da questo processo: basta l'ultimo pubblicato
+        if self.store.IN_MEMORY:
+            return self._snapshot
+        return self.store.read_status()
+
+    def restore(self, j) -> int:
+        """Ricarica stato e storico dal log (ultimo snapshot + eventi successivi) e attiva
+        il logging. Un'asta che era in corso riparte con il timer pieno.
+        Ritorna il numero di eventi rigiocati. Solo per MemoryStore."""
+        snap, tail = j.load()
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if snap:
+                tx.load_snapshot(snap)
+                if tx.state["active"]:
+                    tx.state["timer_end"] = now + TIMER_SECONDS
+            for event in tail:
+                # stesse versioni di quando l'evento è stato registrato
+                _apply(tx, event, now)
+                _bump_version(tx, event)
+            tx.attach_journal(j)
+            if tx.state["active"]:
+                self._timer.arm(tx.state["timer_end"])
+            # versioni nuove, oltre tutte quelle già date per eventi su disco. Nel log anche
+            # questo: al prossimo avvio si rigioca e le versioni non tornano indietro di uno
+            # per ogni riavvio senza snapshot in mezzo
+            change = _commit(tx, {"type": "boot"}, now)
+
+        self._publish(change)
+        return len(tail)
+
+    # --- operazioni ---
+
+    def _nomination_error(self, tx, player: str, team: str) -> dict | None:
+        # chi chiama l'asta offre 1: il giocatore dev'essere svincolato e la squadra deve
+        # avere almeno 1 credito e, con i vincoli di rosa, posto nel ruolo e crediti per il
+        # resto della rosa. None se la chiamata è valida.
+        if not tx.is_available(player):
+            return {"ok": False, "reason": "player_not_available"}
+        remaining = tx.remaining(team)
+        if remaining is None:
+            return {"ok": False, "reason": "unknown_team"}
+        if remaining < 1:
+            return {"ok": False, "reason": "insufficient_budget", "needed": 1, "remaining": remaining}
+        if self.roster_limits:
+            role = tx.role(player)
+            limit = max_bid(self.roster_limits, remaining, tx.roster(team), role)
+            if limit is None:
+                return {"ok": False, "reason": "role_full", "role": role}
+            if limit < 1:
+                return {"ok": False, "reason": "max_bid_exceeded", "needed": 1, "max_bid": limit}
+        return None
 
-def start_auction(player: str, team: str) -> bool:
-    with _lock:
-        if _state["awaiting_confirmation"]:
-            return False
+    def _open_next(self, tx, now: float) -> tuple | None:
+        """Ad asta ferma apre la prossima chiamata in coda, dentro la transazione del chiamante.
+        Prima l'ordine dell'admin, poi le code delle squadre a turno; i giocatori già venduti
+        (o che la squadra non può più chiamare) vengono scartati.
+        Ritorna cosa pubblicare, None se la coda non è cambiata."""
+        state = tx.state
+        queue = state["queue"]
+        if state["active"] or state["awaiting_confirmation"] or queue["paused"]:
+            return None
+        if not queue["order"] and not queue["teams"]:
+            return None
 
-        _state["active"] = True
-        _state["player"] = player.strip()
-        _state["leading_team"] = team.strip()
-        _state["highest_bid"] = 1
-        _state["timer_end"] = time.time() + TIMER_SECONDS
-        _state["awaiting_confirmation"] = False
+        order = queue["order"]
+        teams = {t: list(players) for t, players in queue["teams"].items()}
+        turn = queue["turn"]
+        found = None
+        i = 0
+        while i < len(order) and found is None:
+            player, team = order[i]
+            i += 1
+            if self._nomination_error(tx, player, team) is None:
+                found = (player, team)
+        order = order[i:]
+
+        if found is None and teams:
+            # tocca alla squadra dopo l'ultima che ha chiamato dalla propria coda
+            first = self._teams.index(turn) + 1 if turn in self._teams else 0
+            for k in range(len(self._teams)):
+                team = self._teams[(first + k) % len(self._teams)]
+                pending = teams.get(team) or []
+                while pending and found is None:
+                    player = pending.pop(0)
+                    if self._nomination_error(tx, player, team) is None:
+                        found = (player, team)
+                if found is not None:
+                    turn = team
+                    break
+
+        new_queue = {
+            "order": order, "teams": {t: p for t, p in teams.items() if p}, "turn": turn, "paused": False
+        }
+        change = _commit(tx, {"type": "queue", "queue": new_queue}, now) if new_queue != queue else None
+        if found is None:
+            return change
+        change = _commit(tx, {"type": "start", "player": found[0], "team": found[1]}, now)
+        self._timer.arm(tx.state["timer_end"])
+        return change
+
+    def _set_queue(self, tx, queue: dict, now: float) -> tuple:
+        change = _commit(tx, {"type": "queue", "queue": queue}, now)
+        return self._open_next(tx, now) or change
+
+    def start_auction(self, player: str, team: str) -> bool:
+        return self.nominate(player, team)["ok"]
+
+    def nominate(self, player: str, team: str) -> dict:
+        """Apre l'asta di `player` chiamata da `team` a 1 credito. Giocatore, crediti e
+        vincoli di rosa si controllano nella stessa transazione che apre l'asta.
+
+        Ritorna {"ok": True} oppure {"ok": False, "reason": ...} con reason tra
+        player_not_available, unknown_team, insufficient_budget, role_full e
+        max_bid_exceeded ({"ok": False} senza reason se un'asta aspetta la conferma).
+        """
+        player = player.strip()
+        team = team.strip()
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if tx.state["awaiting_confirmation"]:
+                return {"ok": False}
+            error = self._nomination_error(tx, player, team)
+            if error is not None:
+                return error
+
+            change = _commit(tx, {"type": "start", "player": player, "team": team}, now)
+            self._timer.arm(tx.state["timer_end"])
+
+        self._publish(change)
+        return {"ok": True}
+
+    def set_nomination_order(self, team: str, items=None, paused=None) -> dict:
+        """Ordine delle chiamate deciso dall'admin. items = [{"player": ..., "team": chi lo chiama}]
+        (anche solo il nome: lo chiama l'admin) sostituisce l'ordine attuale; paused sospende
+        o riprende l'apertura automatica. Se l'asta è ferma la prima chiamata si apre subito.
+
+        Ritorna {"ok": True, "queue": ..., "skipped": [giocatori scartati], "started": giocatore | None}
+        oppure {"ok": False, "reason": ...} con reason tra not_admin e invalid_queue.
+        """
+        if team != self.admin_team:
+            return {"ok": False, "reason": "not_admin"}
+
+        order = None
+        if items is not None:
+            if not isinstance(items, list):
+                return {"ok": False, "reason": "invalid_queue"}
+            order = []
+            for item in items:
+                if isinstance(item, dict):
+                    order.append([str(item.get("player") or "").strip(), str(item.get("team") or team).strip()])
+                else:
+                    order.append([str(item).strip(), team])
+
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            queue = dict(tx.state["queue"])
+            skipped = []
+            if order is not None:
+                queue["order"] = []
+                seen = set()
+                for player, nominator in order:
+                    if player in seen or nominator not in self.budgets or not tx.is_available(player):
+                        skipped.append(player)
+                        continue
+                    seen.add(player)
+                    queue["order"].append([player, nominator])
+            if paused is not None:
+                queue["paused"] = bool(paused)
+            idle = not tx.state["active"] and not tx.state["awaiting_confirmation"]
+            change = self._set_queue(tx, queue, now)
+            started = tx.state["player"] if idle and tx.state["active"] else None
+            summary = _queue_summary(tx.state["queue"])
+
+        self._publish(change)
+        return {"ok": True, "queue": summary, "skipped": skipped, "started": started}
+
+    def set_team_queue(self, team: str, players) -> dict:
+        """Le prossime chiamate di `team`, in ordine (sostituisce la sua coda). Quando è il
+        suo turno il server chiama il primo giocatore ancora svincolato della lista.
+
+        Ritorna {"ok": True, "queue": [...], "skipped": [...], "started": giocatore | None}
+        oppure {"ok": False, "reason": ...} con reason tra unknown_team e invalid_queue.
+        """
+        if team not in self.budgets:
+            return {"ok": False, "reason": "unknown_team"}
+        if not isinstance(players, list):
+            return {"ok": False, "reason": "invalid_queue"}
+
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            queue = dict(tx.state["queue"])
+            mine = []
+            skipped = []
+            for player in players:
+                player = str(player).strip()
+                if player in mine or not tx.is_available(player):
+                    skipped.append(player)
+                    continue
+                mine.append(player)
+            teams = dict(queue["teams"])
+            if mine:
+                teams[team] = mine
+            else:
+                teams.pop(team, None)
+            queue["teams"] = teams
+            idle = not tx.state["active"] and not tx.state["awaiting_confirmation"]
+            change = self._set_queue(tx, queue, now)
+            started = tx.state["player"] if idle and tx.state["active"] else None
+            mine = list(tx.state["queue"]["teams"].get(team, []))
+
+        self._publish(change)
+        return {"ok": True, "queue": mine, "skipped": skipped, "started": started}
+
+    def place_bid(self, team: str, inc: int = 1, expected_price: int | None = None) -> dict:
+        """Rilancio atomico: stato dell'asta, prezzo atteso dal client e crediti della
+        squadra vengono controllati nella stessa transazione in cui si aggiorna il prezzo.
+
+        Ritorna {"ok": True, "price": nuovo_prezzo} oppure {"ok": False, "reason": ...}
+        con reason tra auction_not_active, unknown_team, stale_price, insufficient_budget,
+        role_full e max_bid_exceeded (vincoli di rosa, vedi max_bid()).
+        """
+        result = self._place_bid(team, inc, expected_price)
+        metrics.bids.inc(self.id, "accepted" if result["ok"] else result["reason"])
+        return result
+
+    def _place_bid(self, team: str, inc: int = 1, expected_price: int | None = None) -> dict:
+        try:
+            inc = int(inc)
+        except:
+            inc = 1
+        if inc <= 0:
+            inc = 1
+        team = team.strip()
+
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if not tx.state["active"] or tx.state["awaiting_confirmation"]:
+                return {"ok": False, "reason": "auction_not_active"}
+
+            current = tx.state["highest_bid"]
+            if expected_price is not None and expected_price != current:
+                # il client ha rilanciato su un prezzo già superato
+                return {"ok": False, "reason": "stale_price", "current": current}
+
+            remaining = tx.remaining(team)
+            if remaining is None:
+                return {"ok": False, "reason": "unknown_team"}
+            new_price = current + inc
+            if remaining < new_price:
+                return {"ok": False, "reason": "insufficient_budget", "needed": new_price, "remaining": remaining}
+            if self.roster_limits:
+                role = tx.role(tx.state["player"])
+                limit = max_bid(self.roster_limits, remaining, tx.roster(team), role)
+                if limit is None:
+                    return {"ok": False, "reason": "role_full", "role": role}
+                if limit < new_price:
+                    return {"ok": False, "reason": "max_bid_exceeded", "needed": new_price, "max_bid": limit}
+
+            change = _commit(tx, {"type": "bid", "team": team, "price": new_price}, now)
+            # le offerte automatiche rispondono subito, nella stessa transazione
+            auto = _resolve_proxies(tx)
+            if auto is not None:
+                change = _commit(tx, auto, now)
+            deadline = tx.state["timer_end"]
+
+        # il timer si arma fuori dal lock: tick() ricontrolla lo stato, quindi un arm()
+        # arrivato fuori ordine al massimo la sveglia in anticipo e lei riarma
+        self._timer.arm(deadline)
+        self._publish(change)
+        if auto is None:
+            return {"ok": True, "price": new_price}
+        metrics.bids.inc(self.id, "proxy")
+        return {"ok": True, "price": new_price, "outbid": auto["team"] != team, "current": auto["price"],
+                "leading_team": auto["team"]}
+
+    def set_autobid(self, team: str, max_price) -> dict:
+        """Offerta automatica per il giocatore in asta: il server rilancia per `team` di
+        AUTOBID_INCREMENT alla volta fino a `max_price` (limitato dai crediti e dai vincoli
+        di rosa). Le offerte in concorrenza si risolvono subito, in un solo rilancio.
+
+        Ritorna {"ok": True, "max": massimo_registrato, "price": ..., "leading_team": ...}
+        oppure {"ok": False, "reason": ...} con reason tra auction_not_active, unknown_team,
+        invalid_max, role_full e max_too_low.
+        """
+        try:
+            max_price = int(max_price)
+        except:
+            return {"ok": False, "reason": "invalid_max"}
+        team = team.strip()
+
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if not tx.state["active"] or tx.state["awaiting_confirmation"]:
+                return {"ok": False, "reason": "auction_not_active"}
+
+            remaining = tx.remaining(team)
+            if remaining is None:
+                return {"ok": False, "reason": "unknown_team"}
+            role = tx.role(tx.state["player"])
+            limit = max_bid(self.roster_limits, remaining, tx.roster(team), role)
+            if limit is None:
+                return {"ok": False, "reason": "role_full", "role": role}
+            max_price = min(max_price, limit)
+
+            current = tx.state["highest_bid"]
+            leading = tx.state["leading_team"] == team
+            if max_price < current or (max_price == current and not leading):
+                return {"ok": False, "reason": "max_too_low", "current": current, "max_bid": limit}
+
+            change = _commit(tx, {"type": "autobid", "team": team, "max": max_price}, now)
+            auto = _resolve_proxies(tx)
+            if auto is not None:
+                change = _commit(tx, auto, now)
+                self._timer.arm(tx.state["timer_end"])
+            price, leader = tx.state["highest_bid"], tx.state["leading_team"]
+
+        self._publish(change)
+        if auto is not None:
+            metrics.bids.inc(self.id, "proxy")
+        return {"ok": True, "max": max_price, "price": price, "leading_team": leader}
+
+    def tick(self):
+        # chiamata dal DeadlineTimer alla scadenza armata
+        change = None
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if not tx.state["active"] or tx.state["awaiting_confirmation"]:
+                return
+
+            if now >= tx.state["timer_end"]:
+                metrics.timer_lateness_seconds.observe(now - tx.state["timer_end"])
+                change = _commit(tx, {"type": "close"}, now)
+            else:
+                # svegliati in anticipo (o scadenza spostata nel frattempo): riarma
+                self._timer.arm(tx.state["timer_end"])
+
+        self._publish(change)
+
+    def confirm(self, team: str) -> dict | None:
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if team != self.admin_team:
+                return None
+            if not tx.state["awaiting_confirmation"]:
+                return None
+
+            entry = {
+                "id": tx.next_history_id,
+                "player": tx.state["player"],
+                "winner": tx.state["leading_team"],
+                "price": tx.state["highest_bid"],
+                "ts": int(self.clock.time()),
+            }
+            self._timer.cancel()
+            change = _commit(tx, {"type": "confirm", "entry": entry}, now)
+            change = self._open_next(tx, now) or change
+
+        self._publish(change)
+        return entry
 
-    return True
+    def cancel(self, team: str) -> bool:
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            if team != self.admin_team:
+                return False
+            if not tx.state["awaiting_confirmation"]:
+                return False
 
+            self._timer.cancel()
+            change = _commit(tx, {"type": "cancel"}, now)
+            change = self._open_next(tx, now) or change
 
-def place_bid(team: str, inc: int = 1) -> bool:
-    try:
-        inc = int(inc)
-    except:
-        inc = 1
-    if inc <= 0:
-        inc = 1
+        self._publish(change)
+        return True
 
-    with _lock:
-        if not _state["active"] or _state["awaiting_confirmation"]:
-            return False
+    def delete_history(self, history_id: int) -> dict | None:
+        try:
+            hid = int(history_id)
+        except:
+            return None
 
-        _state["highest_bid"] += inc
-        _state["leading_team"] = team.strip()
-        _state["timer_end"] = time.time() + TIMER_SECONDS
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            removed = tx.history_get(hid)
+            if removed is None:
+                return None
+            change = _commit(tx, {"type": "history_delete", "id": hid}, now)
+
+        self._publish(change)
+        return removed
+
+    def prepare_catalog(self, catalog):
+        """Lavoro di replace_catalog che non serve fare nel lock (vedi store.prepare_catalog):
+        nel server si chiama nel threadpool e il risultato va a replace_catalog."""
+        return self.store.prepare_catalog(catalog)
+
+    def replace_catalog(self, catalog, prepared=None) -> tuple:
+        """Nuovo listone a caldo: asta in corso, storico, crediti e code restano com'erano,
+        cambiano solo gli svincolati (chi è già venduto resta venduto).
+        Ritorna (giocatori aggiunti, giocatori tolti) tra gli svincolati."""
+        with self.store.transaction() as tx:
+            now = self.clock.monotonic()
+            added, removed = tx.replace_catalog(catalog, prepared)
+            if added or removed:
+                # i client con ?since= ricevono le differenze come per una vendita; nel log
+                # perché dopo un riavvio la versione dello storico riparta da dopo il cambio
+                change = _commit(tx, {"type": "catalog", "added": added, "removed": removed}, now)
+            else:
+                change = _change(tx, now)
+
+        self._publish(change)
+        return added, removed
+
+    # --- letture ---
+
+    def get_status(self):
+        version, state = self._read_status()
+        return _status_payload(version, state, self.clock.monotonic())
+
+    def get_status_parts(self) -> tuple:
+        """(versione, time_left, build) dall'ultimo stato pubblicato: versione e secondi
+        interi rimasti bastano per l'ETag di /status, build() costruisce la risposta dallo
+        stesso stato solo se la cache non ce l'ha già."""
+        version, state = self._read_status()
+        now = self.clock.monotonic()
+        time_left = max(0, int(state["timer_end"] - now)) if state["active"] else 0
+        return version, time_left, lambda: _status_payload(version, state, now)
+
+    def server_time(self) -> float:
+        """Ora del server nello stesso orologio di "deadline" (per la sincronizzazione dei client)."""
+        return self.clock.monotonic()
+
+    def get_queue(self, team: str) -> dict:
+        """Ordine completo delle chiamate e coda privata di `team` (solo la sua: le altre
+        squadre vedono quanti giocatori ha in coda nello stato, non quali).
+
+        Ritorna {"ok": True, "order": [...], "mine": [...], "turn", "paused"}
+        oppure {"ok": False, "reason": "unknown_team"}.
+        """
+        if team not in self.budgets:
+            return {"ok": False, "reason": "unknown_team"}
+        queue = self._read_status()[1]["queue"]
+        return {
+            "ok": True,
+            "order": [{"player": p, "team": t} for p, t in queue["order"]],
+            "mine": list(queue["teams"].get(team, [])),
+            "turn": queue["turn"],
+            "paused": queue["paused"],
+        }
 
-    return True
+    def get_history(self):
+        return self.store.history()
+
+    def get_history_page(self, cursor: int | None = None, limit: int = 50, team: str | None = None,
+                         player: str | None = None) -> tuple:
+        """Pagina dello storico dalla più recente: (entry, cursore per la pagina dopo | None)."""
+        return self.store.history_page(cursor, limit, team, player)
+
+    def iter_history(self, batch: int = 500):
+        """Tutto lo storico dal più vecchio, letto a blocchi di `batch`: la memoria usata non
+        dipende dalla lunghezza dello storico (per gli export)."""
+        after = 0
+        while True:
+            page = self.store.history_after(after, batch)
+            yield from page
+            if len(page) < batch:
+                return
+            after = page[-1]["id"]
+
+    def get_team_history(self, team: str) -> list:
+        """Acquisti di `team` (al massimo una rosa), dal più recente."""
+        out, cursor = [], None
+        while True:
+            page, cursor = self.store.history_page(cursor, 500, team)
+            out.extend(page)
+            if cursor is None:
+                return out
+
+    def get_remaining_all(self) -> dict:
+        return self.store.remaining_all()
+
+    def search_players(self, query: str, limit: int = 20) -> list:
+        """Svincolati il cui nome/squadra inizia con le parole cercate (senza accenti)."""
+        return self.store.search_players(query, limit)
+
+    def get_remaining(self, team: str) -> int | None:
+        return self.store.remaining(team)
+
+    def get_available_players(self, role: str | None = None, club: str | None = None) -> list:
+        """Svincolati in ordine POR -> DIF -> CEN -> ATT, alfabetico; filtri opzionali."""
+        return self.store.available_players(role, club)
+
+    def is_available(self, player: str) -> bool:
+        return self.store.is_available(player)
+
+    def get_roster_all(self) -> dict:
+        return self.store.roster_all()
+
+    def max_bid_for(self, team: str, player: str) -> int | None:
+        """Offerta massima di `team` per `player` (None = ruolo pieno o squadra sconosciuta)."""
+        remaining = self.store.remaining(team)
+        if remaining is None:
+            return None
+        return max_bid(self.roster_limits, remaining, self.store.roster(team), self.store.role(player))
+
+    def max_bids(self, remaining: dict, roster: dict) -> dict:
+        """{squadra: {ruolo: offerta massima}} (0 = ruolo pieno), per /teams."""
+        out = {}
+        for team, credits in remaining.items():
+            counts = roster.get(team, {})
+            out[team] = {
+                role: max_bid(self.roster_limits, credits, counts, role) or 0 for role in self.roster_limits
+            }
+        return out
+
+    def get_team_roster(self, team: str) -> list:
+        """[(Player, entry)] degli acquisti di `team` in ordine di listone (POR -> DIF ->
+        CEN -> ATT, alfabetico). Letti dall'indice per squadra: costano quanto la rosa."""
+        out = [(parse_player(e["player"]), e) for e in self.get_team_history(team)]
+        out.sort(key=lambda r: r[0].sort_key())
+        return out
+
+    def get_team_summary(self, team: str) -> dict | None:
+        """Riepilogo di `team` (None se non esiste): crediti, giocatori e spesa per ruolo,
+        prezzo medio e massimo, posti liberi e rosa per ruolo (anche per gli export).
+        Giocatori, spesa e massimo per ruolo sono quelli che lo store tiene accanto ai
+        contatori di rosa che fanno rispettare i posti; la rosa costa quanto la rosa."""
+        if team not in self.budgets:
+            return None
+        summary = self._team_summary(team, dict(self.store.roster(team)), self.store.spend(team),
+                                     self.store.remaining(team) or 0)
+        sold = {}  # ruolo -> [(Player, entry)], già in ordine di listone
+        for p, e in self.get_team_roster(team):
+            sold.setdefault(p.role, []).append((p, e))
+        summary["roster"] = [
+            {"role": role, "players": [
+                {"id": e["id"], "player": e["player"], "name": p.name, "club": p.club, "role": p.role,
+                 "price": e["price"]}
+                for p, e in sold[role]
+            ]}
+            for role in sorted(sold, key=lambda r: (ROLE_ORDER.get(r, len(ROLE_ORDER)), r))
+        ]
+        return summary
+
+    def get_league_summary(self) -> dict:
+        """Riepiloghi di tutte le squadre, nell'ordine dei crediti, e totali della lega.
+        Senza la rosa giocatore per giocatore (c'è nel riepilogo della squadra): solo
+        aggregati, quindi costa quanto squadre x ruoli e non quanto lo storico."""
+        remaining = self.store.remaining_all()
+        roster = self.store.roster_all()
+        spend = self.store.spend_all()
+        teams = [self._team_summary(t, roster.get(t, {}), spend.get(t, {}), remaining.get(t, 0))
+                 for t in self.budgets]
+        players = sum(t["players"] for t in teams)
+        spent = sum(t["spent"] for t in teams)
+        return {
+            "teams": teams,
+            "players": players,
+            "spent": spent,
+            "avg_price": round(spent / players, 2) if players else 0,
+            "max_price": max((t["max_price"] for t in teams), default=0),
+        }
 
+    def _team_summary(self, team: str, counts: dict, spend: dict, remaining: int) -> dict:
+        extra = sorted(({r for r, n in counts.items() if n} | set(spend)) - set(ROLE_ORDER))
+        roles = {}
+        for role in list(ROLE_ORDER) + extra:
+            players = counts.get(role, 0)
+            spent, top = spend.get(role, (0, 0))
+            item = {"players": players, "spent": spent, "max_price": top,
+                    "avg_price": round(spent / players, 2) if players else 0}
+            if role in self.roster_limits:
+                item["slots_left"] = max(0, self.roster_limits[role] - players)
+                item["max_bid"] = max_bid(self.roster_limits, remaining, counts, role) or 0
+            roles[role] = item
+        players = sum(counts.values())
+        spent = sum(r["spent"] for r in roles.values())
+        return {
+            "team": team,
+            "budget": self.budgets.get(team, 0),
+            "remaining": remaining,
+            "spent": spent,
+            "players": players,
+            "avg_price": round(spent / players, 2) if players else 0,
+            "max_price": max((r["max_price"] for r in roles.values()), default=0),
+            "slots_left": sum(r["slots_left"] for r in roles.values() if "slots_left" in r)
+            if self.roster_limits else None,
+            "roles": roles,
+        }
 
-def tick():
-    with _lock:
-        if not _state["active"] or _state["awaiting_confirmation"]:
-            return
+    def get_sizes(self) -> tuple:
+        """(aste nello storico, giocatori svincolati)."""
+        return self.store.sizes()
 
-        if time.time() >= _state["timer_end"]:
-            _state["active"] = False
-            _state["awaiting_confirmation"] = True
+    def get_versions(self) -> tuple:
+        """(versione stato asta, versione storico/crediti/svincolati)."""
+        return self.store.versions()
 
+    @property
+    def epoch(self) -> str:
+        """Cambia se le versioni possono ripartire da numeri già usati (riavvio dello stato
+        in memoria): va negli ETag accanto alla versione."""
+        return self.store.epoch
 
-def confirm(admin_team: str, expected_admin: str) -> dict | None:
-    global _next_history_id
+    # --- delta (?since=): None = modifiche non più disponibili, serve la risposta completa ---
 
-    with _lock:
-        if admin_team != expected_admin:
+    def get_history_delta(self, since: int) -> dict | None:
+        version, changes = self.store.changes_since(since)
+        if changes is None:
             return None
-        if not _state["awaiting_confirmation"]:
-            return None
-
-        entry = {
-            "id": _next_history_id,
-            "player": _state["player"],
-            "winner": _state["leading_team"],
-            "price": _state["highest_bid"],
-            "ts": int(time.time()),
+        added = {}
+        removed = set()
+        for c in changes:
+            if "history_added" in c:
+                added[c["history_added"]["id"]] = c["history_added"]
+            if "history_removed" in c:
+                hid = c["history_removed"]
+                if added.pop(hid, None) is None:
+                    removed.add(hid)
+        return {
+            "version": version,
+            "added": sorted(added.values(), key=lambda e: e["id"], reverse=True),
+            "removed": sorted(removed),
         }
-        _next_history_id += 1
-        _history.append(entry)
 
-        _state["awaiting_confirmation"] = False
-        _state["player"] = None
-        _state["leading_team"] = None
-        _state["highest_bid"] = 0
-        _state["timer_end"] = 0.0
-
-        return entry
+    def get_players_delta(self, since: int) -> dict | None:
+        version, changes = self.store.changes_since(since)
+        if changes is None:
+            return None
+        status = {}  # giocatore -> True (tornato svincolato) / False (venduto)
+        for c in changes:
+            for p in c.get("players_removed", ()):
+                status[p] = False
+            for p in c.get("players_added", ()):
+                status[p] = True
+        return {
+            "version": version,
+            "added": [p for p, ok in status.items() if ok],
+            "removed": [p for p, ok in status.items() if not ok],
+        }
 
+    def get_remaining_delta(self, since: int) -> dict | None:
+        version, changes = self.store.changes_since(since)
+        if changes is None:
+            return None
+        remaining = {}
+        roster = {}
+        for c in changes:
+            remaining.update(c.get("remaining") or {})
+            roster.update(c.get("roster") or {})
+        return {"version": version, "remaining": remaining, "roster": roster}
 
-def cancel(admin_team: str, expected_admin: str) -> bool:
-    with _lock:
-        if admin_team != expected_admin:
-            return False
-        if not _state["awaiting_confirmation"]:
-            return False
 
-        _state["awaiting_confirmation"] = False
-        _state["active"] = False
-        _state["leading_team"] = None
-        _state["highest_bid"] = 0
-        _state["timer_end"] = 0.0
-        return True
+# --- stanze attive (registrate da main.py all'avvio) ---
 
+_rooms = {}
 
-def get_status():
-    with _lock:
-        now = time.time()
-        time_left = 0
-        if _state["active"]:
-            time_left = max(0, int(_state["timer_end"] - now))
 
-        return {
-            "active": _state["active"],
-            "player": _state["player"],
-            "leading_team": _state["leading_team"],
-            "highest_bid": _state["highest_bid"],
-            "time_left": time_left,
-            "awaiting_confirmation": _state["awaiting_confirmation"],
-        }
+def add_room(room: Room) -> Room:
+    _rooms[room.id] = room
+    return room
 
 
-def get_history():
-    with _lock:
-        return list(reversed(_history))
+def get_room(room_id: str) -> Room | None:
+    return _rooms.get(room_id)
 
 
-def delete_history(history_id: int) -> dict | None:
-    try:
-        hid = int(history_id)
-    except:
-        return None
-
-    with _lock:
-        for i, item in enumerate(_history):
-            if item.get("id") == hid:
-                return _history.pop(i)
-    return None
+def rooms() -> list:
+    return list(_rooms.values())
@@ -0,0 +1,128 @@
+# bench/bid_contention.py
+# Tanti thread che rilanciano insieme sulla stessa asta, con crediti limitati.
+#
+# - "legacy": il vecchio /bid (legge lo stato, controlla i crediti fuori dal lock,
+#   poi aggiunge l'incremento al prezzo *attuale* con una seconda acquisizione)
+# - "atomic": Room.place_bid() con controllo crediti nella stessa transazione
+# - "atomic_cas": come sopra + prezzo atteso (quello che fa il frontend): chi rilancia
+#   su un prezzo già superato riceve stale_price invece di un rilancio "alla cieca"
+#
+# Conta gli "sforamenti" (rilanci accettati a un prezzo superiore ai crediti residui
+# della squadra) e i rilanci validi al secondo: accettati e dentro i crediti, gli unici
+# confrontabili tra le varianti (uno sforamento di "legacy" non è un rilancio in più).
+# Quando i crediti non bastano più l'asta riparte da 1, così il test dura `secondi` con
+# molti arrivi al limite.
+#
+#   python bench/bid_contention.py [thread] [secondi] [--sqlite]
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore, SqliteStore  # noqa: E402
+
+PLAYER = "Bench - XXX (ATT)"
+BUDGET = 500
+
+room = None  # stanza del giro in corso (vedi run)
+
+
+def legacy_bid(team: str, inc: int) -> dict:
+    st = room.get_status()
+    if not st["active"] or st["awaiting_confirmation"]:
+        return {"ok": False}
+    if room.get_remaining(team) < st["highest_bid"] + inc:
+        return {"ok": False, "reason": "insufficient_budget"}
+    with room.store.transaction() as tx:
+        if not tx.state["active"]:
+            return {"ok": False}
+        price = tx.state["highest_bid"] + inc
+        change = auction._commit(tx, {"type": "bid", "team": team, "price": price}, room.clock.monotonic())
+    # pubblica come le altre scritture: get_status() legge l'ultimo stato pubblicato
+    room._publish(change)
+    return {"ok": True, "price": price}
+
+
+def atomic_bid(team: str, inc: int) -> dict:
+    return room.place_bid(team, inc)
+
+
+def atomic_cas_bid(team: str, inc: int) -> dict:
+    # come il frontend: rilancia sul prezzo appena visto
+    return room.place_bid(team, inc, room.get_status()["highest_bid"])
+
+
+def run(bid_fn, threads: int, seconds: float, db_dir: str | None) -> dict:
+    global room
+    teams = [f"Team {i}" for i in range(threads)]
+    budgets = {t: BUDGET for t in teams}
+    if db_dir:
+        path = os.path.join(db_dir, f"{bid_fn.__name__}.db")
+        room = auction.Room("bench", teams[0], SqliteStore(path, budgets, Catalog([PLAYER])))
+    else:
+        room = auction.Room("bench", teams[0], MemoryStore(budgets, Catalog([PLAYER])))
+    room.start_auction(PLAYER, teams[0])
+
+    accepted = [0] * threads
+    overruns = [0] * threads
+    stale = [0] * threads
+    stop = time.perf_counter() + seconds
+    barrier = threading.Barrier(threads)
+
+    def worker(i: int):
+        team = teams[i]
+        barrier.wait()
+        while time.perf_counter() < stop:
+            r = bid_fn(team, 1)
+            if r.get("ok"):
+                accepted[i] += 1
+                if r["price"] > BUDGET:
+                    overruns[i] += 1
+            elif r.get("reason") == "stale_price":
+                stale[i] += 1
+            elif r.get("reason") == "insufficient_budget":
+                room.start_auction(PLAYER, team)
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    room._timer.cancel()
+
+    return {
+        "accepted": sum(accepted),
+        "overruns": sum(overruns),
+        "valid_per_s": (sum(accepted) - sum(overruns)) / elapsed,
+        "stale_rejections": sum(stale),
+    }
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    threads = int(args[0]) if len(args) > 0 else 32
+    seconds = float(args[1]) if len(args) > 1 else 3.0
+    sys.setswitchinterval(1e-5)  # cambi di thread frequenti: più interleaving, più race
+
+    variants = (("legacy", legacy_bid), ("atomic", atomic_bid), ("atomic_cas", atomic_cas_bid))
+    with tempfile.TemporaryDirectory() as d:
+        db_dir = d if "--sqlite" in sys.argv else None
+        report = {name: run(fn, threads, seconds, db_dir) for name, fn in variants}
+    for name, r in report.items():
+        print(f"{name:10s} validi {r['valid_per_s']:9.0f}/s  accettati {r['accepted']:8d}  "
+              f"sforamenti {r['overruns']:6d}  stale_price {r['stale_rejections']}")
+    print(json.dumps(report))
+    return 1 if report["atomic"]["overruns"] or report["atomic_cas"]["overruns"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# bench/catalog_startup.py
+# Tempo per avere il listone pronto all'avvio, con 600 e 5000 giocatori:
+# - lista:   Catalog() da una lista di etichette, come con players.py
+# - csv:     lettura e validazione del CSV + Catalog() (listone.build, niente cache)
+# - cache:   Catalog già compilato letto dalla cache (listone.load, secondo avvio)
+# - avvio:   `import main` in un processo nuovo con FANTA_LISTONE, cache vuota / pronta
+#
+#   python bench/catalog_startup.py [ripetizioni]
+
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+import listone  # noqa: E402
+from catalog import Catalog  # noqa: E402
+
+SIZES = (600, 5000)
+CLUBS = ("Atalanta", "Bologna", "Cagliari", "Como", "Cremonese", "Fiorentina", "Genoa", "Inter", "Juventus",
+         "Lazio", "Lecce", "Milan", "Napoli", "Parma", "Pisa", "Roma", "Sassuolo", "Torino", "Udinese", "Verona")
+ROLES = "P" * 3 + "D" * 8 + "C" * 8 + "A" * 6
+SYLLABLES = ("ba", "ro", "ni", "ca", "lo", "ver", "di", "man", "tel", "gio", "ran", "so", "li", "mar", "zo")
+
+
+def write_listone(path: str, n: int):
+    rng = random.Random(n)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Id;R;RM;Nome;Squadra;Qt.A;Qt.I;Diff.;Qt.A M;Qt.I M;Diff.M;FVM;FVM M\n")
+        for i in range(n):
+            name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+            name += f" {chr(65 + i % 26)}{i}."
+            q = rng.randint(1, 40)
+            f.write(f"{i};{rng.choice(ROLES)};X;{name};{rng.choice(CLUBS)};{q};{q};0;{q};{q};0;{q * 3};{q * 3}\n")
+
+
+def best(fn, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def process_start(path: str, cache_dir: str, runs: int, cold: bool) -> float:
+    env = dict(os.environ, FANTA_LISTONE=path, FANTA_CACHE_DIR=cache_dir, FANTA_DATA_DIR="", PYTHONPATH=ROOT)
+    code = "import time; t0 = time.perf_counter(); import main; print(time.perf_counter() - t0)"
+    times = []
+    for _ in range(runs):
+        if cold:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"mediana di {runs} giri, ms")
+    print(f"{'giocatori':>9} {'lista':>8} {'csv':>8} {'cache':>8} {'avvio (no cache)':>17} {'avvio (cache)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            path = os.path.join(tmp, f"listone-{n}.csv")
+            cache_dir = os.path.join(tmp, f"cache-{n}")
+            write_listone(path, n)
+            labels = [p.label for p in listone.build(path)[0].players]
+
+            t_list = best(lambda: Catalog(labels), runs)
+            t_csv = best(lambda: listone.build(path), runs)
+            listone.load(path, cache_dir)
+            t_cache = best(lambda: listone.load(path, cache_dir), runs)
+            t_cold = process_start(path, cache_dir, runs, cold=True)
+            t_warm = process_start(path, cache_dir, runs, cold=False)
+            print(f"{n:9} {t_list * 1e3:8.1f} {t_csv * 1e3:8.1f} {t_cache * 1e3:8.1f} {t_cold * 1e3:17.1f} "
+                  f"{t_warm * 1e3:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
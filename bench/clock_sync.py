@@ -0,0 +1,189 @@
+# bench/clock_sync.py
+# Errore del timer mostrato dal client rispetto alla scadenza vera, con il vecchio e il
+# nuovo countdown di static/app.js (rifatti qui in Python, stessi conti):
+#
+# - "time_left": polling di /status ogni 300 ms, countdown da performance.now() +
+#   time_left (secondi interi), mostrato in secondi interi per difetto
+# - "deadline": sincronizzazione con /time (5 ping, vince l'andata e ritorno più breve),
+#   poi countdown dalla "deadline" dello stato, mostrato in decimi per eccesso
+#
+# Ogni richiesta subisce un ritardo di rete simulato (andata e ritorno casuali). Client
+# e server girano sulla stessa macchina, quindi time.monotonic() del client è l'ora vera
+# del server: ad ogni frame (60 Hz) si confronta il tempo rimasto stimato dal client
+# (prima dell'arrotondamento per la visualizzazione) con quello vero.
+# "Chiusura" = di quanto il client mostra lo zero prima (-) o dopo (+) la scadenza vera.
+#
+#   python bench/clock_sync.py [aste] [timer_secondi] [ritardo_max_ms]
+#
+# Esce con codice 1 se per "deadline" il p99 dell'errore o una chiusura superano MAX_ERROR_MS.
+
+import http.client
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from loadtest import ADMIN_TEAM, free_port  # noqa: E402
+
+MAX_ERROR_MS = 100.0
+FRAME = 1 / 60
+POLL_INTERVAL = 0.3
+CLOCK_SAMPLES = 5
+
+# origine arbitraria, come performance.now() (ms dall'apertura della pagina)
+_ORIGIN = time.perf_counter()
+
+
+def performance_now() -> float:
+    return (time.perf_counter() - _ORIGIN) * 1000
+
+
+class Net:
+    """Connessione keep-alive con ritardo simulato in andata e in ritorno."""
+
+    def __init__(self, port: int, max_delay_ms: float):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        self.max_delay = max_delay_ms / 1000
+
+    def call(self, method: str, path: str, body=None):
+        time.sleep(random.uniform(0, self.max_delay))
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self.conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+        data = json.loads(self.conn.getresponse().read())
+        time.sleep(random.uniform(0, self.max_delay))
+        return data
+
+
+def sync_clock(net: Net) -> float:
+    # come syncClock() in app.js
+    best = None
+    for _ in range(CLOCK_SAMPLES):
+        t0 = performance_now()
+        data = net.call("GET", "/time")
+        t1 = performance_now()
+        if best is None or t1 - t0 < best[0]:
+            best = (t1 - t0, data["now"] * 1000 - (t0 + t1) / 2)
+    return best[1]
+
+
+class Countdown:
+    """Stato del client: ultima scadenza in performance.now() aggiornata dal thread di rete."""
+
+    def __init__(self):
+        self.ends_at = 0.0
+        self.lock = threading.Lock()
+
+
+def shown_time_left(ends_at: float, now: float) -> float:
+    return max(0.0, math.floor((ends_at - now) / 1000))
+
+
+def shown_deadline(ends_at: float, now: float) -> float:
+    return math.ceil(max(0.0, ends_at - now) / 100) / 10
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_lot(port: int, variant: str, timer: float, max_delay_ms: float, player: str) -> tuple:
+    admin = Net(port, 0)
+    admin.call("POST", "/start", {"team": ADMIN_TEAM, "player": player})
+    net = Net(port, max_delay_ms)
+    countdown = Countdown()
+    stop = threading.Event()
+
+    if variant == "deadline":
+        offset = sync_clock(net)
+        status = net.call("GET", "/status")
+        countdown.ends_at = status["deadline"] * 1000 - offset
+        deadline = status["deadline"]
+        shown = shown_deadline
+    else:
+        deadline = admin.call("GET", "/status")["deadline"]
+        shown = shown_time_left
+
+        def poll():
+            while not stop.is_set():
+                s = net.call("GET", "/status")
+                if s["active"]:
+                    with countdown.lock:
+                        countdown.ends_at = performance_now() + s["time_left"] * 1000
+                stop.wait(POLL_INTERVAL)
+
+        threading.Thread(target=poll, daemon=True).start()
+        time.sleep(2 * max_delay_ms / 1000 + 0.05)  # primo poll arrivato
+
+    errors = []
+    zero_at = None
+    while time.monotonic() < deadline + 0.5:
+        now_local = performance_now()
+        true_left = max(0.0, deadline - time.monotonic())
+        with countdown.lock:
+            left = shown(countdown.ends_at, now_local)
+        if true_left > 0:
+            errors.append(abs(max(0.0, countdown.ends_at - now_local) - true_left * 1000))
+        if left == 0 and zero_at is None:
+            zero_at = time.monotonic()
+        time.sleep(FRAME)
+    stop.set()
+
+    # chiude e rimette il giocatore tra gli svincolati per il giro dopo
+    admin.call("POST", "/cancel", {"team": ADMIN_TEAM})
+    return errors, ((zero_at or time.monotonic()) - deadline) * 1000
+
+
+def main():
+    lots = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    timer = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    max_delay_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 40.0
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(HERE, "loadtest_server.py"), "--port", str(port),
+                               "--timer", str(timer)], cwd=os.path.dirname(HERE))
+    try:
+        for _ in range(200):
+            try:
+                player = Net(port, 0).call("GET", "/players")["players"][0]
+                break
+            except OSError:
+                time.sleep(0.05)
+        else:
+            print("il server non risponde")
+            return 1
+
+        report = {}
+        for variant in ("time_left", "deadline"):
+            errors, closes = [], []
+            for _ in range(lots):
+                e, c = run_lot(port, variant, timer, max_delay_ms, player)
+                errors.extend(e)
+                closes.append(c)
+            report[variant] = {
+                "error_p50_ms": percentile(errors, 0.5), "error_p99_ms": percentile(errors, 0.99),
+                "error_max_ms": max(errors), "close_ms": closes,
+            }
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"aste: {lots}  timer: {timer}s  ritardo di rete: 0-{max_delay_ms:.0f} ms per tratta")
+    for variant, r in report.items():
+        close = ", ".join(f"{c:+.0f}" for c in r["close_ms"])
+        print(f"{variant:10s} errore stimato ms  p50 {r['error_p50_ms']:6.1f}  p99 {r['error_p99_ms']:6.1f}  "
+              f"max {r['error_max_ms']:6.1f}   chiusura ms [{close}]")
+    print(json.dumps(report))
+    worst_close = max(abs(c) for c in report["deadline"]["close_ms"])
+    return 0 if report["deadline"]["error_p99_ms"] <= MAX_ERROR_MS and worst_close <= MAX_ERROR_MS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# bench/draft_queue.py
+# Durata di un'asta intera (200 chiamate) con e senza la coda delle chiamate.
+#
+# Tempi reali scalati di `scala` (default 1/400: il timer di 8 s dura 20 ms):
+# - ogni asta riceve qualche rilancio casuale prima della scadenza, poi l'admin conferma
+#   dopo CONFIRM_SECONDS (uguale nei due casi);
+# - "a mano": dopo la conferma la squadra di turno sceglie il giocatore e lo chiama con
+#   /start, PICK_SECONDS di tempo morto per ogni chiamata;
+# - "coda":   le squadre hanno messo in coda le loro chiamate durante le aste precedenti,
+#   la prossima asta si apre nella stessa transazione della conferma.
+#
+# Stesso seme e stesse chiamate nei due casi: la differenza è solo il tempo tra un'asta
+# e l'altra.
+#
+#   python bench/draft_queue.py [chiamate] [scala]
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+TEAMS = [f"Team {i}" for i in range(8)]
+CONFIRM_SECONDS = 3.0  # l'admin guarda il risultato e preme CONFERMA
+PICK_SECONDS = 15.0  # la squadra di turno cerca il giocatore e avvia l'asta
+MAX_BIDS = 4
+
+
+def wait_closed(room: auction.Room):
+    while not room.store.read_status()[1]["awaiting_confirmation"]:
+        time.sleep(0.0005)
+
+
+def run(lots: int, scale: float, queued: bool) -> dict:
+    auction.TIMER_SECONDS = 8 * scale
+    players = [f"Giocatore {i} - BEN (ATT)" for i in range(lots)]
+    room = auction.Room("bench", TEAMS[0], MemoryStore({t: 10**9 for t in TEAMS}, Catalog(players)))
+    rng = random.Random(1)
+    # chiamate a turno: la squadra i chiama i giocatori i, i+8, i+16, ...
+    nominations = [(players[k], TEAMS[k % len(TEAMS)]) for k in range(lots)]
+    dead = []
+
+    t0 = time.perf_counter()
+    if queued:
+        for i, team in enumerate(TEAMS):
+            room.set_team_queue(team, players[i::len(TEAMS)])
+    else:
+        room.start_auction(*nominations[0])
+
+    for k in range(lots):
+        # qualche rilancio prima della scadenza (ogni rilancio riarma il timer)
+        for _ in range(rng.randint(0, MAX_BIDS)):
+            time.sleep(rng.uniform(0.1, 0.7) * auction.TIMER_SECONDS)
+            room.place_bid(rng.choice(TEAMS), rng.randint(1, 5))
+        wait_closed(room)
+        time.sleep(CONFIRM_SECONDS * scale)
+        t_confirm = time.perf_counter()
+        room.confirm(TEAMS[0])
+        if not queued and k + 1 < lots:
+            time.sleep(PICK_SECONDS * scale)
+            room.start_auction(*nominations[k + 1])
+        if k + 1 < lots:
+            assert room.store.read_status()[1]["player"] == nominations[k + 1][0]
+            dead.append(time.perf_counter() - t_confirm)
+
+    total = time.perf_counter() - t0
+    room._timer.cancel()
+    assert len(room.get_history()) == lots
+    return {"total": total, "dead": sum(dead), "per_lot": total / lots}
+
+
+def main():
+    lots = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 1 / 400
+    print(f"{lots} chiamate, scala 1/{1 / scale:.0f} (timer {8 * scale * 1000:.0f} ms)")
+    print(f"{'':10} {'totale':>10} {'tempi morti':>12} {'per asta':>10} {'reale':>10}")
+    results = {}
+    for name, queued in (("a mano", False), ("coda", True)):
+        r = results[name] = run(lots, scale, queued)
+        print(
+            f"{name:10} {r['total']:9.2f}s {r['dead']:11.3f}s {r['per_lot'] * 1000:8.1f}ms"
+            f" {r['total'] / scale / 60:8.1f}min"
+        )
+    saved = 1 - results["coda"]["total"] / results["a mano"]["total"]
+    print(f"la coda accorcia l'asta del {saved:.0%}")
+
+
+if __name__ == "__main__":
+    main()
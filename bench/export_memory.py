@@ -0,0 +1,71 @@
+# bench/export_memory.py
+# Memoria degli export con storici sempre più lunghi (tracemalloc, picco durante lo
+# scorrimento completo della risposta). Gli export leggono a blocchi: il picco deve
+# restare piatto, mentre la lista intera di GET /history cresce con lo storico.
+# Le rose si ordinano per ruolo una squadra alla volta, quindi costano quanto la rosa più
+# grande: qui ogni squadra ha ROSTER giocatori e lo storico cresce con il numero di squadre.
+#
+#   python bench/export_memory.py [sqlite]
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+import export  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore, SqliteStore  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+ROSTER = 25
+
+
+def make_room(n: int, db_dir: str | None) -> auction.Room:
+    labels = [f"Giocatore {i} - BEN ({('POR', 'DIF', 'CEN', 'ATT')[i % 4]})" for i in range(n)]
+    catalog = Catalog(labels)
+    teams = [f"Team {i}" for i in range(n // ROSTER)]
+    budgets = {t: 10**9 for t in teams}
+    store = SqliteStore(os.path.join(db_dir, f"h{n}.db"), budgets, catalog) if db_dir else MemoryStore(budgets, catalog)
+    with store.transaction() as tx:
+        for i, label in enumerate(labels):
+            entry = {"id": i + 1, "player": label, "winner": teams[i % len(teams)], "price": 1 + i % 50,
+                     "ts": 1_700_000_000 + i}
+            auction._apply(tx, {"type": "confirm", "entry": entry}, 0.0)
+    return auction.Room("bench", teams[0], store)
+
+
+def peak(fn) -> tuple:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    size = fn()
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return top, size
+
+
+def drain(rows) -> int:
+    return sum(len(r) for r in rows)
+
+
+def main():
+    use_sqlite = len(sys.argv) > 1 and sys.argv[1] == "sqlite"
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"store: {'sqlite' if use_sqlite else 'memoria'}  (picco KiB durante lo scorrimento)")
+        print(f"{'storico':>8} {'history.csv':>12} {'rosters.csv':>12} {'rosters.json':>13} {'GET /history':>13}")
+        for n in SIZES:
+            room = make_room(n, tmp if use_sqlite else None)
+            cols = [
+                peak(lambda: drain(export.history_csv(room)))[0],
+                peak(lambda: drain(export.rosters_csv(room, summary=True)))[0],
+                peak(lambda: drain(export.rosters_json(room)))[0],
+                peak(lambda: len(room.get_history()))[0],
+            ]
+            print(f"{n:8} " + " ".join(f"{c / 1024:12.0f}" for c in cols))
+            room._timer.cancel()
+
+
+if __name__ == "__main__":
+    main()
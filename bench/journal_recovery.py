@@ -0,0 +1,98 @@
+# bench/journal_recovery.py
+# Simula un'asta completa da 200 giocatori con il log eventi attivo e misura:
+# - latenza di place_bid con e senza log (il group commit non deve pesare su /bid)
+# - dimensione del log + snapshot a fine asta
+# - tempo di avvio (ripristino da snapshot + coda) in un processo nuovo
+#
+#   python bench/journal_recovery.py [giocatori] [rilanci_per_giocatore]
+
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+
+import auction  # noqa: E402
+import journal  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+TEAMS = [f"Team {i}" for i in range(8)]
+
+
+def player_name(i: int) -> str:
+    return f"Giocatore {i} - XXX (CEN)"
+
+
+def new_store(lots: int) -> MemoryStore:
+    return MemoryStore({t: 10_000 for t in TEAMS}, Catalog([player_name(i) for i in range(lots)]))
+
+
+def draft(room: auction.Room, lots: int, bids: int) -> list:
+    latencies = []
+    rnd = random.Random(42)
+    for i in range(lots):
+        room.start_auction(player_name(i), rnd.choice(TEAMS))
+        for _ in range(bids):
+            t0 = time.perf_counter()
+            room.place_bid(rnd.choice(TEAMS), rnd.choice((1, 1, 1, 5)))
+            latencies.append(time.perf_counter() - t0)
+        with room.store.transaction() as tx:
+            tx.state["timer_end"] = 0.0
+        room.tick()
+        room.confirm(TEAMS[0])
+    return latencies
+
+
+def pct(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1e6
+
+
+def main():
+    lots = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bids = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    base = draft(auction.Room("bench", TEAMS[0], new_store(lots)), lots, bids)
+
+    with tempfile.TemporaryDirectory() as d:
+        j = journal.Journal(d)
+        room = auction.Room("bench", TEAMS[0], new_store(lots))
+        room.restore(j)
+        logged = draft(room, lots, bids)
+        t0 = time.perf_counter()
+        j.flush()
+        flush_wait = time.perf_counter() - t0
+        j.close()
+
+        files = {n: os.path.getsize(os.path.join(d, n)) for n in sorted(os.listdir(d))}
+
+        code = (
+            "import sys, time; sys.path.insert(0, %r); sys.path.insert(0, %r); "
+            "import auction, journal, journal_recovery; "
+            "t0 = time.perf_counter(); room = auction.Room('bench', 'admin', journal_recovery.new_store(%d)); "
+            "n = room.restore(journal.Journal(%r)); "
+            "print(time.perf_counter() - t0, n, len(room.get_history()))"
+            % (os.path.abspath(ROOT), os.path.abspath(os.path.dirname(__file__)), lots, d)
+        )
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        startup, replayed, restored = out.stdout.split()
+
+    print(f"asta: {lots} giocatori x {bids} rilanci ({lots * (bids + 3)} eventi)")
+    for name, values in (("senza log", base), ("con log", logged)):
+        print(f"place_bid {name:10s} us  p50 {statistics.median(values) * 1e6:7.1f}  "
+              f"p99 {pct(values, 0.99):7.1f}")
+    print(f"attesa flush finale: {flush_wait * 1000:.1f} ms")
+    for name, size in files.items():
+        print(f"  {name:28s} {size / 1024:8.1f} KiB")
+    print(f"totale su disco: {sum(files.values()) / 1024:.1f} KiB")
+    print(f"avvio: {float(startup) * 1000:.1f} ms  (eventi rigiocati {replayed}, storico {restored})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# bench/loadtest.py
+# Carico realistico sull'API: N squadre che rilanciano a raffiche + M spettatori che
+# fanno polling (/status ogni 300 ms, /history e /teams ogni 3 s) oppure ascoltano /stream.
+#
+# Misura p50/p95/p99 di /bid, /status e /players, rilanci accettati al secondo,
+# attesa/durata del lock dello store e quanto tardi si chiude l'asta rispetto a
+# TIMER_SECONDS (lato server e come la vedono i client). Scrive i risultati in JSON
+# per confrontare commit diversi:
+#
+#   python bench/loadtest.py --lots 10 --teams 8 --spectators 20 --out results.json
+#   python bench/loadtest.py --spectators 50 --stream
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+ADMIN_TEAM = "Monkey D. United"
+TEAMS = [
+    "Monkey D. United", "AC Ciughina", "ASD Vetriolo", "Atletico Carogna",
+    "Atletico Zio Porcone", "DIRE91 Team", "La Passione di Kristovic", "PSD Paris San Donato",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Client:
+    """Connessione keep-alive che registra le latenze per rotta."""
+
+    def __init__(self, port: int, stats: "Stats"):
+        self.port = port
+        self.stats = stats
+        self.conn = None
+
+    def call(self, method: str, path: str, body=None, route: str | None = None):
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+                self.conn.connect()
+                self.conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            t0 = time.perf_counter()
+            try:
+                headers = {"Content-Type": "application/json"} if body is not None else {}
+                self.conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+                res = self.conn.getresponse()
+                data = res.read()
+            except (ConnectionError, http.client.HTTPException):
+                self.conn = None  # keep-alive scaduta: riprova una volta
+                if attempt:
+                    raise
+                continue
+            self.stats.add(route or path.split("?")[0], time.perf_counter() - t0)
+            return json.loads(data) if data else None
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.counters = {}
+
+    def add(self, route: str, seconds: float):
+        with self._lock:
+            self.latency.setdefault(route, []).append(seconds)
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def summary(self) -> dict:
+        out = {}
+        for route, values in sorted(self.latency.items()):
+            values = sorted(values)
+            pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000  # noqa: E731
+            out[route] = {"count": len(values), "p50_ms": pick(0.50), "p95_ms": pick(0.95),
+                          "p99_ms": pick(0.99), "max_ms": values[-1] * 1000}
+        return out
+
+
+def poller(port: int, stats: Stats, stop: threading.Event, seen_close):
+    c = Client(port, stats)
+    next_slow = 0.0
+    while not stop.is_set():
+        st = c.call("GET", "/status")
+        if st and st.get("awaiting_confirmation"):
+            seen_close(time.perf_counter())
+        now = time.perf_counter()
+        if now >= next_slow:
+            c.call("GET", "/history")
+            c.call("GET", "/teams")
+            next_slow = now + 3.0
+        stop.wait(0.3)
+
+
+def streamer(port: int, stats: Stats, stop: threading.Event, seen_close):
+    # il server manda un keep-alive ogni 15 s: niente timeout brevi (un timeout chiude il file)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", "/stream")
+    res = conn.getresponse()
+    stats.count("stream_clients")
+    kind = None
+    while not stop.is_set():
+        try:
+            line = res.fp.readline()
+        except OSError:
+            break
+        if not line:
+            break
+        line = line.decode().strip()
+        if line.startswith("event:"):
+            kind = line[6:].strip()
+        elif line.startswith("data:") and kind == "state":
+            stats.count("stream_events")
+            if json.loads(line[5:]).get("awaiting_confirmation"):
+                seen_close(time.perf_counter())
+    conn.close()
+
+
+def bidder(port: int, stats: Stats, team: str, bursts: int, burst_size: int, gap: float, cas: bool,
+           rnd: random.Random, last_accept: list):
+    c = Client(port, stats)
+    for _ in range(bursts):
+        for _ in range(burst_size):
+            body = {"team": team, "inc": rnd.choice((1, 1, 1, 5))}
+            if cas:
+                body["expected"] = c.call("GET", "/status")["highest_bid"]
+            r = c.call("POST", "/bid", body)
+            if r.get("ok"):
+                stats.count("bids_accepted")
+                last_accept.append(time.perf_counter())
+            else:
+                stats.count(f"bids_rejected_{r.get('reason')}")
+        time.sleep(rnd.expovariate(1 / gap))
+    # come la UI dopo una conferma: ricarica gli svincolati
+    c.call("GET", "/players")
+
+
+def run(args) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "loadtest_server.py"), "--port", str(port), "--timer", str(args.timer)],
+        cwd=ROOT,
+    )
+    stats = Stats()
+    stop = threading.Event()
+    try:
+        admin = Client(port, stats)
+        for _ in range(100):
+            try:
+                admin.call("GET", "/status")
+                break
+            except OSError:
+                admin.conn = None
+                time.sleep(0.1)
+
+        players = admin.call("GET", "/players")["players"]
+        rnd = random.Random(args.seed)
+
+        closes = []
+        close_seen = [None]
+
+        def seen_close(t: float):
+            if close_seen[0] is None:
+                close_seen[0] = t
+
+        target = streamer if args.stream else poller
+        spectators = [threading.Thread(target=target, args=(port, stats, stop, seen_close), daemon=True)
+                      for _ in range(args.spectators)]
+        for t in spectators:
+            t.start()
+
+        t_start = time.perf_counter()
+        for lot in range(args.lots):
+            close_seen[0] = None
+            last_accept = []
+            admin.call("POST", "/start", {"player": players[lot], "team": ADMIN_TEAM})
+            bidders = [
+                threading.Thread(target=bidder, args=(
+                    port, stats, TEAMS[i % len(TEAMS)], args.bursts, args.burst_size, args.gap, args.cas,
+                    random.Random(rnd.random()), last_accept))
+                for i in range(args.teams)
+            ]
+            for t in bidders:
+                t.start()
+            for t in bidders:
+                t.join()
+
+            # chiusura: la vede per primo uno spettatore o il polling dell'admin
+            while True:
+                st = admin.call("GET", "/status", route="/status (admin)")
+                if st["awaiting_confirmation"]:
+                    seen_close(time.perf_counter())
+                    break
+                time.sleep(0.005)
+            if last_accept:
+                closes.append(close_seen[0] - max(last_accept) - args.timer)
+            admin.call("POST", "/confirm", {"team": ADMIN_TEAM})
+        elapsed = time.perf_counter() - t_start
+
+        stop.set()
+        server_stats = admin.call("GET", "/__bench__/stats")
+    finally:
+        stop.set()
+        server.terminate()
+        server.wait()
+
+    closes.sort()
+    accepted = stats.counters.get("bids_accepted", 0)
+    return {
+        "params": vars(args),
+        "commit": git_commit(),
+        "elapsed_s": elapsed,
+        "accepted_bids_per_s": accepted / elapsed,
+        "counters": stats.counters,
+        "latency": stats.summary(),
+        "close_seen_by_clients_ms": {
+            "p50": closes[len(closes) // 2] * 1000 if closes else None,
+            "max": closes[-1] * 1000 if closes else None,
+        },
+        "server": server_stats,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lots", type=int, default=5, help="giocatori messi all'asta")
+    parser.add_argument("--teams", type=int, default=8, help="squadre che rilanciano")
+    parser.add_argument("--spectators", type=int, default=20)
+    parser.add_argument("--stream", action="store_true", help="spettatori su /stream invece del polling")
+    parser.add_argument("--bursts", type=int, default=3, help="raffiche per squadra e per giocatore")
+    parser.add_argument("--burst-size", type=int, default=5, help="rilanci per raffica")
+    parser.add_argument("--gap", type=float, default=0.2, help="pausa media tra le raffiche (s)")
+    parser.add_argument("--cas", action="store_true", help="rilanci con prezzo atteso (come la UI)")
+    parser.add_argument("--timer", type=float, default=1.0, help="TIMER_SECONDS del server")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="file JSON dei risultati")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    print(f"commit {result['commit']}  {args.lots} giocatori, {args.teams} squadre, "
+          f"{args.spectators} spettatori ({'stream' if args.stream else 'polling'})")
+    for route, x in result["latency"].items():
+        print(f"  {route:16s} n={x['count']:6d}  p50 {x['p50_ms']:7.2f}  p95 {x['p95_ms']:7.2f}  "
+              f"p99 {x['p99_ms']:7.2f} ms")
+    print(f"  rilanci accettati {result['accepted_bids_per_s']:.1f}/s  {result['counters']}")
+    srv = result["server"]
+    for key in ("lock_wait", "lock_hold", "close_lateness"):
+        x = srv[key]
+        if x.get("count"):
+            print(f"  server {key:15s} p50 {x['p50_ms']:.3f}  p99 {x['p99_ms']:.3f}  max {x['max_ms']:.3f} ms")
+    c = result["close_seen_by_clients_ms"]
+    if c["p50"] is not None:
+        print(f"  chiusura vista dai client oltre TIMER_SECONDS: p50 {c['p50']:.1f} ms  max {c['max']:.1f} ms")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench/loadtest_server.py
+# Avvia l'app per bench/loadtest.py: timer più corto, crediti illimitati per le squadre,
+# lock dello store cronometrato e una rotta /__bench__/stats con i numeri lato server.
+#
+#   python bench/loadtest_server.py --port 8000 --timer 1.0
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("FANTA_DATA_DIR", "")
+# si misura l'app, non i limiti per squadra (bench/rate_limit.py li riaccende apposta)
+os.environ.setdefault("FANTA_RATE_LIMIT", "0")
+
+import uvicorn  # noqa: E402
+
+import auction  # noqa: E402
+import main  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+
+class TimedLock:
+    """threading.Lock che registra attesa e durata di ogni acquisizione."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held_since = 0.0
+        self.wait = []
+        self.hold = []
+
+    def __enter__(self):
+        t0 = time.perf_counter()
+        self._lock.acquire()
+        self._held_since = t1 = time.perf_counter()
+        self.wait.append(t1 - t0)
+        return self
+
+    def __exit__(self, *exc):
+        self.hold.append(time.perf_counter() - self._held_since)
+        self._lock.release()
+
+
+def percentiles(values: list) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))] * 1000  # noqa: E731
+    return {"count": len(values), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": values[-1] * 1000}
+
+
+def build_app(timer: float):
+    auction.TIMER_SECONDS = timer
+    store = MemoryStore({t: 10**9 for t in main.TEAM_BUDGETS}, main.CATALOG)
+    lock = store._lock = TimedLock()
+    room = auction.add_room(auction.Room(auction.DEFAULT_ROOM, main.ADMIN_TEAM, store))
+
+    close_lateness = []
+    original_publish = room._publish
+
+    def spy(change):
+        # ritardo della chiusura rispetto alla scadenza (timer_end) lato server
+        if change is not None and change[1]["awaiting_confirmation"]:
+            _, state = store.read_status()
+            if state["awaiting_confirmation"] and state["timer_end"]:
+                close_lateness.append(max(0.0, time.monotonic() - state["timer_end"]))
+        original_publish(change)
+
+    room._publish = spy
+
+    @main.app.get("/__bench__/stats")
+    def stats():
+        return {
+            "lock_wait": percentiles(lock.wait),
+            "lock_hold": percentiles(lock.hold),
+            "close_lateness": percentiles(close_lateness),
+        }
+
+    # la rotta va prima dei file statici montati su "/"
+    main.app.router.routes.insert(0, main.app.router.routes.pop())
+    return main.app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--timer", type=float, default=1.0)
+    args = parser.parse_args()
+    uvicorn.run(build_app(args.timer), host="127.0.0.1", port=args.port, log_level="warning")
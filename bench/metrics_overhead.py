@@ -0,0 +1,104 @@
+# bench/metrics_overhead.py
+# Quanto costano le metriche sui percorsi caldi:
+# - singola registrazione: Counter.inc / Histogram.observe, spente e accese
+# - Room.place_bid (transazione + contatore + tempi del lock), spente e accese
+# - GET /status via ASGI in-process con e senza il middleware RequestTimer
+#
+#   python bench/metrics_overhead.py [iterazioni]
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("FANTA_DATA_DIR", "")
+
+import auction  # noqa: E402
+import metrics  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYER = "Bench - XXX (ATT)"
+
+
+def per_call(fn, n: int) -> float:
+    # migliore di 5 giri, in microsecondi per chiamata
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e6
+
+
+def bid_loop():
+    auction.TIMER_SECONDS = 3600
+    room = auction.Room("bench", "A", MemoryStore({"A": 10**12, "B": 10**12}, Catalog([PLAYER])))
+    room.start_auction(PLAYER, "A")
+    teams = ("A", "B")
+    i = [0]
+
+    def bid():
+        i[0] += 1
+        room.place_bid(teams[i[0] & 1], 1)
+
+    return bid
+
+
+def status_loop():
+    import main
+
+    app = main.app
+    scope = {"type": "http", "method": "GET", "path": "/status", "raw_path": b"/status", "query_string": b"",
+             "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80), "scheme": "http",
+             "http_version": "1.1", "root_path": ""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    timed = metrics.RequestTimer(app)
+    loop = asyncio.new_event_loop()
+
+    def plain():
+        loop.run_until_complete(app(dict(scope), receive, send))
+
+    def with_timer():
+        loop.run_until_complete(timed(dict(scope), receive, send))
+
+    return plain, with_timer
+
+
+def main(n: int):
+    counter = metrics.Counter("bench_total", "bench", ("result",))
+    hist = metrics.Histogram("bench_seconds", "bench")
+    plain, with_timer = status_loop()
+    bid = bid_loop()
+    rows = []
+
+    for enabled in (False, True):
+        metrics.ENABLED = enabled
+        rows.append(("Counter.inc", enabled, per_call(lambda: counter.inc("accepted"), n)))
+        rows.append(("Histogram.observe", enabled, per_call(lambda: hist.observe(0.0012), n)))
+        rows.append(("place_bid", enabled, per_call(bid, n)))
+        rows.append(("GET /status (ASGI)", enabled, per_call(with_timer if enabled else plain, n // 10)))
+
+    print(f"{'operazione':22s} {'spente':>10s} {'accese':>10s} {'diff':>10s}")
+    by_name = {}
+    for name, enabled, us in rows:
+        by_name.setdefault(name, {})[enabled] = us
+    for name, v in by_name.items():
+        print(f"{name:22s} {v[False]:8.2f}us {v[True]:8.2f}us {v[True] - v[False]:+8.2f}us")
+
+    metrics.ENABLED = True
+    t0 = time.perf_counter()
+    text = metrics.render()
+    print(f"render /metrics: {(time.perf_counter() - t0) * 1000:.2f} ms, {len(text)} byte")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
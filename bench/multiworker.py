@@ -0,0 +1,142 @@
+# bench/multiworker.py
+# Throughput di /status e /bid con lo store SQLite condiviso: 1 worker uvicorn vs N.
+#
+#   python bench/multiworker.py [workers...] [--clients 16] [--seconds 5]
+#
+# Ogni client è un processo con una connessione keep-alive. Il database viene creato
+# prima dell'avvio con crediti enormi, così i rilanci non finiscono mai il budget.
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402  (solo per squadre e lista giocatori)
+from store import SqliteStore  # noqa: E402
+
+PLAYER = main.PLAYERS[0]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def connect(port: int) -> http.client.HTTPConnection:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.connect()
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def request(conn, method: str, path: str, body=None):
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    res = conn.getresponse()
+    return json.loads(res.read())
+
+
+def client(port: int, path: str, seconds: float, idx: int, out):
+    conn = connect(port)
+    teams = list(main.TEAM_BUDGETS)
+    done = accepted = 0
+    latencies = []
+    end = time.perf_counter() + seconds
+    while True:
+        t0 = time.perf_counter()
+        if t0 >= end:
+            break
+        if path == "/bid":
+            r = request(conn, "POST", "/bid", {"team": teams[(idx + done) % len(teams)], "inc": 1})
+            accepted += bool(r.get("ok"))
+        else:
+            request(conn, "GET", path)
+        latencies.append(time.perf_counter() - t0)
+        done += 1
+    out.put((done, accepted, latencies))
+
+
+def run(path: str, port: int, clients: int, seconds: float) -> dict:
+    out = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(port, path, seconds, i, out)) for i in range(clients)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    latencies = sorted(x for r in results for x in r[2])
+    total = sum(r[0] for r in results)
+    return {
+        "rps": total / seconds,
+        "accepted_per_s": sum(r[1] for r in results) / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+    }
+
+
+def bench(workers: int, clients: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as d:
+        db = os.path.join(d, "league.db")
+        SqliteStore(db, {t: 10**9 for t in main.TEAM_BUDGETS}, main.CATALOG)
+
+        port = free_port()
+        env = dict(os.environ, FANTA_DB=db, FANTA_DATA_DIR="", FANTA_RATE_LIMIT="0")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            for _ in range(100):
+                try:
+                    conn = connect(port)
+                    request(conn, "GET", "/status")
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            request(conn, "POST", "/start", {"player": PLAYER, "team": next(iter(main.TEAM_BUDGETS))})
+
+            results = {path: run(path, port, clients, seconds) for path in ("/status", "/bid")}
+            conn = connect(port)  # quella di prima è scaduta
+            status = request(conn, "GET", "/status")
+            # ogni rilancio accettato vale +1: il prezzo finale deve tornare esatto
+            accepted = round(results["/bid"]["accepted_per_s"] * seconds)
+            results["bid_consistent"] = status["highest_bid"] == 1 + accepted
+            return results
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("workers", nargs="*", type=int, default=[1, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    report = {}
+    for w in args.workers:
+        report[w] = r = bench(w, args.clients, args.seconds)
+        for path in ("/status", "/bid"):
+            x = r[path]
+            print(f"workers {w:2d}  {path:8s} {x['rps']:8.0f} req/s  p50 {x['p50_ms']:6.2f} ms  "
+                  f"p99 {x['p99_ms']:6.2f} ms")
+        print(f"workers {w:2d}  rilanci accettati {r['/bid']['accepted_per_s']:.0f}/s  "
+              f"prezzo finale coerente: {r['bid_consistent']}")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main_()
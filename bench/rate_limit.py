@@ -0,0 +1,148 @@
+# bench/rate_limit.py
+# Un client impazzito che martella /bid non deve rallentare i rilanci delle altre squadre.
+#
+# Tre giri, ognuno con un server nuovo (bench/loadtest_server.py, timer lunghissimo così
+# l'asta resta aperta): le altre squadre rilanciano ogni `intervallo` ms e si misura la
+# loro latenza, mentre una squadra manda /bid senza pause da `spammer` processi.
+#   - quiete:        nessuno spam (riferimento)
+#   - spam, no lim:  FANTA_RATE_LIMIT=0
+#   - spam, limiti:  limiti di default per squadra (RATE_LIMIT in main.py)
+# Tutti i client arrivano da 127.0.0.1, quindi il limite per indirizzo qui è spento:
+# altrimenti fermerebbe anche le squadre oneste.
+#
+#   python bench/rate_limit.py [secondi] [spammer] [intervallo_ms]
+
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from loadtest import ADMIN_TEAM, free_port  # noqa: E402
+
+SPAM_TEAM = "AC Ciughina"
+
+
+def serve(port: int):
+    import uvicorn
+    import loadtest_server
+    import main
+
+    app = loadtest_server.build_app(3600.0)
+    if main.auction.DEFAULT_ROOM in main.LIMITERS:
+        main.LIMITERS[main.auction.DEFAULT_ROOM][1].rate = 0  # limite per client spento
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def connect(port: int) -> http.client.HTTPConnection:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.connect()
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def post(conn, path: str, body: dict) -> tuple:
+    conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+    res = conn.getresponse()
+    return res.status, res.read()
+
+
+def pct(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+
+def spam_process(port: int, stop: float, counts):
+    c = connect(port)
+    ok = ko = 0
+    while time.perf_counter() < stop:
+        status, _ = post(c, "/bid", {"team": SPAM_TEAM, "inc": 1})
+        ok, ko = (ok + 1, ko) if status == 200 else (ok, ko + 1)
+    counts.put((ok, ko))
+
+
+def run(limits: bool, spammers: int, seconds: float, interval: float) -> dict:
+    port = free_port()
+    env = dict(os.environ, FANTA_RATE_LIMIT="1" if limits else "0", FANTA_DATA_DIR="", PYTHONPATH=ROOT)
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)], cwd=ROOT, env=env)
+    try:
+        for _ in range(100):
+            try:
+                conn = connect(port)
+                break
+            except OSError:
+                time.sleep(0.1)
+        conn.request("GET", "/players")
+        player = json.loads(conn.getresponse().read())["players"][0]
+        post(conn, "/start", {"player": player, "team": ADMIN_TEAM})
+        conn.request("GET", "/teams")
+        honest = [t for t in json.loads(conn.getresponse().read())["budgets"] if t not in (SPAM_TEAM, ADMIN_TEAM)]
+
+        stop = time.perf_counter() + seconds
+        latencies = []
+        spam = {"accepted": 0, "rejected": 0}
+        lock = threading.Lock()
+
+        def bidder(team: str):
+            c = connect(port)
+            mine = []
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                post(c, "/bid", {"team": team, "inc": 1})
+                mine.append(time.perf_counter() - t0)
+                time.sleep(interval)
+            with lock:
+                latencies.extend(mine)
+
+        # lo spam gira in un altro processo: nello stesso si contenderebbe il GIL con i
+        # client onesti e la loro latenza misurerebbe anche quello
+        counts = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=spam_process, args=(port, stop, counts)) for _ in range(spammers)]
+        threads = [threading.Thread(target=bidder, args=(t,)) for t in honest]
+        for p in procs:
+            p.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for _ in procs:
+            ok, ko = counts.get()
+            spam["accepted"] += ok
+            spam["rejected"] += ko
+        for p in procs:
+            p.join()
+        return {"p50": pct(latencies, 0.50), "p95": pct(latencies, 0.95), "p99": pct(latencies, 0.99),
+                "bids": len(latencies), **spam}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        return serve(int(sys.argv[2]))
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    spammers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    interval = (float(sys.argv[3]) if len(sys.argv) > 3 else 250) / 1000
+    rows = [
+        ("quiete", run(True, 0, seconds, interval)),
+        ("spam, no lim", run(False, spammers, seconds, interval)),
+        ("spam, limiti", run(True, spammers, seconds, interval)),
+    ]
+    print(f"{seconds:.0f} s, {spammers} processi di spam, rilanci onesti ogni {interval * 1000:.0f} ms")
+    print(f"{'giro':14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rilanci':>8} {'spam ok':>8} {'spam 429':>9}")
+    for name, r in rows:
+        print(f"{name:14} {r['p50']:8.2f} {r['p95']:8.2f} {r['p99']:8.2f} {r['bids']:8} {r['accepted']:8} "
+              f"{r['rejected']:9}")
+
+
+if __name__ == "__main__":
+    main()
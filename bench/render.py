@@ -0,0 +1,52 @@
+# bench/render.py
+# bench/render.html in un Chromium headless (Playwright), con i risultati in console:
+# stesse misure di quando la si apre a mano, senza copiare niente dal <pre>.
+#
+#   pip install playwright && python -m playwright install chromium
+#   python bench/render.py [--json]
+
+import json
+import os
+import sys
+
+try:
+    from playwright.sync_api import sync_playwright
+except ImportError:
+    sync_playwright = None
+
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render.html")
+TIMEOUT_MS = 120_000
+
+
+def run() -> dict:
+    with sync_playwright() as p:
+        browser = p.chromium.launch()
+        try:
+            page = browser.new_page()
+            page.goto(f"file://{PAGE}")
+            page.wait_for_function("() => window.renderReport !== undefined", timeout=TIMEOUT_MS)
+            report = page.evaluate("() => window.renderReport")
+            report["browser"] = browser.version
+            return report
+        finally:
+            browser.close()
+
+
+def main():
+    if sync_playwright is None:
+        sys.exit("serve playwright: pip install playwright && python -m playwright install chromium")
+    report = run()
+    if "--json" in sys.argv:
+        print(json.dumps(report, indent=1))
+        return
+    print(f"Chromium {report['browser']} (ms per giro, media / p95)")
+    print(f"{'':8} {'fine asta':>16} {'senza modifiche':>16} {'tutto mostrato':>16} {'ricerca':>16} {'nodi':>11}")
+    for name in ("legacy", "keyed"):
+        r = report[name]
+        cols = [f"{r[k]['mean_ms']:.2f} / {r[k]['p95_ms']:.2f}" for k in ("late_draft", "idle", "expanded", "search")]
+        nodes = f"{r['history_nodes']}/{r['expanded_nodes']}"
+        print(f"{name:8} " + " ".join(f"{c:>16}" for c in cols) + f" {nodes:>11}")
+
+
+if __name__ == "__main__":
+    main()
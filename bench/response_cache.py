@@ -0,0 +1,115 @@
+# bench/response_cache.py
+# Polling ad asta ferma, con e senza la cache dei corpi delle risposte (respcache.py).
+#
+# Avvia bench/loadtest_server.py due volte (FANTA_RESPONSE_CACHE=0 e =1), riempie lo
+# storico con `lotti` aste concluse e poi, per ogni rotta di lettura, fa girare `client`
+# connessioni keep-alive per `secondi`: richieste al secondo e byte per risposta
+# (con Accept-Encoding: gzip come un browser).
+#
+#   python bench/response_cache.py [client] [secondi] [lotti]
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from loadtest import ADMIN_TEAM, free_port  # noqa: E402
+
+ROUTES = ("/status", "/teams", "/players", "/history")
+
+
+def connect(port: int) -> http.client.HTTPConnection:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.connect()
+    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+def call(conn, method: str, path: str, body=None) -> bytes:
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+    return conn.getresponse().read()
+
+
+def fill_history(port: int, lots: int):
+    conn = connect(port)
+    players = json.loads(call(conn, "GET", "/players"))["players"]
+    for i in range(lots):
+        call(conn, "POST", "/start", {"player": players[i], "team": ADMIN_TEAM})
+        while not json.loads(call(conn, "GET", "/status"))["awaiting_confirmation"]:
+            time.sleep(0.005)
+        call(conn, "POST", "/confirm", {"team": ADMIN_TEAM})
+    conn.close()
+
+
+def hammer(port: int, path: str, clients: int, seconds: float) -> tuple:
+    counts = [0] * clients
+    sizes = [0] * clients
+    stop = [0.0]
+    barrier = threading.Barrier(clients + 1)
+
+    def worker(k: int):
+        conn = connect(port)
+        barrier.wait()
+        n = 0
+        while time.perf_counter() < stop[0]:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            sizes[k] = len(conn.getresponse().read())
+            n += 1
+        counts[k] = n
+        conn.close()
+
+    ts = [threading.Thread(target=worker, args=(k,)) for k in range(clients)]
+    for t in ts:
+        t.start()
+    stop[0] = time.perf_counter() + seconds
+    barrier.wait()
+    for t in ts:
+        t.join()
+    return sum(counts) / seconds, max(sizes)
+
+
+def run(cache: bool, clients: int, seconds: float, lots: int) -> dict:
+    port = free_port()
+    env = dict(os.environ, FANTA_RESPONSE_CACHE="1" if cache else "0")
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "loadtest_server.py"), "--port", str(port), "--timer", "0.02"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        for _ in range(100):
+            try:
+                connect(port).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        fill_history(port, lots)
+        return {path: hammer(port, path, clients, seconds) for path in ROUTES}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    lots = int(sys.argv[3]) if len(sys.argv) > 3 else 150
+    before = run(False, clients, seconds, lots)
+    after = run(True, clients, seconds, lots)
+    print(f"{clients} client, {seconds:.0f} s per rotta, {lots} aste nello storico")
+    print(f"{'rotta':10} {'senza req/s':>12} {'con req/s':>10} {'x':>6} {'byte senza':>11} {'byte con':>9}")
+    for path in ROUTES:
+        (r0, b0), (r1, b1) = before[path], after[path]
+        print(f"{path:10} {r0:12.0f} {r1:10.0f} {r1 / r0:6.2f} {b0:11} {b1:9}")
+
+
+if __name__ == "__main__":
+    main()
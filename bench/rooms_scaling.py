@@ -0,0 +1,96 @@
+# bench/rooms_scaling.py
+# Più stanze nello stesso processo: i rilanci di una stanza non devono rallentare le altre.
+#
+# Per 1, 2, 4, 8 stanze fa rilanciare `thread` squadre per stanza per `secondi` e misura
+# i rilanci accettati al secondo (totali) e la latenza p99 di place_bid.
+# - "stanze":      ogni stanza con il suo lock (come in produzione)
+# - "lock unico":  tutte le stanze sullo stesso lock, come era l'asta singola globale
+#
+# Con il GIL il totale non può crescere con le stanze, ma deve restare piatto: un calo
+# vorrebbe dire contesa tra stanze che dovrebbero essere indipendenti.
+#
+#   python bench/rooms_scaling.py [thread_per_stanza] [secondi]
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYER = "Bench - XXX (ATT)"
+ROOM_COUNTS = (1, 2, 4, 8)
+
+
+def run(n_rooms: int, threads: int, seconds: float, shared_lock: bool) -> dict:
+    auction.TIMER_SECONDS = 3600
+    lock = threading.Lock()
+    rooms = []
+    for r in range(n_rooms):
+        teams = [f"Team {i}" for i in range(threads)]
+        store = MemoryStore({t: 10**12 for t in teams}, Catalog([PLAYER]))
+        if shared_lock:
+            store._lock = lock
+        room = auction.Room(f"r{r}", teams[0], store)
+        room.start_auction(PLAYER, teams[0])
+        rooms.append((room, teams))
+
+    accepted = [0] * (n_rooms * threads)
+    latencies = [[] for _ in accepted]
+    barrier = threading.Barrier(len(accepted))
+    stop = [0.0]
+
+    def worker(k: int):
+        room, teams = rooms[k // threads]
+        team = teams[k % threads]
+        lat = latencies[k]
+        barrier.wait()
+        if k == 0:
+            stop[0] = time.perf_counter() + seconds
+        while not stop[0]:
+            pass
+        n = 0
+        while time.perf_counter() < stop[0]:
+            t0 = time.perf_counter()
+            if room.place_bid(team, 1)["ok"]:
+                n += 1
+            lat.append(time.perf_counter() - t0)
+        accepted[k] = n
+
+    ts = [threading.Thread(target=worker, args=(k,)) for k in range(len(accepted))]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    for room, _ in rooms:
+        room._timer.cancel()
+
+    all_lat = sorted(x for lat in latencies for x in lat)
+    return {
+        "accepted_per_s": sum(accepted) / seconds,
+        "p99_us": all_lat[min(len(all_lat) - 1, int(len(all_lat) * 0.99))] * 1e6 if all_lat else 0.0,
+    }
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    print(f"{threads} thread per stanza, {seconds}s per giro")
+    print(f"{'stanze':>6s}  {'stanze: rilanci/s':>18s} {'p99 us':>8s}   {'lock unico: rilanci/s':>22s} {'p99 us':>8s}")
+    base = None
+    for n in ROOM_COUNTS:
+        own = run(n, threads, seconds, shared_lock=False)
+        shared = run(n, threads, seconds, shared_lock=True)
+        base = base or own["accepted_per_s"]
+        print(f"{n:6d}  {own['accepted_per_s']:18.0f} {own['p99_us']:8.1f}   "
+              f"{shared['accepted_per_s']:22.0f} {shared['p99_us']:8.1f}   "
+              f"({own['accepted_per_s'] / base:.2f}x rispetto a 1 stanza)")
+
+
+if __name__ == "__main__":
+    main()
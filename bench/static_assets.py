@@ -0,0 +1,102 @@
+# bench/static_assets.py
+# Quanto costa aprire la pagina, prima e dopo assets.py:
+#
+# - "staticfiles": StaticFiles(directory="static", html=True), file letti dal disco ad
+#   ogni richiesta, niente compressione
+# - "assets": StaticAssets("static"), in memoria, gzip/brotli, app.js con l'hash nell'URL
+#
+# Primo caricamento: index.html + gli script che cita. Ricaricamento: come un browser con
+# la cache piena (If-None-Match per quello che va rivalidato, niente richiesta per gli URL
+# immutable). Conta richieste, byte del corpo sul filo e tempo lato server.
+#
+#   python bench/static_assets.py [ripetizioni]
+
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.routing import Mount  # noqa: E402
+from starlette.staticfiles import StaticFiles  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+import assets  # noqa: E402
+
+STATIC = os.path.join(os.path.dirname(__file__), "..", "static")
+ACCEPT = "gzip, deflate, br"
+
+
+class Browser:
+    """Cache HTTP minima: ETag e Cache-Control immutable per URL."""
+
+    def __init__(self, client: TestClient):
+        self.client = client
+        self.cache = {}  # url -> (etag, immutable)
+        self.requests = 0
+        self.bytes = 0
+
+    def get(self, url: str) -> str | None:
+        cached = self.cache.get(url)
+        if cached is not None and cached[1]:
+            return None  # dalla cache, nessuna richiesta
+        headers = {"Accept-Encoding": ACCEPT}
+        if cached is not None and cached[0]:
+            headers["If-None-Match"] = cached[0]
+        r = self.client.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += int(r.headers.get("content-length", 0))
+        immutable = "immutable" in r.headers.get("cache-control", "")
+        self.cache[url] = (r.headers.get("etag"), immutable)
+        return r.text if r.status_code == 200 else None
+
+    def load_page(self):
+        html = self.get("/")
+        if html is not None:
+            self.scripts = re.findall(r'<script src="([^"]+)"', html)
+        for src in self.scripts:
+            self.get(src)
+
+
+def measure(app, rounds: int) -> dict:
+    client = TestClient(app)
+    first = Browser(client)
+    first.load_page()
+
+    repeat = Browser(client)
+    repeat.load_page()
+    repeat.requests = repeat.bytes = 0
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        repeat.load_page()
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "first_requests": first.requests,
+        "first_bytes": first.bytes,
+        "repeat_requests": repeat.requests / rounds,
+        "repeat_bytes": repeat.bytes / rounds,
+        "repeat_ms": elapsed * 1000 / rounds,
+    }
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    variants = {
+        "staticfiles": Starlette(routes=[Mount("/", StaticFiles(directory=STATIC, html=True))]),
+        "assets": Starlette(routes=[Mount("/", assets.StaticAssets(STATIC))]),
+    }
+    report = {name: measure(app, rounds) for name, app in variants.items()}
+    for name, r in report.items():
+        print(f"{name:12s} primo caricamento {r['first_requests']} richieste {r['first_bytes']:6d} B   "
+              f"ricaricamento {r['repeat_requests']:.0f} richieste {r['repeat_bytes']:5.0f} B "
+              f"{r['repeat_ms']:6.2f} ms")
+    print(f"brotli: {'sì' if assets.brotli is not None else 'no (pip install brotli)'}")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench/team_summary.py
+# Costo di /teams/{squadra}/summary e /league/summary con storici sempre più lunghi:
+#
+# - "rescan": il riepilogo rifatto scorrendo tutto lo storico (get_history(), filtro per
+#   squadra, raggruppamento per ruolo con parse_player)
+# - "summary": Room.get_team_summary / get_league_summary (contatori di rosa, spesa e
+#   massimo per ruolo tenuti dallo store + per la squadra i suoi acquisti letti
+#   dall'indice per squadra; la lega legge solo gli aggregati)
+#
+# Come in export_memory.py ogni squadra ha ROSTER giocatori e lo storico cresce con il
+# numero di squadre: il riepilogo di una squadra deve restare piatto, quello della lega
+# cresce solo con le squadre (squadre x ruoli, non lo storico). Ultima colonna: conferma + cancellazione dallo storico di
+# una vendita.
+#
+#   python bench/team_summary.py [sqlite]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import ROLE_ORDER, Catalog, parse_player  # noqa: E402
+from store import MemoryStore, SqliteStore  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+ROSTER = 25
+ROUNDS = 20
+
+
+def make_room(n: int, db_dir: str | None) -> auction.Room:
+    labels = [f"Giocatore {i} - BEN ({('POR', 'DIF', 'CEN', 'ATT')[i % 4]})" for i in range(n + 1)]
+    catalog = Catalog(labels)
+    teams = [f"Team {i}" for i in range(n // ROSTER)]
+    budgets = {t: 10**9 for t in teams}
+    store = SqliteStore(os.path.join(db_dir, f"s{n}.db"), budgets, catalog) if db_dir else MemoryStore(budgets, catalog)
+    with store.transaction() as tx:
+        for i, label in enumerate(labels[:n]):
+            entry = {"id": i + 1, "player": label, "winner": teams[i % len(teams)], "price": 1 + i % 50,
+                     "ts": 1_700_000_000 + i}
+            auction._apply(tx, {"type": "confirm", "entry": entry}, 0.0)
+    return auction.Room("bench", teams[0], store)
+
+
+def rescan_team(room: auction.Room, team: str) -> dict:
+    roles = {}
+    for e in room.get_history():
+        if e["winner"] == team:
+            roles.setdefault(parse_player(e["player"]).role, []).append(e)
+    return {role: {"players": len(es), "spent": sum(e["price"] for e in es),
+                   "max_price": max(e["price"] for e in es)}
+            for role, es in sorted(roles.items(), key=lambda item: ROLE_ORDER.get(item[0], 99))}
+
+
+def rescan_league(room: auction.Room) -> dict:
+    return {team: rescan_team(room, team) for team in room.budgets}
+
+
+def timed(fn, rounds: int = ROUNDS) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / rounds
+
+
+def confirm_and_delete(room: auction.Room, n: int):
+    # una vendita in più e la sua cancellazione, come confirm e /history/delete
+    team = next(iter(room.budgets))
+    with room.store.transaction() as tx:
+        entry = {"id": tx.next_history_id, "player": f"Giocatore {n} - BEN (POR)", "winner": team, "price": 7,
+                 "ts": 1_700_000_000}
+        auction._apply(tx, {"type": "confirm", "entry": entry}, 0.0)
+    room.delete_history(entry["id"])
+
+
+def main():
+    use_sqlite = len(sys.argv) > 1 and sys.argv[1] == "sqlite"
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"store: {'sqlite' if use_sqlite else 'memoria'}  (ms per richiesta)")
+        print(f"{'storico':>8} {'squadra rescan':>15} {'summary':>10} {'lega rescan':>12} {'summary':>10} "
+              f"{'conferma+canc.':>15}")
+        for n in SIZES:
+            room = make_room(n, tmp if use_sqlite else None)
+            team = next(iter(room.budgets))
+            assert {r: {k: v[k] for k in ("players", "spent", "max_price")}
+                    for r, v in room.get_team_summary(team)["roles"].items() if v["players"]} == rescan_team(room, team)
+            cols = [
+                timed(lambda: rescan_team(room, team)),
+                timed(lambda: room.get_team_summary(team)),
+                timed(lambda: rescan_league(room), 1) if n <= 10_000 else float("nan"),
+                timed(room.get_league_summary),
+                timed(lambda: confirm_and_delete(room, n)),
+            ]
+            print(f"{n:8} {cols[0]:15.3f} {cols[1]:10.3f} {cols[2]:12.1f} {cols[3]:10.1f} {cols[4]:15.3f}")
+            room._timer.cancel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# bench/timer_jitter.py
+# Misura quanto in ritardo si chiude un'asta rispetto alla scadenza (timer_end), con i
+# due timer di scheduler.py:
+#
+# - "DeadlineTimer": thread che dorme fino alla scadenza (Room chiamata direttamente,
+#   come in simulate.py e nei bench)
+# - "LoopTimer": call_at sull'event loop, quello che gira nel server (Room.start_writer)
+#
+#   python bench/timer_jitter.py [aste] [timer_secondi]
+#
+# Esce con codice 1 se per uno dei due il p95 supera MAX_P95_MS. L'obiettivo è chiudere
+# entro 1-2 ms: il margine c'è per una macchina carica. Su una VM con una sola CPU p99 e
+# massimo arrivano a 5-15 ms per colpa dello scheduler (anche con il gc spento), per tutti e
+# due i timer allo stesso modo: si stampano ma non decidono l'esito.
+
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYER = "Bench - XXX (POR)"
+
+MAX_P95_MS = 5.0
+
+
+def make_room() -> auction.Room:
+    return auction.Room("bench", "A", MemoryStore({"A": 1000, "B": 1000}, Catalog([PLAYER])))
+
+
+def spy_closes(room: auction.Room, on_close):
+    # il publish avviene subito dopo la chiusura, fuori dal lock
+    original_publish = room._publish
+
+    def spy(change):
+        if change is not None and change[1]["awaiting_confirmation"]:
+            on_close(time.monotonic())
+        original_publish(change)
+
+    room._publish = spy
+
+
+def deadline_timer(runs: int) -> list | None:
+    room = make_room()
+    closed = threading.Event()
+    lateness = []
+    spy_closes(room, lambda now: (lateness.append(now - deadline), closed.set()))
+    for _ in range(runs + 1):
+        closed.clear()
+        room.start_auction(PLAYER, "A")
+        room.place_bid("B", 1)  # il rilancio riarma la scadenza
+        deadline = room.store.read_status()[1]["timer_end"]
+        if not closed.wait(auction.TIMER_SECONDS + 1):
+            return None
+        room.cancel("A")
+    return lateness[1:]  # il primo giro avvia il thread del timer
+
+
+async def loop_timer(runs: int) -> list | None:
+    room = make_room()
+    room.start_writer()
+    closed = asyncio.Event()
+    lateness = []
+    spy_closes(room, lambda now: (lateness.append(now - deadline), closed.set()))
+    for _ in range(runs + 1):
+        closed.clear()
+        await room.run(room.start_auction, PLAYER, "A")
+        await room.run(room.place_bid, "B", 1)
+        deadline = room.store.read_status()[1]["timer_end"]
+        try:
+            await asyncio.wait_for(closed.wait(), auction.TIMER_SECONDS + 1)
+        except asyncio.TimeoutError:
+            return None
+        await room.run(room.cancel, "A")
+    return lateness[1:]
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    auction.TIMER_SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    results = {"DeadlineTimer": deadline_timer(runs), "LoopTimer": asyncio.run(loop_timer(runs))}
+    print(f"aste: {runs}  timer: {auction.TIMER_SECONDS}s  (ritardo chiusura ms)")
+    ok = True
+    for name, lateness in results.items():
+        if lateness is None:
+            print(f"{name:14s} asta non chiusa!")
+            ok = False
+            continue
+        ms = [x * 1000 for x in lateness]
+        p95 = percentile(ms, 0.95)
+        ok = ok and p95 <= MAX_P95_MS
+        print(f"{name:14s} min {min(ms):.3f}  p50 {statistics.median(ms):.3f}  p95 {p95:.3f}  "
+              f"p99 {percentile(ms, 0.99):.3f}  max {max(ms):.3f}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# catalog.py
+# Listone giocatori letto una volta all'avvio: da "Nome - SQUADRA (RUOLO)" a record
+# compatti, già in ordine POR -> DIF -> CEN -> ATT e alfabetico dentro ogni ruolo.
+#
+# L'ordine è fissato da `rank` (posizione nel listone ordinato): l'indice degli
+# svincolati tiene solo i rank in una lista ordinata, aggiornata con bisect quando un
+# giocatore viene venduto o rimesso in lista. Così /players non deve mai riordinare.
+#
+# Per la ricerca (typeahead) ogni giocatore ha le sue parole normalizzate (minuscole,
+# senza accenti: "Candè" -> "cande"); WordIndex le tiene ordinate e risponde ai
+# prefissi con bisect.
+
+import bisect
+import heapq
+import re
+import unicodedata
+
+ROLE_ORDER = {"POR": 0, "DIF": 1, "CEN": 2, "ATT": 3}
+
+
+def normalize(text: str) -> str:
+    """Minuscolo e senza accenti/diacritici."""
+    s = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in s if not unicodedata.combining(c)).lower()
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def words(text: str) -> list:
+    return _WORD_RE.findall(normalize(text))
+
+
+class Player:
+    __slots__ = ("id", "name", "club", "role", "label", "rank", "words", "quotation", "mantra")
+
+    def __init__(self, id: int, name: str, club: str, role: str, label: str):
+        self.id = id  # posizione nella lista sorgente
+        self.name = name
+        self.club = club
+        self.role = role
+        self.label = label  # stringa originale, è quella che usano /start e lo storico
+        self.rank = 0  # posizione nel listone ordinato (chiave di ordinamento)
+        self.quotation = 0  # quotazione ufficiale (solo dal listone CSV, vedi listone.py)
+        self.mantra = ""  # ruolo Mantra, es. "Dc" o "M;C"
+        # (parola, posizione): 0 = prima parola del nome, 1 = altre parole, 2 = squadra
+        name_words = words(name)
+        self.words = tuple(
+            [(w, 0 if i == 0 else 1) for i, w in enumerate(name_words)] + [(w, 2) for w in words(club)]
+        )
+
+    def sort_key(self) -> tuple:
+        return (ROLE_ORDER.get(self.role, 99), self.name.lower(), self.label.lower())
+
+    def identity(self) -> tuple:
+        # nome e ruolo: restano uguali se il giocatore cambia squadra (e quindi etichetta)
+        return (normalize(self.name), self.role)
+
+
+def parse_player(label: str, id: int = 0) -> Player:
+    s = label.strip()
+    role = ""
+    if s.endswith(")") and "(" in s:
+        role = s[s.rfind("(") + 1 : -1].strip().upper()
+        s = s[: s.rfind("(")].strip()
+    name, club = s, ""
+    if " - " in s:
+        name, club = (x.strip() for x in s.split(" - ", 1))
+    return Player(id, name, club.upper(), role, label.strip())
+
+
+def _smallest(ranks, k: int, skip: set, keep=None) -> list:
+    """I k rank distinti più piccoli, in ordine, saltando quelli in `skip` e quelli per cui
+    keep(rank) è falso: heap di k elementi (col segno cambiato, in cima c'è il più grande),
+    senza tenere tutti i rank visti. keep() si chiama solo per i rank che entrerebbero."""
+    heap = []
+    kept = set()
+    for r in ranks:
+        if r in kept or r in skip:
+            continue  # lo stesso rank arriva più volte se due sue parole hanno il prefisso
+        if len(heap) < k:
+            if keep is None or keep(r):
+                heapq.heappush(heap, -r)
+                kept.add(r)
+        elif r < -heap[0] and (keep is None or keep(r)):
+            kept.discard(-heapq.heapreplace(heap, -r))
+            kept.add(r)
+    return sorted(kept)
+
+
+class WordIndex:
+    """Parole dei giocatori come lista ordinata di (posizione, parola, rank), più le parole
+    di ogni rank per controllare le altre parole cercate."""
+
+    def __init__(self, players=()):
+        players = list(players)
+        self._entries = sorted((pos, w, p.rank) for p in players for w, pos in p.words)
+        self._words = {p.rank: tuple(w for w, _ in p.words) for p in players}
+
+    def copy(self) -> "WordIndex":
+        out = WordIndex()
+        out._entries = list(self._entries)
+        out._words = dict(self._words)
+        return out
+
+    def add(self, p: Player):
+        for w, pos in p.words:
+            bisect.insort(self._entries, (pos, w, p.rank))
+        self._words[p.rank] = tuple(w for w, _ in p.words)
+
+    def discard(self, p: Player):
+        for w, pos in p.words:
+            entry = (pos, w, p.rank)
+            i = bisect.bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+        self._words.pop(p.rank, None)
+
+    def _range(self, pos: int, prefix: str) -> tuple:
+        # le parole in posizione `pos` che iniziano con prefix stanno tutte tra
+        # (pos, prefix) e (pos, prefix + "\uffff"): [lo, hi) in _entries
+        entries = self._entries
+        lo = bisect.bisect_left(entries, (pos, prefix))
+        return lo, bisect.bisect_left(entries, (pos, prefix + "\uffff"), lo)
+
+    def search(self, query: str, limit: int | None = None) -> list:
+        """Rank dei giocatori che hanno una parola per ogni parola cercata (per prefisso).
+        Prima chi ha la prima parola del nome che combacia, poi in ordine di listone.
+
+        Una posizione alla volta (prima parola del nome, altre parole, squadra): per ognuna
+        si tengono solo i `limit` rank più piccoli, e appena sono `limit` non si guardano le
+        posizioni dopo."""
+        qwords = words(query)
+        if not qwords:
+            return []
+        first, rest = qwords[0], qwords[1:]
+        need = len(self._words) if limit is None else limit
+        out = []
+        seen = set()
+        for pos in (0, 1, 2):
+            if len(out) >= need:
+                break
+            lo, hi = self._range(pos, first)
+            if lo == hi:
+                continue
+            keep = (lambda r: self._has_words(r, rest)) if rest else None
+            entries = self._entries
+            found = _smallest((entries[i][2] for i in range(lo, hi)), need - len(out), seen, keep)
+            out.extend(found)
+            seen.update(found)
+        return out
+
+    def _has_words(self, rank: int, qwords: list) -> bool:
+        own = self._words.get(rank, ())
+        for q in qwords:
+            for w in own:
+                if w.startswith(q):
+                    break
+            else:
+                return False
+        return True
+
+
+class Catalog:
+    def __init__(self, labels, info: dict | None = None):
+        # info = {etichetta: (quotazione, ruolo mantra)}, facoltativo
+        players = []
+        seen = set()
+        for i, label in enumerate(labels):
+            if not label or not label.strip() or label.strip() in seen:
+                continue
+            seen.add(label.strip())
+            p = parse_player(label, i)
+            if info and p.label in info:
+                p.quotation, p.mantra = info[p.label]
+            players.append(p)
+
+        players.sort(key=Player.sort_key)
+        for rank, p in enumerate(players):
+            p.rank = rank
+
+        self.players = players  # ordinati per rank
+        self._by_label = {p.label: p for p in players}
+        self._by_identity = {}  # (nome normalizzato, ruolo) -> [giocatori]
+        for p in players:
+            self._by_identity.setdefault(p.identity(), []).append(p)
+        self.words = WordIndex(players)
+        # intervallo di rank [inizio, fine) per ogni ruolo
+        self._role_ranges = {}
+        for p in players:
+            start, _ = self._role_ranges.get(p.role, (p.rank, p.rank))
+            self._role_ranges[p.role] = (start, p.rank + 1)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def get(self, label: str) -> Player | None:
+        return self._by_label.get((label or "").strip())
+
+    def same_player(self, label: str) -> list:
+        """Giocatori del listone che corrispondono a `label` (es. un venduto dello storico):
+        quello con la stessa etichetta se c'è, altrimenti quelli con lo stesso nome e ruolo
+        (il giocatore ha cambiato squadra in un listone nuovo). Con due omonimi dello stesso
+        ruolo valgono tutti e due: meglio bloccarne uno di troppo che vendere due volte."""
+        p = self.get(label)
+        if p is not None:
+            return [p]
+        return list(self._by_identity.get(parse_player(label).identity(), ()))
+
+    def role_range(self, role: str) -> tuple:
+        return self._role_ranges.get(role, (0, 0))
+
+    def select(self, ranks, role: str | None = None, club: str | None = None) -> list:
+        """Etichette dei giocatori con rank in `ranks` (già ordinati), filtrate per ruolo/squadra."""
+        players = self.players
+        out = []
+        for r in ranks:
+            p = players[r]
+            if (role is None or p.role == role) and (club is None or p.club == club):
+                out.append(p.label)
+        return out
+
+
+class AvailableIndex:
+    """Svincolati come lista ordinata di rank (insert/remove con bisect), più il loro
+    indice di ricerca aggiornato negli stessi punti."""
+
+    def __init__(self, catalog: Catalog, labels=None):
+        self.catalog = catalog
+        if labels is None:
+            self._ranks = [p.rank for p in catalog.players]
+        else:
+            self._ranks = sorted({p.rank for p in map(catalog.get, labels) if p is not None})
+        self._words = WordIndex(catalog.players[r] for r in self._ranks)
+
+    def __len__(self) -> int:
+        return len(self._ranks)
+
+    def copy(self) -> "AvailableIndex":
+        """Copia indipendente (liste copiate, giocatori condivisi): O(n), senza riordinare."""
+        out = AvailableIndex.__new__(AvailableIndex)
+        out.catalog = self.catalog
+        out._ranks = list(self._ranks)
+        out._words = self._words.copy()
+        return out
+
+    def __contains__(self, label: str) -> bool:
+        p = self.catalog.get(label)
+        if p is None:
+            return False
+        i = bisect.bisect_left(self._ranks, p.rank)
+        return i < len(self._ranks) and self._ranks[i] == p.rank
+
+    def add(self, label: str):
+        p = self.catalog.get(label)
+        if p is None:
+            return
+        i = bisect.bisect_left(self._ranks, p.rank)
+        if i == len(self._ranks) or self._ranks[i] != p.rank:
+            self._ranks.insert(i, p.rank)
+            self._words.add(p)
+
+    def discard(self, label: str):
+        p = self.catalog.get(label)
+        if p is None:
+            return
+        i = bisect.bisect_left(self._ranks, p.rank)
+        if i < len(self._ranks) and self._ranks[i] == p.rank:
+            del self._ranks[i]
+            self._words.discard(p)
+
+    def labels(self, role: str | None = None, club: str | None = None) -> list:
+        ranks = self._ranks
+        if role is not None:
+            # i ruoli sono intervalli contigui di rank: basta tagliare la lista
+            start, end = self.catalog.role_range(role)
+            ranks = ranks[bisect.bisect_left(ranks, start) : bisect.bisect_left(ranks, end)]
+        return self.catalog.select(ranks, None, club)
+
+    def search(self, query: str, limit: int) -> list:
+        return [self.catalog.players[r].label for r in self._words.search(query, limit)]
@@ -0,0 +1,85 @@
+# clock.py
+# Orologio dell'asta, passato a Room: scadenze del timer, time_left e ts dello storico.
+#
+# - SystemClock: il tempo vero (time.monotonic / time.time) e un DeadlineTimer con il
+#   suo thread, come in produzione.
+# - VirtualClock: tempo simulato che avanza solo con advance(). I timer scattano dentro
+#   advance(), nello stesso thread, in ordine di scadenza: un'asta intera di 200
+#   chiamate gira in pochi secondi (vedi simulate.py). Da usare da un solo thread.
+
+import time
+
+from scheduler import DeadlineTimer
+
+
+class SystemClock:
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def timer(self, callback, name: str = "deadline-timer"):
+        return DeadlineTimer(callback, name=name)
+
+
+class VirtualTimer:
+    # stessa interfaccia di DeadlineTimer (arm/cancel), guidato da VirtualClock.advance()
+    def __init__(self, clock: "VirtualClock", callback):
+        self._clock = clock
+        self._callback = callback
+        self.deadline = None
+
+    def arm(self, deadline: float):
+        self.deadline = deadline
+
+    def cancel(self):
+        self.deadline = None
+
+
+class VirtualClock:
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        self._now = float(start)
+        self._epoch = epoch  # time() = epoch + monotonic()
+        self._timers = []
+        self.callback_seconds = []  # durata (vera) di ogni callback dei timer, per le statistiche
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def time(self) -> float:
+        return self._epoch + self._now
+
+    def timer(self, callback, name: str = "deadline-timer") -> VirtualTimer:
+        t = VirtualTimer(self, callback)
+        self._timers.append(t)
+        return t
+
+    def next_deadline(self) -> float | None:
+        armed = [t.deadline for t in self._timers if t.deadline is not None]
+        return min(armed) if armed else None
+
+    def advance(self, seconds: float):
+        """Porta avanti il tempo di `seconds`, facendo scattare i timer scaduti nel frattempo
+        (ognuno all'ora della sua scadenza, come farebbe il thread del DeadlineTimer)."""
+        target = self._now + max(0.0, seconds)
+        while self._fire_next(target):
+            pass
+        self._now = target
+
+    def run_timers(self) -> bool:
+        """Salta alla prossima scadenza e la fa scattare; False se non c'è niente di armato."""
+        deadline = self.next_deadline()
+        return deadline is not None and self._fire_next(deadline)
+
+    def _fire_next(self, until: float) -> bool:
+        due = [t for t in self._timers if t.deadline is not None and t.deadline <= until]
+        if not due:
+            return False
+        t = min(due, key=lambda t: t.deadline)
+        self._now = max(self._now, t.deadline)
+        t.deadline = None
+        t0 = time.perf_counter()
+        t._callback()  # la callback può riarmare il timer
+        self.callback_seconds.append(time.perf_counter() - t0)
+        return True
@@ -0,0 +1,92 @@
+# events.py
+# Canale "push" verso i browser (Server-Sent Events su /stream).
+#
+# Ogni stanza d'asta ha il suo Broker. Chi modifica lo stato chiama
+# publish(kind, payload, version): l'ultimo payload per ogni tipo di evento viene tenuto
+# in memoria e le connessioni /stream vengono svegliate.
+# Gli eventi ravvicinati si "fondono": un client lento riceve solo l'ultimo stato.
+# publish() può essere chiamato da qualsiasi thread (handler sync, timer).
+
+import asyncio
+import threading
+
+
+class Subscription:
+    def __init__(self, broker: "Broker", loop: asyncio.AbstractEventLoop):
+        self._broker = broker
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._pending = set()  # kinds non ancora consegnati
+        self._seen = {}  # kind -> ultima versione consegnata
+
+    def _notify(self, kind: str):
+        # gira sul loop del client (via call_soon_threadsafe)
+        self._pending.add(kind)
+        self._wakeup.set()
+
+    async def wait(self, timeout: float) -> list:
+        """Aspetta nuovi eventi (max `timeout` secondi).
+
+        Ritorna una lista di (kind, payload) con solo l'ultimo payload per tipo;
+        lista vuota se è scaduto il timeout (utile per il keepalive).
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._wakeup.clear()
+
+        kinds, self._pending = self._pending, set()
+        out = []
+        broker = self._broker
+        with broker._lock:
+            for kind in sorted(kinds):
+                version, payload = broker._latest.get(kind, (0, None))
+                if version > self._seen.get(kind, 0):
+                    self._seen[kind] = version
+                    out.append((kind, payload))
+        return out
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}  # kind -> (version, payload)
+        self._subscribers = set()
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, kind: str, payload, version: int):
+        """Pubblica un nuovo stato. Versioni più vecchie dell'ultima pubblicata vengono ignorate
+        (due thread possono pubblicare fuori ordine dopo aver rilasciato i rispettivi lock)."""
+        with self._lock:
+            current = self._latest.get(kind)
+            if current is not None and current[0] >= version:
+                return
+            self._latest[kind] = (version, payload)
+            subs = list(self._subscribers)
+
+        for sub in subs:
+            try:
+                sub._loop.call_soon_threadsafe(sub._notify, kind)
+            except RuntimeError:
+                # loop già chiuso: la connessione sta morendo, verrà rimossa da unsubscribe()
+                pass
+
+    def version(self, kind: str) -> int:
+        """Ultima versione pubblicata per quel tipo di evento (0 = mai)."""
+        with self._lock:
+            return self._latest.get(kind, (0, None))[0]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
@@ -0,0 +1,83 @@
+# export.py
+# Export di fine asta: storico delle vendite e rose, in CSV (si apre con Excel e si
+# importa nelle piattaforme di fantacalcio: una riga per giocatore, colonne
+# Squadra/Ruolo/Calciatore/Club/Prezzo) e in JSON.
+#
+# Sono generatori di righe da dare a una StreamingResponse: lo storico si legge a
+# blocchi (Room.iter_history) e le rose una squadra alla volta (Room.get_team_summary,
+# lo stesso riepilogo di /teams/{squadra}/summary), quindi la memoria usata non cresce
+# con la lunghezza dello storico.
+# Dentro ogni squadra i giocatori sono in ordine POR -> DIF -> CEN -> ATT (ROLE_ORDER)
+# e alfabetico, come nel listone.
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from catalog import parse_player
+
+# Excel riconosce l'UTF-8 (accenti nei nomi) solo con il BOM in testa
+BOM = "\ufeff"
+
+SEPARATORS = {",": ",", ";": ";", "tab": "\t"}
+
+
+class _Rows:
+    # una riga CSV alla volta, con le regole di quoting del modulo csv
+    def __init__(self, sep: str):
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf, delimiter=sep, lineterminator="\r\n")
+
+    def line(self, row) -> str:
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._writer.writerow(row)
+        return self._buf.getvalue()
+
+
+def _players(summary: dict) -> list:
+    # giocatori del riepilogo di una squadra, in ordine di listone
+    return [p for group in summary["roster"] for p in group["players"]]
+
+
+def history_csv(room, sep: str = ","):
+    """Vendite dalla prima all'ultima."""
+    rows = _Rows(sep)
+    yield BOM + rows.line(["Id", "Data", "Calciatore", "Club", "Ruolo", "Squadra", "Prezzo"])
+    for e in room.iter_history():
+        p = parse_player(e["player"])
+        when = datetime.fromtimestamp(e["ts"]).isoformat(sep=" ", timespec="seconds")
+        yield rows.line([e["id"], when, p.name, p.club, p.role, e["winner"], e["price"]])
+
+
+def rosters_csv(room, sep: str = ",", summary: bool = False):
+    """Rose squadra per squadra. Con summary=True dopo ogni squadra ci sono le righe della
+    spesa per ruolo e dei crediti residui (da togliere prima di un import)."""
+    rows = _Rows(sep)
+    yield BOM + rows.line(["Squadra", "Ruolo", "Calciatore", "Club", "Prezzo"])
+    for team in room.budgets:
+        s = room.get_team_summary(team)
+        for p in _players(s):
+            yield rows.line([team, p["role"], p["name"], p["club"], p["price"]])
+        if summary:
+            for role, r in s["roles"].items():
+                yield rows.line([team, role, "Totale ruolo", "", r["spent"]])
+            yield rows.line([team, "", "Crediti residui", "", s["remaining"]])
+
+
+def rosters_json(room):
+    """{"teams": [{"team", "budget", "remaining", "spent", "spent_by_role", "players": [...]}]}"""
+    yield '{"teams": ['
+    for i, team in enumerate(room.budgets):
+        s = room.get_team_summary(team)
+        item = {
+            "team": team,
+            "budget": s["budget"],
+            "remaining": s["remaining"],
+            "spent": s["spent"],
+            "spent_by_role": {role: r["spent"] for role, r in s["roles"].items()},
+            "players": _players(s),
+        }
+        yield ("," if i else "") + json.dumps(item, ensure_ascii=False)
+    yield "]}"
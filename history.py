@@ -0,0 +1,131 @@
+# history.py
+# Storico delle aste concluse, indicizzato per id, squadra vincitrice e giocatore.
+#
+# Gli id crescono sempre (nuova asta = id più alto), quindi ogni indice è una lista di
+# id in ordine crescente. Una cancellazione toglie l'entry dal dizionario (O(1)) e lascia
+# l'id nelle liste come "buco", che viene saltato in lettura; quando i buchi diventano
+# troppi la lista viene ricostruita (nuovo oggetto, le letture in corso non se ne accorgono).
+#
+# Le letture prendono solo i riferimenti (dizionario + lista) e scorrono dal fondo:
+# una pagina costa O(log n + limit) e non copia l'intero storico.
+
+import bisect
+
+
+class _IdList:
+    __slots__ = ("ids", "holes")
+
+    def __init__(self, ids=None):
+        self.ids = ids if ids is not None else []
+        self.holes = 0
+
+
+class HistoryIndex:
+    def __init__(self, entries=()):
+        self._entries = {}  # id -> entry (le entry non vengono mai modificate)
+        self._all = _IdList()
+        self._by_team = {}  # winner -> _IdList
+        self._by_player = {}  # player -> _IdList
+        for e in sorted(entries, key=lambda e: e["id"]):
+            self.append(e)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        # dal più vecchio al più recente
+        entries = self._entries
+        for hid in self._all.ids:
+            e = entries.get(hid)
+            if e is not None:
+                yield e
+
+    def newest_first(self) -> list:
+        entries = self._entries
+        ids = self._all.ids
+        out = []
+        for i in range(len(ids) - 1, -1, -1):
+            e = entries.get(ids[i])
+            if e is not None:
+                out.append(e)
+        return out
+
+    def get(self, hid: int) -> dict | None:
+        return self._entries.get(hid)
+
+    def append(self, entry: dict):
+        hid = entry["id"]
+        self._entries[hid] = entry
+        for idx in self._indexes(entry, create=True):
+            if idx.ids and idx.ids[-1] >= hid:
+                bisect.insort(idx.ids, hid)  # solo in caso di id fuori ordine
+            else:
+                idx.ids.append(hid)
+
+    def remove(self, hid: int) -> dict | None:
+        entry = self._entries.pop(hid, None)
+        if entry is None:
+            return None
+        for idx in self._indexes(entry, create=False):
+            idx.holes += 1
+            if idx.holes * 2 > len(idx.ids):
+                self._compact(idx)
+        return entry
+
+    def _indexes(self, entry: dict, create: bool) -> list:
+        out = [self._all]
+        for index, key in ((self._by_team, entry.get("winner")), (self._by_player, entry.get("player"))):
+            idx = index.get(key)
+            if idx is None and create:
+                idx = index[key] = _IdList()
+            if idx is not None:
+                out.append(idx)
+        return out
+
+    def _compact(self, idx: _IdList):
+        entries = self._entries
+        idx.ids = [h for h in idx.ids if h in entries]  # lista nuova: chi sta leggendo tiene la vecchia
+        idx.holes = 0
+
+    def after(self, after: int, limit: int) -> list:
+        """Entry con id > after dalla più vecchia, max `limit` (per scorrere tutto a blocchi)."""
+        ids = self._all.ids
+        entries = self._entries
+        i = bisect.bisect_right(ids, after)
+        out = []
+        while i < len(ids) and len(out) < limit:
+            e = entries.get(ids[i])
+            i += 1
+            if e is not None:
+                out.append(e)
+        return out
+
+    def page(self, cursor: int | None = None, limit: int = 50, team: str | None = None,
+             player: str | None = None) -> tuple:
+        """Entry con id < cursor dalla più recente, max `limit`; filtri opzionali.
+        Ritorna (entry, cursore_successivo | None)."""
+        if team is not None:
+            idx = self._by_team.get(team)
+        elif player is not None:
+            idx = self._by_player.get(player)
+        else:
+            idx = self._all
+        if idx is None:
+            return [], None
+
+        ids = idx.ids
+        entries = self._entries
+        i = len(ids) if cursor is None else bisect.bisect_left(ids, cursor)
+        out = []
+        while i > 0 and len(out) < limit:
+            i -= 1
+            e = entries.get(ids[i])
+            if e is None:
+                continue
+            if player is not None and e.get("player") != player:
+                continue
+            out.append(e)
+
+        # pagina piena e lista non finita: il client può chiedere la successiva
+        more = len(out) == limit and i > 0
+        return out, (out[-1]["id"] if more else None)
@@ -0,0 +1,252 @@
+# journal.py
+# Log degli eventi su disco (append-only) + snapshot periodici, per non perdere
+# l'asta se il processo si riavvia a metà.
+#
+# Layout della cartella:
+#   snapshot.json          {"seq": N, "state": {...}}  (scritto con tmp + rename)
+#   events-<seq>.log       una riga JSON per evento, ogni evento ha un "seq" crescente
+#
+# append() non tocca il disco: mette l'evento in un buffer e sveglia il thread di
+# scrittura, che scrive e fa fsync di tutto quello che si è accumulato nel frattempo
+# (group commit). Così /bid non paga la latenza di un fsync per ogni rilancio. Chi non
+# può rispondere prima che l'evento sia su disco (conferme e cancellazioni dallo
+# storico, vedi Room.wait_durable) aspetta con wait(seq) il gruppo che lo contiene.
+#
+# snapshot(state) accoda uno snapshot nello stesso flusso: il thread lo scrive dopo
+# gli eventi precedenti, apre un nuovo segmento e cancella quelli vecchi.
+# All'avvio load() ritorna l'ultimo snapshot e solo gli eventi successivi. read() fa
+# la stessa lettura senza toccare la cartella (per simulate.py e altri strumenti).
+
+import json
+import os
+import threading
+import traceback
+
+SNAPSHOT_EVERY = 500  # eventi tra uno snapshot e l'altro
+
+_SNAPSHOT_FILE = "snapshot.json"
+_SEGMENT_PREFIX = "events-"
+_SEGMENT_SUFFIX = ".log"
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _segments(directory: str) -> list:
+    names = [
+        n for n in os.listdir(directory)
+        if n.startswith(_SEGMENT_PREFIX) and n.endswith(_SEGMENT_SUFFIX)
+    ]
+    return sorted(names, key=lambda n: int(n[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+
+
+def _read(directory: str) -> tuple:
+    # (stato_snapshot | None, eventi successivi, ultimo seq)
+    state = None
+    snap_seq = 0
+    snap_path = os.path.join(directory, _SNAPSHOT_FILE)
+    if os.path.exists(snap_path):
+        with open(snap_path, "r", encoding="utf-8") as f:
+            snap = json.load(f)
+        snap_seq = int(snap.get("seq", 0))
+        state = snap.get("state")
+
+    tail = []
+    last_seq = snap_seq
+    for name in _segments(directory):
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break  # riga scritta a metà: il resto del file non è affidabile
+                seq = int(event.get("seq", 0))
+                if seq <= last_seq:
+                    continue
+                tail.append(event)
+                last_seq = seq
+    return state, tail, last_seq
+
+
+def read(directory: str) -> tuple:
+    """(stato_snapshot | None, [eventi successivi allo snapshot]) di un log, in sola
+    lettura: niente segmento nuovo, la cartella resta com'è (anche se un server la usa)."""
+    if not os.path.isdir(directory):
+        return None, []
+    state, tail, _ = _read(directory)
+    return state, tail
+
+
+class Journal:
+    def __init__(self, directory: str, snapshot_every: int | None = None):
+        self.directory = directory
+        self.snapshot_every = snapshot_every or SNAPSHOT_EVERY
+        os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._buffer = []  # ("event", dict) | ("snapshot", seq, state)
+        self._seq = 0  # ultimo seq assegnato
+        self._durable_seq = 0  # ultimo seq scritto e fsync-ato
+        self._since_snapshot = 0
+        self._segment = None
+        self._thread = None
+        self._writing = False
+        self._closed = False
+
+    # --- avvio ---
+
+    def _segments(self) -> list:
+        return _segments(self.directory)
+
+    def load(self) -> tuple:
+        """Ritorna (stato_snapshot | None, [eventi successivi allo snapshot]).
+
+        Va chiamata una volta, prima del primo append(): apre poi un segmento nuovo,
+        così un'eventuale ultima riga troncata dal crash resta in un file chiuso.
+        Per leggere un log senza scriverci c'è read().
+        """
+        state, tail, last_seq = _read(self.directory)
+        self._seq = last_seq
+        self._durable_seq = last_seq
+        self._since_snapshot = len(tail)
+        self._open_segment(last_seq + 1)
+        return state, tail
+
+    def _open_segment(self, first_seq: int):
+        if self._segment is not None:
+            self._segment.close()
+        name = f"{_SEGMENT_PREFIX}{first_seq:012d}{_SEGMENT_SUFFIX}"
+        self._segment = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        _fsync_dir(self.directory)
+
+    # --- scrittura ---
+
+    def append(self, event: dict) -> int:
+        """Accoda un evento (dict JSON-serializzabile, non va più modificato). Ritorna il seq."""
+        with self._cond:
+            self._seq += 1
+            event["seq"] = self._seq
+            self._buffer.append(("event", event))
+            self._since_snapshot += 1
+            self._ensure_thread()
+            self._cond.notify()
+            return self._seq
+
+    @property
+    def seq(self) -> int:
+        """Ultimo seq assegnato (con wait(): "tutto quello registrato finora")."""
+        return self._seq
+
+    def wait(self, seq: int, timeout: float | None = None) -> bool:
+        """Aspetta che l'evento `seq` (e quelli prima) sia scritto e fsync-ato. A differenza
+        di flush() non aspetta che il buffer si svuoti: sotto una raffica di rilanci
+        basta il gruppo che contiene `seq`. False se scade `timeout` prima."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._durable_seq >= seq or self._closed, timeout)
+
+    def wants_snapshot(self) -> bool:
+        return self._since_snapshot >= self.snapshot_every
+
+    def snapshot(self, state: dict):
+        """Accoda uno snapshot che copre tutti gli eventi già accodati."""
+        with self._cond:
+            self._buffer.append(("snapshot", self._seq, state))
+            self._since_snapshot = 0
+            self._ensure_thread()
+            self._cond.notify()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Aspetta che tutto quello accodato finora sia su disco."""
+        with self._cond:
+            target = self._seq
+            return self._cond.wait_for(
+                lambda: self._durable_seq >= target and not self._buffer and not self._writing, timeout
+            )
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                batch, self._buffer = self._buffer, []
+                self._writing = True
+
+            durable = self._durable_seq
+            try:
+                durable = self._write_batch(batch)
+            except Exception:
+                traceback.print_exc()
+
+            with self._cond:
+                self._durable_seq = max(self._durable_seq, durable)
+                self._writing = False
+                self._cond.notify_all()
+
+    def _write_batch(self, batch: list) -> int:
+        durable = self._durable_seq
+        lines = []
+        for item in batch:
+            if item[0] == "event":
+                lines.append(json.dumps(item[1], separators=(",", ":")))
+                durable = item[1]["seq"]
+                continue
+
+            # snapshot: prima rendi durevoli gli eventi che lo precedono
+            _, seq, state = item
+            self._write_lines(lines)
+            lines = []
+            self._write_snapshot(seq, state)
+
+        self._write_lines(lines)
+        return durable
+
+    def _write_lines(self, lines: list):
+        if not lines:
+            return
+        self._segment.write("\n".join(lines) + "\n")
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+
+    def _write_snapshot(self, seq: int, state: dict):
+        path = os.path.join(self.directory, _SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": seq, "state": state}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.directory)
+
+        # i segmenti fino a `seq` sono coperti dallo snapshot
+        old = self._segments()
+        self._open_segment(seq + 1)
+        current = os.path.basename(self._segment.name)
+        for name in old:
+            if name != current:
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,21 @@
+# league.py
+# La lega della stanza di default: squadre, admin, crediti iniziali e posti in rosa.
+# Solo costanti, niente effetti all'import: main.py ci apre la stanza, simulate.py
+# (--journal) e i bench le leggono senza avviare il server né toccare DATA_DIR.
+
+ADMIN_TEAM = "Monkey D. United"
+
+# === BUDGET INIZIALI (come da te) ===
+TEAM_BUDGETS = {
+    "Monkey D. United": 215,
+    "AC Ciughina": 148,
+    "ASD Vetriolo": 0,
+    "Atletico Carogna": 203,
+    "Atletico Zio Porcone": 225,
+    "DIRE91 Team": 0,
+    "La Passione di Kristovic": 165,
+    "PSD Paris San Donato": 180,
+}
+
+# Posti in rosa per ruolo: nessuno può offrire più di (crediti - 1 per ogni altro posto vuoto)
+ROSTER_LIMITS = {"POR": 3, "DIF": 8, "CEN": 8, "ATT": 6}
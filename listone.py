@@ -0,0 +1,145 @@
+# listone.py
+# Listone da file CSV/TSV (quello scaricato dal sito di fantacalcio prima di ogni
+# sessione di mercato) al posto della lista scritta a mano in players.py.
+#
+# Colonne riconosciute dall'intestazione (maiuscole/minuscole indifferenti):
+#   nome ("Nome", "Calciatore"), squadra ("Squadra", "Club"), ruolo ("R", "Ruolo"),
+#   quotazione ("Qt.A", "Quotazione"), ruolo mantra ("RM", facoltativo).
+# Le altre colonne (Id, Qt.I, FVM, ...) vengono ignorate. Separatore a scelta tra tab,
+# ";" e ",", riconosciuto dalla prima riga.
+#
+# Ruoli P/D/C/A o POR/DIF/CEN/ATT; la squadra diventa la sigla di 3 lettere del listone
+# ("Napoli" -> "NAP"). Righe senza nome o con ruolo sconosciuto vengono scartate, i
+# doppioni tenuti una volta sola: gli scarti finiscono in `problems` con il numero di riga.
+#
+# Cache: il Catalog già costruito (ordinamento, indice di ricerca) viene salvato con
+# pickle in <cache_dir>/listone-<hash del file>.pickle; agli avvii successivi con lo
+# stesso file si carica quello e non si rilegge il CSV. Un file cambiato ha un hash
+# diverso, quindi una cache vecchia non viene mai usata per sbaglio.
+
+import csv
+import hashlib
+import os
+import pickle
+
+from catalog import ROLE_ORDER, Catalog
+
+# da cambiare quando cambia la struttura di Catalog/Player: invalida le cache vecchie
+CACHE_VERSION = 2
+
+_COLUMNS = {
+    "name": ("nome", "calciatore", "giocatore", "name"),
+    "club": ("squadra", "club", "team"),
+    "role": ("r", "ruolo", "role"),
+    "quotation": ("qt.a", "qta", "qt. a", "quotazione", "quota", "qt"),
+    "mantra": ("rm", "ruolo mantra", "mantra"),
+}
+_ROLES = {"P": "POR", "D": "DIF", "C": "CEN", "A": "ATT"}
+
+
+class ListoneError(ValueError):
+    pass
+
+
+def _header(row: list) -> dict:
+    # colonna -> indice; se la prima riga non è un'intestazione: nome, squadra, ruolo, quotazione, mantra
+    cols = {}
+    for i, cell in enumerate(row):
+        key = cell.strip().lower()
+        for col, aliases in _COLUMNS.items():
+            if key in aliases and col not in cols:
+                cols[col] = i
+    if "name" in cols and "role" in cols:
+        return cols
+    return {}
+
+
+def read(path: str) -> tuple:
+    """Legge il listone riga per riga. Ritorna ([(etichetta, quotazione, mantra)], problemi)."""
+    out = []
+    problems = []
+    seen = set()
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        first = f.readline()
+        sep = "\t" if "\t" in first else ";" if first.count(";") > first.count(",") else ","
+        f.seek(0)
+        rows = csv.reader(f, delimiter=sep)
+        cols = {}
+        for line, row in enumerate(rows, start=1):
+            if not any(c.strip() for c in row):
+                continue
+            if line == 1:
+                cols = _header(row)
+                if cols:
+                    continue
+                cols = {"name": 0, "club": 1, "role": 2, "quotation": 3, "mantra": 4}
+
+            def cell(col: str) -> str:
+                i = cols.get(col)
+                return row[i].strip() if i is not None and i < len(row) else ""
+
+            name = cell("name")
+            role = cell("role").upper()
+            role = _ROLES.get(role, role)
+            if not name:
+                problems.append(f"riga {line}: nome mancante")
+                continue
+            if role not in ROLE_ORDER:
+                problems.append(f"riga {line}: ruolo sconosciuto {cell('role')!r} ({name})")
+                continue
+            club = cell("club").upper()[:3]
+            try:
+                quotation = int(float(cell("quotation").replace(",", ".") or 0))
+            except ValueError:
+                problems.append(f"riga {line}: quotazione non valida {cell('quotation')!r} ({name})")
+                quotation = 0
+
+            label = f"{name} - {club} ({role})" if club else f"{name} ({role})"
+            if label in seen:
+                problems.append(f"riga {line}: doppione {label}")
+                continue
+            seen.add(label)
+            out.append((label, quotation, cell("mantra")))
+
+    if not out:
+        raise ListoneError(f"{path}: nessun giocatore valido")
+    return out, problems
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build(path: str) -> tuple:
+    """(Catalog, problemi) leggendo il CSV, senza cache."""
+    rows, problems = read(path)
+    catalog = Catalog((label for label, _, _ in rows), {label: (q, m) for label, q, m in rows})
+    return catalog, problems
+
+
+def load(path: str, cache_dir: str | None = None) -> tuple:
+    """(Catalog, problemi, da_cache). Con cache_dir usa/scrive la cache compilata."""
+    if not cache_dir:
+        return (*build(path), False)
+
+    cache_path = os.path.join(cache_dir, f"listone-{file_hash(path)[:16]}.pickle")
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached.get("version") == CACHE_VERSION:
+            return cached["catalog"], cached["problems"], True
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError, TypeError):
+        pass  # cache assente, rovinata o di un'altra versione: si ricompila
+
+    catalog, problems = build(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({"version": CACHE_VERSION, "catalog": catalog, "problems": problems}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_path)
+    return catalog, problems, False
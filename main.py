@@ -1,220 +1,670 @@
-import threading
+import asyncio
+import atexit
+import json
+import math
+import os
+import re
 import time
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
+import assets
 import auction
+import export
+import journal
+import listone
+import metrics
+import ratelimit
+import respcache
+from catalog import Catalog, parse_player
+from store import MemoryStore, SqliteStore
 from players import PLAYERS
+from league import ADMIN_TEAM, ROSTER_LIMITS, TEAM_BUDGETS  # stanza di default, vedi league.py
+
+# Crediti residui e svincolati stanno nello store dell'asta (vedi store.py):
+# - quando confermi un'asta: rimuove il giocatore e scala i crediti
+# - se cancelli dallo storico: rimette il giocatore e restituisce i crediti
+
+# Limiti sulle rotte di scrittura (/start, /bid, /autobid), vedi ratelimit.py:
+# per squadra e indirizzo `rate` richieste al secondo con picchi fino a `burst`, per
+# indirizzo del client `client_rate` e `client_burst`. Senza valori espliciti il limite per
+# client è la somma di quelli delle squadre della stanza: tutta la lega sullo stesso wifi
+# (un solo indirizzo dietro al NAT) deve poter rilanciare come se fosse su reti diverse.
+# Una stanza può cambiarli con "rate_limit" nel file delle stanze; FANTA_RATE_LIMIT=0 li spegne.
+RATE_LIMIT = {"rate": 5, "burst": 10, "client_rate": None, "client_burst": None}
+RATE_LIMIT_ENABLED = os.environ.get("FANTA_RATE_LIMIT", "1") != "0"
+
+# Richieste HTTP in corso oltre le quali si risponde subito 503 (esclusi /stream); 0 = nessun tetto
+MAX_IN_FLIGHT = int(os.environ.get("FANTA_MAX_IN_FLIGHT", "128"))
+
+# Listone da file CSV/TSV scaricato dal sito (vedi listone.py); vuoto = la lista di players.py.
+# Si ricarica senza riavviare con POST /catalog/reload.
+LISTONE_PATH = os.environ.get("FANTA_LISTONE", "")
+
+# Dove salvare il listone già compilato (avvii successivi senza rileggere il CSV); vuoto = niente cache
+CACHE_DIR = os.environ.get("FANTA_CACHE_DIR", os.path.join("data", "cache"))
+
+
+def load_catalog() -> tuple:
+    """(Catalog, righe scartate del listone)."""
+    if not LISTONE_PATH:
+        return Catalog(PLAYERS), []
+    catalog, problems, _ = listone.load(LISTONE_PATH, CACHE_DIR)
+    return catalog, problems
 
-ADMIN_TEAM = "Monkey D. United"
 
-# === BUDGET INIZIALI (come da te) ===
-TEAM_BUDGETS = {
-    "Monkey D. United": 215,
-    "AC Ciughina": 148,
-    "ASD Vetriolo": 0,
-    "Atletico Carogna": 203,
-    "Atletico Zio Porcone": 225,
-    "DIRE91 Team": 0,
-    "La Passione di Kristovic": 165,
-    "PSD Paris San Donato": 180,
-}
+# Listone letto una volta: record già ordinati per ruolo (ROLE_ORDER) e nome
+CATALOG, CATALOG_PROBLEMS = load_catalog()
+
+# /stream: ogni quanti secondi mandare un commento di keepalive se non succede nulla
+STREAM_KEEPALIVE_SECONDS = 15
+
+# /players/search: massimo numero di risultati per richiesta
+SEARCH_MAX_LIMIT = 50
+
+# /history a pagine: massimo numero di entry per pagina
+HISTORY_MAX_LIMIT = 200
+
+# Database SQLite condiviso: serve per girare con più worker (uvicorn --workers N).
+# Se vuoto lo stato resta in memoria (un solo worker).
+# Le altre stanze usano un file accanto: fanta.db -> fanta-<stanza>.db
+DB_PATH = os.environ.get("FANTA_DB", "")
+
+# Solo stato in memoria: cartella del log eventi/snapshot (ripristino dopo un riavvio).
+# Vuota = niente log. Le altre stanze usano <cartella>/rooms/<stanza>.
+DATA_DIR = os.environ.get("FANTA_DATA_DIR", "data")
+
+# /metrics (formato Prometheus) e misure sui percorsi caldi: spente se non richieste.
+METRICS = os.environ.get("FANTA_METRICS", "") not in ("", "0")
+
+# Corpi di /status, /teams, /players e /history tenuti già codificati finché la versione
+# non cambia (vedi respcache.py). FANTA_RESPONSE_CACHE=0 per spegnere (confronti).
+RESPONSE_CACHE = respcache.ResponseCache() if os.environ.get("FANTA_RESPONSE_CACHE", "1") != "0" else None
+
+# versioned(): quante volte ricostruire una risposta se una scrittura cambia la versione
+# mentre la si costruisce (conferme e cancellazioni: succede di rado, e mai di fila)
+VERSIONED_RETRIES = 3
+
+# Altre stanze oltre a quella di default (altre leghe o tavoli paralleli), da file JSON:
+#   {"serie-b": {"admin": "Squadra A", "budgets": {"Squadra A": 300, "Squadra B": 300},
+#                "roster": {"POR": 3, "DIF": 8, "CEN": 8, "ATT": 6}, "rate_limit": {"rate": 3}}}
+# "roster" è facoltativo (default ROSTER_LIMITS, {} = nessun vincolo di rosa), come
+# "rate_limit" (le chiavi mancanti restano quelle di RATE_LIMIT).
+# Si usano con le stesse URL sotto /rooms/<stanza>/ (es. /rooms/serie-b/bid).
+ROOMS_FILE = os.environ.get("FANTA_ROOMS", "")
+
+ROOM_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+
+# stanza -> (limiter per (squadra, client), limiter per client)
+LIMITERS = {}
+
+
+def make_limiters(budgets: dict, rate_limit: dict | None = None, clock=time.monotonic) -> tuple:
+    """(limiter per squadra e client, limiter per client) con RATE_LIMIT e le modifiche della stanza."""
+    cfg = {**RATE_LIMIT, **(rate_limit or {})}
+    teams = max(1, len(budgets))
+    client_rate = cfg["client_rate"] if cfg["client_rate"] is not None else cfg["rate"] * teams
+    client_burst = cfg["client_burst"] if cfg["client_burst"] is not None else cfg["burst"] * teams
+    return (ratelimit.Limiter(cfg["rate"], cfg["burst"], clock=clock),
+            ratelimit.Limiter(client_rate, client_burst, clock=clock))
+
+
+def open_room(room_id: str, admin_team: str, budgets: dict, roster_limits: dict,
+              rate_limit: dict | None = None) -> auction.Room:
+    default = room_id == auction.DEFAULT_ROOM
+    if RATE_LIMIT_ENABLED:
+        LIMITERS[room_id] = make_limiters(budgets, rate_limit)
+    if DB_PATH:
+        base, ext = os.path.splitext(DB_PATH)
+        path = DB_PATH if default else f"{base}-{room_id}{ext or '.db'}"
+        store = SqliteStore(path, budgets, CATALOG)
+        return auction.add_room(auction.Room(room_id, admin_team, store, roster_limits))
+
+    room = auction.add_room(auction.Room(room_id, admin_team, MemoryStore(budgets, CATALOG), roster_limits))
+    if DATA_DIR:
+        j = journal.Journal(DATA_DIR if default else os.path.join(DATA_DIR, "rooms", room_id))
+        room.restore(j)
+        atexit.register(j.close)
+    return room
+
+
+def load_rooms(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        rooms = json.load(f)
+    for room_id, cfg in rooms.items():
+        if not ROOM_ID_RE.match(room_id) or room_id == auction.DEFAULT_ROOM:
+            raise ValueError(f"{path}: nome stanza non valido: {room_id!r}")
+        if cfg.get("admin") not in cfg.get("budgets", {}):
+            raise ValueError(f"{path}: stanza {room_id!r}: l'admin deve essere una delle squadre")
+    return rooms
+
+
+async def current_room(request: Request) -> auction.Room:
+    # /bid -> stanza di default, /rooms/<stanza>/bid -> quella stanza
+    # (async: è solo un lookup, niente passaggio dal threadpool)
+    room = auction.get_room(request.path_params.get("room_id", auction.DEFAULT_ROOM))
+    if room is None:
+        raise HTTPException(status_code=404, detail="room not found")
+    return room
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+
+async def throttle(request: Request, room: auction.Room = Depends(current_room)):
+    # Prima della rotta e nell'event loop: una richiesta rifiutata non passa dal
+    # threadpool e non tocca lo store. Il corpo JSON letto qui resta in cache per la rotta.
+    limiters = LIMITERS.get(room.id)
+    if limiters is None:
+        return
+    by_team, by_client = limiters
+    try:
+        payload = await request.json()
+    except ValueError:
+        return  # corpo non valido: risponde la rotta
+    team = (payload.get("team", "") or "").strip() if isinstance(payload, dict) else ""
+    host = request.client.host if request.client is not None else ""
+    # Prima il client: chi martella viene fermato senza toccare i bucket delle squadre.
+    # Poi la squadra, ma per (squadra, client): "team" è solo un campo del corpo, e chi
+    # lo copia da un altro indirizzo non consuma i gettoni della squadra vera.
+    # Squadre sconosciute non creano bucket: le rifiuta comunque la rotta.
+    wait = by_client.take(host) if host else 0.0
+    if not wait and team in room.budgets:
+        wait = by_team.take((team, host))
+    if wait:
+        metrics.rate_limited.inc(room.id, request.url.path.rsplit("/", 1)[-1])
+        raise RateLimited(wait)
+
+
+def etag(room: auction.Room, tag: str) -> str:
+    # con lo stato in memoria anche l'avvio fa parte della versione (vedi MemoryStore.epoch)
+    return f'"{tag}-{room.epoch}"' if room.epoch else f'"{tag}"'
+
+
+def versioned(request: Request, room: auction.Room, prefix: str, build):
+    """Risposta con ETag per i dati che cambiano con la versione dello storico (crediti,
+    rose, svincolati, storico): ETag = prefix + history_version, 304 se il client ha già
+    quella versione, altrimenti build(version).
+
+    La versione si rilegge dopo build(): se una scrittura è arrivata nel frattempo il
+    corpo può essere più nuovo dell'ETag (o mescolare le due versioni), quindi non si
+    manda né si mette in cache con quell'ETag e si ricomincia con la versione nuova."""
+    for _ in range(VERSIONED_RETRIES):
+        _, version = room.get_versions()
+        tag = etag(room, f"{prefix}{version}")
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+        entry = RESPONSE_CACHE.get((request.url.path, request.url.query), tag) if RESPONSE_CACHE else None
+        if entry is not None:
+            return cached_response(request, tag, entry)
+        payload = build(version)
+        if room.get_versions()[1] == version:
+            return fresh_response(request, tag, payload)
+    # scritture una dietro l'altra: l'ultimo corpo, senza ETag né cache
+    return JSONResponse(payload, headers={"Cache-Control": "no-cache"})
+
+
+def tagged(request: Request, tag: str, build) -> Response:
+    """Risposta con un ETag già coerente con quello che build() costruirà (es. /status,
+    versione e corpo dallo stesso stato): 304, corpo in cache o build() se manca."""
+    if not_modified(request, tag):
+        return not_modified_response(tag)
+    entry = RESPONSE_CACHE.get((request.url.path, request.url.query), tag) if RESPONSE_CACHE else None
+    if entry is not None:
+        return cached_response(request, tag, entry)
+    return fresh_response(request, tag, build())
+
+
+def not_modified_response(tag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": "no-cache"})
+
+
+def not_modified(request: Request, tag: str) -> bool:
+    sent = request.headers.get("if-none-match", "")
+    return tag in (t.strip() for t in sent.split(","))
+
+
+def fresh_response(request: Request, tag: str, payload) -> Response:
+    # corpo appena costruito (e coerente con `tag`): in RESPONSE_CACHE per le prossime richieste
+    if RESPONSE_CACHE is None:
+        return JSONResponse(payload, headers={"ETag": tag, "Cache-Control": "no-cache"})
+    return cached_response(request, tag, RESPONSE_CACHE.put((request.url.path, request.url.query), tag, payload))
+
+
+def cached_response(request: Request, tag: str, entry: respcache.Entry) -> Response:
+    headers = {"ETag": tag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = entry.gzipped()
+        if body is not None:
+            headers["Content-Encoding"] = "gzip"
+            return Response(body, media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def sse_message(kind: str, payload) -> str:
+    return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
 
-# Crediti residui (in memoria)
-TEAM_REMAINING = dict(TEAM_BUDGETS)
 
-# Lista svincolati "dinamica" in memoria:
-# - quando confermi un'asta: rimuove il giocatore
-# - se cancelli dallo storico: rimette il giocatore
-AVAILABLE_PLAYERS = set(p.strip() for p in PLAYERS if p and p.strip())
+def clamp_inc(inc) -> int:
+    try:
+        v = int(inc)
+    except:
+        v = 1
+    if v <= 0:
+        v = 1
+    return v
 
-ROLE_ORDER = {"POR": 0, "DIF": 1, "CEN": 2, "ATT": 3}
 
+open_room(auction.DEFAULT_ROOM, ADMIN_TEAM, TEAM_BUDGETS, ROSTER_LIMITS)
+if ROOMS_FILE:
+    for _room_id, _cfg in load_rooms(ROOMS_FILE).items():
+        open_room(_room_id, _cfg["admin"], _cfg["budgets"], _cfg.get("roster", ROSTER_LIMITS),
+                  _cfg.get("rate_limit"))
 
-def extract_role(player_str: str) -> str:
-    if not player_str:
-        return ""
-    s = player_str.strip()
-    if s.endswith(")") and "(" in s:
-        role = s[s.rfind("(") + 1 : -1].strip().upper()
-        return role
-    return ""
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # un solo scrittore per stanza nel loop di uvicorn: rilanci e timer senza threadpool
+    for room in auction.rooms():
+        room.start_writer()
+    yield
 
-def extract_name(player_str: str) -> str:
-    if not player_str:
-        return ""
-    s = player_str.strip()
-    if " - " in s:
-        return s.split(" - ", 1)[0].strip().lower()
-    return s.lower()
 
+app = FastAPI(lifespan=lifespan)
 
-def sort_players(players_iterable):
-    def key_fn(s: str):
-        role = extract_role(s)
-        role_idx = ROLE_ORDER.get(role, 99)
-        name = extract_name(s)
-        return (role_idx, name, s.lower())
 
-    return sorted(players_iterable, key=key_fn)
+@app.exception_handler(RateLimited)
+async def rate_limited(request: Request, exc: RateLimited):
+    # 429 subito, con Retry-After: la richiesta rifiutata non occupa un posto di
+    # MAX_IN_FLIGHT né un thread mentre il client aspetta il prossimo gettone
+    retry_after = round(exc.retry_after, 2)
+    return JSONResponse({"ok": False, "reason": "rate_limited", "retry_after": retry_after}, status_code=429,
+                        headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
 
 
-def get_remaining(team: str) -> int:
-    return int(TEAM_REMAINING.get(team, 0))
+if METRICS:
+    metrics.enable()
+    app.add_middleware(metrics.RequestTimer)
+    metrics.Gauge("fanta_stream_clients", "Client collegati a /stream.",
+                  lambda: {(r.id,): r.events.subscriber_count() for r in auction.rooms()}, ("room",))
+    metrics.Gauge("fanta_writer_queue", "Scritture in coda allo scrittore della stanza.",
+                  lambda: {(r.id,): r.writer.pending() if r.writer else 0 for r in auction.rooms()}, ("room",))
+    metrics.Gauge("fanta_poll_clients", "Connessioni che hanno chiesto /status negli ultimi 10 s.",
+                  metrics.poll_clients.count)
+    metrics.Gauge("fanta_history_entries", "Aste nello storico.",
+                  lambda: {(r.id,): r.get_sizes()[0] for r in auction.rooms()}, ("room",))
+    metrics.Gauge("fanta_available_players", "Giocatori svincolati.",
+                  lambda: {(r.id,): r.get_sizes()[1] for r in auction.rooms()}, ("room",))
 
+    @app.get("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# ultimo middleware aggiunto = il più esterno: le richieste in eccesso non arrivano a nient'altro
+if MAX_IN_FLIGHT > 0:
+    app.add_middleware(ratelimit.ConcurrencyCap, limit=MAX_IN_FLIGHT)
+
+
+@app.get("/rooms")
+def rooms():
+    return {"rooms": [{"id": r.id, "teams": list(r.budgets)} for r in auction.rooms()]}
+
+
+@app.post("/catalog/reload")
+async def catalog_reload(payload: dict):
+    # Solo admin della stanza di default: rilegge FANTA_LISTONE e lo passa a tutte le stanze.
+    # Aste in corso, storico e crediti restano; cambiano solo gli svincolati.
+    # Lettura del file e nuovi indici nel threadpool, lo scambio passa dallo scrittore della
+    # stanza come le altre scritture (room.run): il lock resta preso solo per lo scambio.
+    # Con FANTA_DB e più worker vale solo per il worker che riceve la richiesta: gli altri
+    # vanno riavviati (la cache compilata rende il riavvio veloce).
+    global CATALOG, CATALOG_PROBLEMS
+    team = (payload.get("team", "") or "").strip()
+    if team != ADMIN_TEAM:
+        return {"ok": False, "reason": "not_admin"}
+    if not LISTONE_PATH:
+        return {"ok": False, "reason": "no_listone"}
 
-def clamp_inc(inc) -> int:
     try:
-        v = int(inc)
-    except:
-        v = 1
-    if v <= 0:
-        v = 1
-    return v
+        catalog, problems = await asyncio.to_thread(load_catalog)
+    except (OSError, listone.ListoneError) as e:
+        return {"ok": False, "reason": "invalid_listone", "detail": str(e)}
+
+    changes = {}
+    for room in auction.rooms():
+        prepared = await asyncio.to_thread(room.prepare_catalog, catalog)
+        added, removed = await room.run(room.replace_catalog, catalog, prepared)
+        changes[room.id] = {"added": len(added), "removed": len(removed)}
+    CATALOG, CATALOG_PROBLEMS = catalog, problems
+    return {"ok": True, **catalog_info(), "rooms": changes}
+
+
+@app.get("/catalog")
+def catalog_status():
+    return catalog_info()
+
+
+def catalog_info() -> dict:
+    # righe scartate del listone: solo le prime, il resto si vede correggendo il file
+    return {
+        "source": LISTONE_PATH or "players.py",
+        "players": len(CATALOG),
+        "problems": CATALOG_PROBLEMS[:50],
+        "problem_count": len(CATALOG_PROBLEMS),
+    }
+
+
+# Rotte di una stanza: montate sia alla radice (stanza di default) sia sotto /rooms/{room_id}
+router = APIRouter()
+
+
+@router.get("/teams")
+def teams(request: Request, since: int | None = None, room: auction.Room = Depends(current_room)):
+    # Per UI (residui/budget, rose, offerta massima per ruolo).
+    # ?since=<versione> -> solo le squadre con crediti/rosa cambiati
+    def build(version):
+        remaining = room.get_remaining_all()
+        roster = room.get_roster_all()
+        if since is not None:
+            delta = room.get_remaining_delta(since)
+            if delta is not None:
+                changed = set(delta["remaining"]) | set(delta["roster"])
+                delta["max_bid"] = room.max_bids({t: remaining[t] for t in changed if t in remaining}, roster)
+                return delta
+        return {"budgets": room.budgets, "remaining": remaining, "admin": room.admin_team,
+                "limits": room.roster_limits, "roster": roster, "max_bid": room.max_bids(remaining, roster),
+                "version": version}
+
+    return versioned(request, room, "t", build)
 
 
-app = FastAPI()
+@router.get("/teams/{team}/summary")
+def team_summary(team: str, request: Request, room: auction.Room = Depends(current_room)):
+    # Riepilogo di una squadra: spesa e giocatori per ruolo, prezzo medio/massimo, posti
+    # liberi e rosa per ruolo (contatori di rosa + acquisti della squadra, vedi Room)
+    if team not in room.budgets:
+        raise HTTPException(status_code=404, detail="team not found")
+    return versioned(request, room, "m", lambda version: room.get_team_summary(team))
 
 
-@app.get("/teams")
-def teams():
-    # Per UI (residui/budget)
-    return {"budgets": TEAM_BUDGETS, "remaining": TEAM_REMAINING}
+@router.get("/league/summary")
+def league_summary(request: Request, room: auction.Room = Depends(current_room)):
+    # Gli stessi riepiloghi per tutte le squadre, più i totali della lega
+    return versioned(request, room, "l", lambda version: room.get_league_summary())
 
 
-@app.post("/start")
-def start(payload: dict):
+# Rotte di scrittura: async, il lavoro va allo scrittore della stanza (room.run, vedi writer.py).
+# Le letture (/status, /players, /history, /teams, export) restano sync, nel threadpool, e
+# non prendono il lock dello scrittore (MemoryStore pubblica copie, SQLite legge in WAL):
+# nel loop restano solo i rilanci, che così non si mettono in fila dietro ai poll.
+
+
+@router.post("/start", dependencies=[Depends(throttle)])
+async def start(payload: dict, room: auction.Room = Depends(current_room)):
     player = (payload.get("player", "") or "").strip()
     team = (payload.get("team", "") or "").strip()
 
     if not player or not team:
         return {"ok": False, "reason": "missing_player_or_team"}
 
-    if team not in TEAM_BUDGETS:
+    if team not in room.budgets:
         return {"ok": False, "reason": "unknown_team"}
 
-    # Asta SOLO se il giocatore è ancora svincolato
-    if player not in AVAILABLE_PLAYERS:
-        return {"ok": False, "reason": "player_not_available"}
-
-    # Prezzo iniziale sempre 1: controllo crediti
-    if get_remaining(team) < 1:
-        return {"ok": False, "reason": "insufficient_budget", "needed": 1, "remaining": get_remaining(team)}
-
-    ok = auction.start_auction(player, team)
-    return {"ok": ok}
+    # svincolato, crediti e vincoli di rosa controllati nella transazione che apre l'asta
+    return await room.run(room.nominate, player, team)
 
 
-@app.post("/bid")
-def bid(payload: dict):
+@router.post("/bid", dependencies=[Depends(throttle)])
+async def bid(payload: dict, room: auction.Room = Depends(current_room)):
     team = (payload.get("team", "") or "").strip()
     inc = clamp_inc(payload.get("inc", 1))
 
     if not team:
+        metrics.bids.inc(room.id, "missing_team")
         return {"ok": False, "reason": "missing_team"}
 
-    if team not in TEAM_BUDGETS:
+    if team not in room.budgets:
+        metrics.bids.inc(room.id, "unknown_team")
         return {"ok": False, "reason": "unknown_team"}
 
-    # Serve conoscere il prezzo corrente per verificare il nuovo prezzo
-    st = auction.get_status()
-    if not st.get("active", False) or st.get("awaiting_confirmation", False):
-        return {"ok": False, "reason": "auction_not_active"}
+    # Prezzo visto dal client (opzionale): se nel frattempo è cambiato -> stale_price
+    expected = payload.get("expected")
+    try:
+        expected = int(expected) if expected is not None else None
+    except:
+        expected = None
 
-    current_price = int(st.get("highest_bid", 0))
-    new_price = current_price + inc
+    # crediti, prezzo e stato dell'asta controllati in un'unica transazione
+    return await room.run(room.place_bid, team, inc, expected)
 
-    if get_remaining(team) < new_price:
-        return {
-            "ok": False,
-            "reason": "insufficient_budget",
-            "needed": new_price,
-            "remaining": get_remaining(team),
-        }
-
-    ok = auction.place_bid(team, inc)
-    return {"ok": ok}
 
+@router.post("/autobid", dependencies=[Depends(throttle)])
+async def autobid(payload: dict, room: auction.Room = Depends(current_room)):
+    # Offerta massima privata per il giocatore in asta: il server rilancia da solo
+    team = (payload.get("team", "") or "").strip()
 
-@app.get("/status")
-def status():
-    return auction.get_status()
+    if not team:
+        return {"ok": False, "reason": "missing_team"}
 
+    if team not in room.budgets:
+        return {"ok": False, "reason": "unknown_team"}
 
-@app.post("/confirm")
-def confirm(payload: dict):
+    return await room.run(room.set_autobid, team, payload.get("max"))
+
+
+@router.get("/status")
+def status(request: Request, room: auction.Room = Depends(current_room)):
+    if request.client is not None:
+        metrics.poll_clients.touch((request.client.host, request.client.port))
+    # ultimo stato pubblicato (in memoria) o una riga di SQLite in WAL. Nel threadpool: con
+    # centinaia di poll nel loop un rilancio aspetterebbe dietro a tutti quelli già arrivati
+    version, time_left, build = room.get_status_parts()
+    # time_left fa parte della risposta: cambia l'ETag al più una volta al secondo. Versione,
+    # secondi e corpo vengono dallo stesso stato: il corpo si costruisce solo se non è in cache
+    return tagged(request, etag(room, f"s{version}.{time_left}"), build)
+
+
+@router.get("/time")
+async def server_time(room: auction.Room = Depends(current_room)):
+    # Ping per sincronizzare l'orologio del client (stile NTP): il client misura andata e
+    # ritorno e stima lo scarto tra il suo orologio e questo, con cui converte "deadline".
+    return JSONResponse({"now": room.server_time()}, headers={"Cache-Control": "no-store"})
+
+
+@router.get("/stream")
+async def stream(request: Request, room: auction.Room = Depends(current_room)):
+    # Server-Sent Events: un evento "state" ad ogni cambio dell'asta,
+    # un evento "history" quando cambiano storico/crediti. /status resta come fallback.
+    sub = room.events.subscribe()
+
+    async def gen():
+        try:
+            yield sse_message("state", room.get_status())
+            while not await request.is_disconnected():
+                changes = await sub.wait(STREAM_KEEPALIVE_SECONDS)
+                if not changes:
+                    yield ": keepalive\n\n"
+                    continue
+                for kind, payload in changes:
+                    yield sse_message(kind, payload)
+        finally:
+            room.events.unsubscribe(sub)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(gen(), media_type="text/event-stream", headers=headers)
+
+
+@router.post("/confirm")
+async def confirm(payload: dict, room: auction.Room = Depends(current_room)):
     team = (payload.get("team", "") or "").strip()
+    result = await room.run(confirm_sale, room, team)
+    # una vendita confermata non si perde in un crash: si risponde dopo l'fsync del log
+    if result["ok"] and not await room.wait_durable():
+        result["durable"] = False
+    return result
 
+
+def confirm_sale(room: auction.Room, team: str) -> dict:
     # conferma solo admin
-    entry = auction.confirm(team, ADMIN_TEAM)
+    entry = room.confirm(team)
     if entry is None:
         return {"ok": False}
 
-    player = (entry.get("player") or "").strip()
-    winner = (entry.get("winner") or "").strip()
-    price = int(entry.get("price") or 0)
+    # svincolati e crediti sono già aggiornati nella stessa transazione
+    return {"ok": True, "entry": entry, "remaining": room.get_remaining_all()}
 
-    # Rimuovi il giocatore dagli svincolati
-    if player:
-        AVAILABLE_PLAYERS.discard(player)
 
-    # Scala budget al vincitore (se esiste)
-    if winner in TEAM_REMAINING:
-        TEAM_REMAINING[winner] = max(0, int(TEAM_REMAINING[winner]) - price)
+@router.post("/cancel")
+async def cancel(payload: dict, room: auction.Room = Depends(current_room)):
+    team = (payload.get("team", "") or "").strip()
+    ok = await room.run(room.cancel, team)
+    return {"ok": ok}
+
+
+@router.get("/queue")
+def queue(team: str = "", room: auction.Room = Depends(current_room)):
+    # ordine delle chiamate + la coda privata della squadra. La squadra si riconosce come
+    # in POST /queue/team (campo team, una squadra della stanza): senza squadra niente coda
+    team = team.strip()
+
+    if not team:
+        return {"ok": False, "reason": "missing_team"}
 
-    return {"ok": True, "entry": entry, "remaining": TEAM_REMAINING}
+    return room.get_queue(team)
 
 
-@app.post("/cancel")
-def cancel(payload: dict):
+@router.post("/queue")
+async def queue_order(payload: dict, room: auction.Room = Depends(current_room)):
+    # solo admin: {"team", "order": [{"player", "team"} | "giocatore", ...], "paused": bool}
     team = (payload.get("team", "") or "").strip()
-    ok = auction.cancel(team, ADMIN_TEAM)
-    return {"ok": ok}
+    return await room.run(room.set_nomination_order, team, payload.get("order"), payload.get("paused"))
+
+
+@router.post("/queue/team")
+async def queue_team(payload: dict, room: auction.Room = Depends(current_room)):
+    # {"team", "players": [...]}: le prossime chiamate della squadra, servite a turno
+    team = (payload.get("team", "") or "").strip()
+
+    if not team:
+        return {"ok": False, "reason": "missing_team"}
+
+    return await room.run(room.set_team_queue, team, payload.get("players"))
 
 
-@app.get("/players")
-def players():
+@router.get("/players")
+def players(request: Request, role: str = "", club: str = "", since: int | None = None,
+            room: auction.Room = Depends(current_room)):
     # svincolati ordinati: POR -> DIF -> CEN -> ATT, alfabetico dentro ogni gruppo
-    return {"players": sort_players(AVAILABLE_PLAYERS)}
+    # filtri opzionali: /players?role=DIF&club=INT
+    # ?since=<versione> -> solo giocatori tornati svincolati (added) / venduti (removed)
+    role = role.strip().upper() or None
+    club = club.strip().upper() or None
 
+    def keep(label: str) -> bool:
+        # (un giocatore tolto da un nuovo listone non è più nel CATALOG: ruolo e squadra dall'etichetta)
+        p = CATALOG.get(label) or parse_player(label)
+        return (role is None or p.role == role) and (club is None or p.club == club)
 
-@app.get("/history")
-def history():
-    return {"history": auction.get_history()}
+    def build(version):
+        if since is not None:
+            delta = room.get_players_delta(since)
+            if delta is not None:
+                delta["added"] = [p for p in delta["added"] if keep(p)]
+                delta["removed"] = [p for p in delta["removed"] if keep(p)]
+                return delta
+        return {"players": room.get_available_players(role, club), "version": version}
 
+    return versioned(request, room, "p", build)
 
-@app.post("/history/delete")
-def history_delete(payload: dict):
-    team = (payload.get("team", "") or "").strip()
-    if team != ADMIN_TEAM:
-        return {"ok": False}
 
-    hid = payload.get("id")
-    removed = auction.delete_history(hid)
-    if removed is None:
-        return {"ok": False}
+@router.get("/players/search")
+def players_search(q: str = "", limit: int = 20, room: auction.Room = Depends(current_room)):
+    limit = max(1, min(SEARCH_MAX_LIMIT, limit))
+    return {"players": room.search_players(q, limit)}
+
+
+@router.get("/history")
+def history(request: Request, since: int | None = None, cursor: int | None = None,
+            limit: int | None = None, team: str = "", player: str = "",
+            room: auction.Room = Depends(current_room)):
+    # ?since=<versione> -> solo le aste aggiunte (added) e gli id eliminati (removed)
+    # ?limit=&cursor= -> a pagine dalla più recente; ?team= / ?player= per filtrare
+    # "epoch" cambia se il server è ripartito: le versioni di prima non vanno confrontate
+    team = team.strip() or None
+    player = player.strip() or None
+
+    def build(version):
+        if since is not None:
+            delta = room.get_history_delta(since)
+            if delta is not None:
+                return {**delta, "epoch": room.epoch}
+        if limit is None and cursor is None and team is None and player is None:
+            return {"history": room.get_history(), "version": version, "epoch": room.epoch}
+        n = max(1, min(HISTORY_MAX_LIMIT, limit or HISTORY_MAX_LIMIT))
+        page, next_cursor = room.get_history_page(cursor, n, team, player)
+        return {"history": page, "next_cursor": next_cursor, "version": version, "epoch": room.epoch}
+
+    return versioned(request, room, "h", build)
+
+
+def export_response(rows, filename: str, media_type: str, room: auction.Room) -> StreamingResponse:
+    # righe generate mentre si spediscono (generatore sync: Starlette lo scorre nel threadpool)
+    if room.id != auction.DEFAULT_ROOM:
+        filename = f"{room.id}-{filename}"
+    return StreamingResponse(
+        rows, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def csv_separator(sep: str) -> str:
+    # "," (default), ";" per Excel in italiano, "tab"
+    if sep not in export.SEPARATORS:
+        raise HTTPException(status_code=400, detail="sep must be one of: , ; tab")
+    return export.SEPARATORS[sep]
 
-    # Restore giocatore tra gli svincolati
-    player = (removed.get("player") or "").strip()
-    if player:
-        AVAILABLE_PLAYERS.add(player)
 
-    # Refund budget al winner
-    winner = (removed.get("winner") or "").strip()
-    price = int(removed.get("price") or 0)
-    if winner in TEAM_REMAINING:
-        TEAM_REMAINING[winner] = int(TEAM_REMAINING[winner]) + price
+@router.get("/export/history.csv")
+def export_history_csv(sep: str = ",", room: auction.Room = Depends(current_room)):
+    return export_response(export.history_csv(room, csv_separator(sep)), "storico.csv", "text/csv; charset=utf-8", room)
 
-    return {"ok": True, "removed": removed, "remaining": TEAM_REMAINING}
 
+@router.get("/export/rosters.csv")
+def export_rosters_csv(sep: str = ",", summary: bool = False, room: auction.Room = Depends(current_room)):
+    # ?summary=1 aggiunge spesa per ruolo e crediti residui dopo ogni squadra
+    rows = export.rosters_csv(room, csv_separator(sep), summary)
+    return export_response(rows, "rose.csv", "text/csv; charset=utf-8", room)
+
+
+@router.get("/export/rosters.json")
+def export_rosters_json(room: auction.Room = Depends(current_room)):
+    return export_response(export.rosters_json(room), "rose.json", "application/json", room)
+
+
+@router.post("/history/delete")
+async def history_delete(payload: dict, room: auction.Room = Depends(current_room)):
+    team = (payload.get("team", "") or "").strip()
+    if team != room.admin_team:
+        return {"ok": False}
+    result = await room.run(delete_sale, room, payload.get("id"))
+    if result["ok"] and not await room.wait_durable():
+        result["durable"] = False
+    return result
+
+
+def delete_sale(room: auction.Room, hid) -> dict:
+    removed = room.delete_history(hid)
+    if removed is None:
+        return {"ok": False}
 
-def _timer_loop():
-    while True:
-        auction.tick()
-        time.sleep(0.2)
+    # giocatore rimesso tra gli svincolati e crediti restituiti dalla stessa transazione
+    return {"ok": True, "removed": removed, "remaining": room.get_remaining_all()}
 
 
-threading.Thread(target=_timer_loop, daemon=True).start()
+app.include_router(router)
+app.include_router(router, prefix="/rooms/{room_id}")
 
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+# index.html e app.js dalla memoria, precompressi; app.js con l'hash nell'URL (vedi assets.py)
+app.mount("/", assets.StaticAssets("static"), name="static")
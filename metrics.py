@@ -0,0 +1,188 @@
+# metrics.py
+# Contatori e istogrammi in memoria, esposti su /metrics in formato testo Prometheus.
+#
+# È opt-in (FANTA_METRICS=1, vedi main.py): finché enable() non viene chiamata ogni
+# inc()/observe() ritorna subito. Da accesa una registrazione costa un lock non conteso
+# e un bisect sui bucket, quindi si può lasciare attiva durante l'asta
+# (bench/metrics_overhead.py misura quanto costa).
+#
+# I gauge (client connessi, dimensioni di storico/svincolati) non si registrano: sono
+# funzioni chiamate solo quando qualcuno legge /metrics.
+
+import bisect
+import threading
+import time
+
+ENABLED = False
+
+# secondi: da 0.1 ms a 2.5 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_metrics = []  # in ordine di registrazione, per render()
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    parts = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._values = {}  # tuple valori label -> conteggio
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, *labels, n: int = 1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + n
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            out.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # tuple valori label -> [conteggi per bucket..., +Inf, somma]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value: float, *labels):
+        if not ENABLED:
+            return
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        names = self.label_names + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series):
+                cumulative += n
+                out.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]}")
+            out.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return out
+
+
+class Gauge:
+    """Valore letto al momento della richiesta: fn() ritorna un numero oppure
+    un dict {tuple valori label: numero}."""
+
+    def __init__(self, name: str, help: str, fn, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.fn = fn
+        _metrics.append(self)
+
+    def render(self) -> list:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, v in sorted(value.items()):
+                out.append(f"{self.name}{_labels(self.label_names, labels)} {v}")
+        else:
+            out.append(f"{self.name} {value}")
+        return out
+
+
+class RecentClients:
+    """Client distinti visti negli ultimi `window` secondi (per chi fa polling)."""
+
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self._seen = {}  # client -> ultimo time.monotonic()
+        self._lock = threading.Lock()
+
+    def touch(self, client):
+        if not ENABLED:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._seen[client] = now
+
+    def count(self) -> int:
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            for client in [c for c, t in self._seen.items() if t < cutoff]:
+                del self._seen[client]
+            return len(self._seen)
+
+
+class RequestTimer:
+    """Middleware ASGI: latenza di ogni richiesta HTTP fino all'invio degli header
+    (per /stream è il tempo di apertura, non la durata della connessione)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                # template della rotta ("/players/search"), "other" per file statici e 404
+                label = getattr(scope.get("route"), "path", None) or "other"
+                request_seconds.observe(time.perf_counter() - t0, scope["method"], label)
+            await send(message)
+
+        await self.app(scope, receive, timed_send)
+
+
+def render() -> str:
+    lines = []
+    for m in _metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- metriche dell'asta ---
+
+request_seconds = Histogram("fanta_request_seconds", "Latenza delle richieste HTTP per rotta.", ("method", "route"))
+bids = Counter(
+    "fanta_bids_total", "Rilanci per stanza ed esito (accepted o motivo del rifiuto).", ("room", "result")
+)
+rate_limited = Counter(
+    "fanta_rate_limited_total", "Richieste di scrittura rifiutate per troppa frequenza.", ("room", "route")
+)
+overloaded = Counter("fanta_overloaded_total", "Richieste rifiutate con 503 per troppe richieste in corso.")
+lock_wait_seconds = Histogram("fanta_lock_wait_seconds", "Attesa per entrare in una transazione dello store.")
+lock_hold_seconds = Histogram("fanta_lock_hold_seconds", "Durata delle transazioni dello store.")
+timer_lateness_seconds = Histogram(
+    "fanta_timer_lateness_seconds", "Ritardo della chiusura dell'asta rispetto alla scadenza del timer."
+)
+poll_clients = RecentClients()
@@ -0,0 +1,95 @@
+# ratelimit.py
+# Freni sulle rotte di scrittura (/start, /bid, /autobid).
+#
+# - Limiter: token bucket per chiave (squadra, indirizzo del client). Ogni richiesta
+#   consuma un gettone; i gettoni tornano a `rate` al secondo fino a `burst`. Un doppio
+#   tocco passa, un client impazzito in loop viene fermato dopo `burst` richieste e
+#   riceve quanti secondi aspettare. Si controlla prima di entrare nello store, quindi
+#   una richiesta rifiutata non prende nessun lock.
+# - ConcurrencyCap: middleware ASGI che tiene al massimo `limit` richieste in corso; oltre
+#   risponde subito 503 "overloaded" invece di accodarle nel threadpool (le connessioni
+#   /stream restano aperte a lungo e non contano).
+#
+# Lo stato è per processo: con più worker ogni worker ha i suoi bucket.
+
+import json
+import threading
+import time
+
+import metrics
+
+
+class Bucket:
+    __slots__ = ("tokens", "last")
+
+    def __init__(self, tokens: float, last: float):
+        self.tokens = tokens
+        self.last = last
+
+
+class Limiter:
+    """Token bucket per chiave. take(key) -> 0.0 se la richiesta passa, altrimenti i
+    secondi da aspettare prima che torni un gettone."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10_000, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key) -> float:
+        if self.rate <= 0:
+            return 0.0
+        now = self.clock()
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                b = self._buckets[key] = Bucket(float(self.burst), now)
+            else:
+                b.tokens = min(float(self.burst), b.tokens + (now - b.last) * self.rate)
+                b.last = now
+            if b.tokens >= 1.0:
+                b.tokens -= 1.0
+                return 0.0
+            return (1.0 - b.tokens) / self.rate
+
+    def _prune(self, now: float):
+        # via i bucket ormai pieni: equivalgono a una chiave mai vista
+        full = self.burst / self.rate
+        for key in [k for k, b in self._buckets.items() if now - b.last >= full]:
+            del self._buckets[key]
+
+
+class ConcurrencyCap:
+    """Middleware ASGI: al massimo `limit` richieste HTTP in corso, le altre 503 subito."""
+
+    def __init__(self, app, limit: int, retry_after: int = 1):
+        self.app = app
+        self.limit = limit
+        self.retry_after = retry_after
+        self.in_flight = 0  # solo dal thread dell'event loop: niente lock
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].endswith("/stream"):
+            return await self.app(scope, receive, send)
+        if self.in_flight >= self.limit:
+            metrics.overloaded.inc()
+            return await self._reject(send)
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _reject(self, send):
+        body = json.dumps({"ok": False, "reason": "overloaded", "retry_after": self.retry_after}).encode()
+        await send({"type": "http.response.start", "status": 503, "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(self.retry_after).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
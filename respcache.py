@@ -0,0 +1,86 @@
+# respcache.py
+# Corpi delle risposte di lettura (/status, /teams, /players, /history) già codificati.
+#
+# I dati cambiano solo con le scritture (rilanci, conferme, ...), mentre le letture
+# arrivano da ogni client ad ogni giro di polling. Per ogni URL si tiene l'ultima
+# risposta codificata insieme al suo ETag (che contiene la versione dello stato): finché
+# l'ETag non cambia si rimandano gli stessi byte, senza ricostruire il dict e senza
+# passare dal JSON. La versione gzip si calcola alla prima richiesta che la accetta.
+#
+# Se è installato orjson si usa quello per codificare (FANTA_FAST_JSON=0 per tornare a
+# json della libreria standard).
+
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# corpi più piccoli di così non si comprimono: gli header costerebbero più del risparmio
+GZIP_MIN_BYTES = 1024
+
+
+def _std_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _fast_dumps(obj) -> bytes:
+    return orjson.dumps(obj)
+
+
+dumps = _fast_dumps if orjson is not None and os.environ.get("FANTA_FAST_JSON", "1") != "0" else _std_dumps
+
+
+class Entry:
+    __slots__ = ("etag", "body", "_gzip")
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self._gzip = None
+
+    def gzipped(self) -> bytes | None:
+        """Corpo compresso (calcolato una volta), None se è troppo piccolo per valerne la pena."""
+        if len(self.body) < GZIP_MIN_BYTES:
+            return None
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.body, compresslevel=5, mtime=0)
+        return self._gzip
+
+
+class ResponseCache:
+    """URL -> ultima Entry, al massimo `size` URL (le meno usate escono per prime)."""
+
+    def __init__(self, size: int = 512):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, etag: str) -> Entry | None:
+        """Entry di `key` se ha ancora questo ETag, altrimenti None (va costruita e messa con put)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.etag == etag:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, key, etag: str, payload) -> Entry:
+        # la costruzione di payload è fuori dal lock: due richieste contemporanee possono
+        # costruire la stessa risposta, vince l'ultima (stesso ETag, stesso contenuto)
+        entry = Entry(etag, dumps(payload))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return entry
@@ -0,0 +1,99 @@
+# scheduler.py
+# Timer a scadenza unica: invece di controllare ogni 200 ms, il thread dorme fino
+# alla scadenza armata (orologio monotono) e poi chiama la callback.
+# arm() sposta la scadenza (ad ogni rilancio), cancel() la toglie (conferma/annulla).
+#
+# LoopTimer fa lo stesso senza thread, con un call_at sull'event loop di uvicorn:
+# lo usa Room quando gira con il writer asincrono (vedi writer.py).
+
+import asyncio
+import threading
+import time
+import traceback
+
+
+class DeadlineTimer:
+    def __init__(self, callback, name: str = "deadline-timer"):
+        self._callback = callback
+        self._name = name
+        self._cond = threading.Condition()
+        self._deadline = None  # time.monotonic() della prossima scadenza, None = spento
+        self._thread = None
+
+    def arm(self, deadline: float):
+        with self._cond:
+            earlier = self._deadline is None or deadline < self._deadline
+            self._deadline = deadline
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            # un rilancio sposta la scadenza più avanti: il thread, svegliandosi alla
+            # vecchia, rilegge _deadline e torna a dormire. Si sveglia solo se deve anticipare.
+            if earlier:
+                self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._deadline = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._deadline is None:
+                        self._cond.wait()
+                        continue
+                    delay = self._deadline - time.monotonic()
+                    if delay <= 0:
+                        self._deadline = None
+                        break
+                    self._cond.wait(delay)
+
+            # fuori dal lock: la callback può ri-armare il timer
+            try:
+                self._callback()
+            except Exception:
+                traceback.print_exc()
+
+
+class LoopTimer:
+    """Come DeadlineTimer, ma la callback gira sull'event loop `loop` (niente thread).
+    arm()/cancel() si possono chiamare da qualsiasi thread."""
+
+    def __init__(self, callback, loop: asyncio.AbstractEventLoop):
+        self._callback = callback
+        self._loop = loop
+        self._handle = None
+
+    def arm(self, deadline: float):
+        self._on_loop(self._arm, deadline)
+
+    def cancel(self):
+        self._on_loop(self._arm, None)
+
+    def _on_loop(self, fn, *args):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _arm(self, deadline: float | None):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if deadline is not None:
+            # loop.time() e time.monotonic() hanno origini diverse: si passa dal ritardo
+            when = self._loop.time() + (deadline - time.monotonic())
+            self._handle = self._loop.call_at(when, self._fire)
+
+    def _fire(self):
+        self._handle = None
+        try:
+            self._callback()
+        except Exception:
+            traceback.print_exc()
@@ -0,0 +1,251 @@
+# simulate.py
+# Asta intera in tempo simulato: un copione di chiamate e rilanci gira sul vero Room
+# (stesse regole, stesso store in memoria) con un VirtualClock, quindi 200 chiamate da
+# 8 secondi l'una durano pochi secondi veri.
+#
+# Il copione è un dict JSON:
+#   {"teams": {"Squadra A": 500, ...}, "admin": "Squadra A",
+#    "roster": {"POR": 3, "DIF": 8, "CEN": 8, "ATT": 6},
+#    "lots": [{"player": "Audero - CRE (POR)", "team": "Squadra B",  # chi lo chiama
+#              "pick": 10.0,                      # secondi per scegliere e avviare l'asta
+#              "bids": [{"team": "Squadra C", "inc": 1, "after": 2.5},  # rilancio
+#                       {"team": "Squadra A", "max": 40, "after": 0.4}], # offerta automatica
+#              "confirm": 3.0,                    # secondi tra la chiusura e la conferma
+#              "cancel": false}]}
+# "after" è il tempo dall'azione precedente: se supera il timer l'asta si chiude prima
+# e i rilanci successivi vengono rifiutati, come dal vivo.
+#
+# Da dove arriva il copione:
+# - synthetic_script(): generato a caso (seme fisso = stessa asta ad ogni giro);
+# - script_from_journal(): gli eventi registrati nel log di una stanza (journal.py);
+#   il log non ha i tempi, si usano quelli passati (gap, pick, confirm);
+# - un file JSON salvato prima con --save.
+#
+# Il risultato (rose finali, prezzi, esiti dei rilanci, tempi del motore) va bene per
+# confrontare due versioni: rose e prezzi devono restare identici, i tempi non peggiorare.
+#
+#   python simulate.py [--lots 200] [--seed 1] [--script copione.json | --journal data/]
+#                      [--save copione.json] [--json]
+
+import argparse
+import json
+import random
+import time
+
+import auction
+from catalog import Catalog
+from clock import VirtualClock
+from players import PLAYERS
+from store import MemoryStore
+
+DEFAULT_ROSTER = {"POR": 3, "DIF": 8, "CEN": 8, "ATT": 6}
+INCREMENTS = (1, 1, 1, 1, 2, 2, 5, 10)
+
+
+def synthetic_script(lots: int = 200, teams: int = 8, budget: int = 500, seed: int = 1,
+                     roster: dict | None = None, mean_gap: float = 2.0, pick: float = 10.0,
+                     confirm: float = 3.0, autobid_share: float = 0.1) -> dict:
+    """Copione casuale: chiamate a turno con i ruoli nelle proporzioni della rosa, ogni
+    giocatore con un valore da cui le squadre rilanciano a intervalli esponenziali
+    (media `mean_gap` secondi) finché il prezzo non lo supera."""
+    rng = random.Random(seed)
+    roster = DEFAULT_ROSTER if roster is None else roster
+    names = [f"Squadra {i + 1}" for i in range(teams)]
+    catalog = Catalog(PLAYERS)
+
+    by_role = {}
+    for p in catalog.players:
+        by_role.setdefault(p.role, []).append(p.label)
+    for labels in by_role.values():
+        rng.shuffle(labels)
+    # un giro di ruoli come una rosa (3 POR, 8 DIF, ...) mescolato, ripetuto
+    cycle = [role for role, n in roster.items() for _ in range(n)] or sorted(by_role)
+
+    out = []
+    for k in range(lots):
+        if k % len(cycle) == 0:
+            rng.shuffle(cycle)
+        role = cycle[k % len(cycle)]
+        if not by_role.get(role):
+            role = max(by_role, key=lambda r: len(by_role[r]))
+        player = by_role[role].pop()
+
+        value = max(1, int(rng.paretovariate(1.5) * budget / 30))
+        price, bids = 1, []
+        while True:
+            team = rng.choice(names)
+            gap = round(rng.expovariate(1 / mean_gap), 3)
+            if rng.random() < autobid_share:
+                bids.append({"team": team, "max": value + rng.randint(-2, 2), "after": gap})
+                break
+            inc = rng.choice(INCREMENTS)
+            if price + inc > value:
+                break
+            price += inc
+            bids.append({"team": team, "inc": inc, "after": gap})
+        out.append({"player": player, "team": names[k % teams], "pick": pick, "bids": bids, "confirm": confirm})
+
+    return {"teams": {n: budget for n in names}, "admin": names[0], "roster": dict(roster), "lots": out}
+
+
+def script_from_journal(directory: str, budgets: dict, admin: str, roster: dict | None = None,
+                        gap: float = 1.0, pick: float = 10.0, confirm: float = 3.0) -> dict:
+    """Copione dagli eventi del log di una stanza. Solo gli eventi dopo l'ultimo snapshot:
+    le aste già compattate nello snapshot non hanno più i rilanci."""
+    import journal
+
+    _, tail = journal.read(directory)  # sola lettura: il log può essere di un server acceso
+    lots, lot, price = [], None, 0
+    for event in tail:
+        kind = event["type"]
+        if kind == "start":
+            lot = {"player": event["player"], "team": event["team"], "pick": pick, "bids": [], "confirm": confirm}
+            lots.append(lot)
+            price = 1
+        elif lot is None:
+            continue
+        elif kind == "bid":
+            # i rilanci delle offerte automatiche li rifà il motore
+            if not event.get("auto"):
+                lot["bids"].append({"team": event["team"], "inc": event["price"] - price, "after": gap})
+            price = event["price"]
+        elif kind == "autobid":
+            lot["bids"].append({"team": event["team"], "max": event["max"], "after": gap})
+        elif kind == "cancel":
+            lot["cancel"] = True
+    return {"teams": dict(budgets), "admin": admin, "roster": dict(roster or {}), "lots": lots}
+
+
+def _timing(samples: list) -> dict:
+    if not samples:
+        return {"n": 0}
+    s = sorted(samples)
+    return {
+        "n": len(s),
+        "mean_us": round(sum(s) / len(s) * 1e6, 2),
+        "p50_us": round(s[len(s) // 2] * 1e6, 2),
+        "p99_us": round(s[min(len(s) - 1, int(len(s) * 0.99))] * 1e6, 2),
+        "max_us": round(s[-1] * 1e6, 2),
+    }
+
+
+def run(script: dict, labels=PLAYERS) -> dict:
+    """Fa girare il copione su una stanza nuova in tempo simulato e ritorna rose, prezzi,
+    esiti e tempi (veri) delle operazioni del motore."""
+    clock = VirtualClock()
+    budgets = script["teams"]
+    admin = script.get("admin") or next(iter(budgets))
+    room = auction.Room("sim", admin, MemoryStore(budgets, Catalog(labels)), script.get("roster") or {}, clock=clock)
+    teams = list(budgets)
+
+    samples = {"start": [], "bid": [], "autobid": [], "confirm": [], "cancel": []}
+    outcomes = {}
+    skipped = []
+    renominated = 0
+
+    def timed(op, fn, *args):
+        t0 = time.perf_counter()
+        r = fn(*args)
+        samples[op].append(time.perf_counter() - t0)
+        return r
+
+    wall0 = time.perf_counter()
+    for lot in script["lots"]:
+        clock.advance(lot.get("pick", 0))
+        # chi aveva la chiamata non può (ruolo pieno, crediti): la passa alla squadra dopo
+        first = teams.index(lot["team"]) if lot["team"] in teams else 0
+        for k in range(len(teams)):
+            if timed("start", room.start_auction, lot["player"], teams[(first + k) % len(teams)]):
+                renominated += k > 0
+                break
+        else:
+            skipped.append(lot["player"])
+            continue
+
+        for step in lot.get("bids", ()):
+            clock.advance(step.get("after", 0))
+            if "max" in step:
+                r = timed("autobid", room.set_autobid, step["team"], step["max"])
+                key = "autobid:" + ("ok" if r["ok"] else r["reason"])
+            else:
+                r = timed("bid", room.place_bid, step["team"], step.get("inc", 1))
+                key = "bid:" + ("ok" if r["ok"] else r["reason"])
+            outcomes[key] = outcomes.get(key, 0) + 1
+
+        # lascia scadere il timer (ogni rilancio lo ha spostato)
+        while not room.get_status()["awaiting_confirmation"] and clock.run_timers():
+            pass
+        clock.advance(lot.get("confirm", 0))
+        if lot.get("cancel"):
+            timed("cancel", room.cancel, admin)
+        else:
+            timed("confirm", room.confirm, admin)
+    wall = time.perf_counter() - wall0
+
+    rosters = {team: [] for team in teams}
+    for entry in reversed(room.get_history()):
+        rosters.setdefault(entry["winner"], []).append({"player": entry["player"], "price": entry["price"]})
+    engine = {op: _timing(s) for op, s in samples.items()}
+    engine["tick"] = _timing(clock.callback_seconds)
+
+    return {
+        "lots": len(script["lots"]),
+        "sold": sum(len(r) for r in rosters.values()),
+        "skipped": skipped,
+        "renominated": renominated,
+        "rosters": rosters,
+        "remaining": room.get_remaining_all(),
+        "outcomes": dict(sorted(outcomes.items())),
+        "virtual_seconds": round(clock.monotonic(), 3),
+        "wall_seconds": round(wall, 3),
+        "engine": engine,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Asta intera in tempo simulato")
+    ap.add_argument("--lots", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--script", help="copione JSON da rigiocare")
+    ap.add_argument("--journal", help="cartella del log eventi da rigiocare (stanza di default, league.py)")
+    ap.add_argument("--save", help="salva il copione usato in questo file JSON")
+    ap.add_argument("--json", action="store_true", help="stampa tutto il risultato in JSON")
+    args = ap.parse_args()
+
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+    elif args.journal:
+        from league import ADMIN_TEAM, ROSTER_LIMITS, TEAM_BUDGETS
+
+        script = script_from_journal(args.journal, TEAM_BUDGETS, ADMIN_TEAM, ROSTER_LIMITS)
+    else:
+        script = synthetic_script(args.lots, seed=args.seed)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(script, f, ensure_ascii=False, indent=1)
+
+    result = run(script)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=1))
+        return
+
+    print(f"{result['sold']}/{result['lots']} giocatori venduti in {result['virtual_seconds'] / 60:.1f} min simulati "
+          f"({result['wall_seconds']:.2f} s veri); saltati {len(result['skipped'])}, "
+          f"chiamate passate ad altri {result['renominated']}")
+    print()
+    for team, players in result["rosters"].items():
+        spent = sum(p["price"] for p in players)
+        print(f"{team:28} {len(players):3} giocatori  spesi {spent:4}  residui {result['remaining'].get(team, 0):4}")
+    print()
+    for key, n in result["outcomes"].items():
+        print(f"{key:32} {n:6}")
+    print()
+    print(f"{'operazione':10} {'n':>6} {'media':>9} {'p50':>9} {'p99':>9} {'max':>9}  (µs)")
+    for op, t in result["engine"].items():
+        if t["n"]:
+            print(f"{op:10} {t['n']:6} {t['mean_us']:9.1f} {t['p50_us']:9.1f} {t['p99_us']:9.1f} {t['max_us']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
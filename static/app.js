@@ -13,8 +13,15 @@ function setMsg(text) {
   box.innerText = text || "";
 }
 
-const TEAM_STORAGE_KEY = "fanta_team";
-const TEAM_LOCK_KEY = "fanta_team_locked";
+// Stanza: /?room=serie-b usa le API sotto /rooms/serie-b (senza = stanza di default)
+const ROOM = new URLSearchParams(location.search).get("room") || "";
+const API = ROOM ? `/rooms/${encodeURIComponent(ROOM)}` : "";
+
+const TEAM_STORAGE_KEY = ROOM ? `fanta_team:${ROOM}` : "fanta_team";
+const TEAM_LOCK_KEY = ROOM ? `fanta_team_locked:${ROOM}` : "fanta_team_locked";
+
+// Squadra admin della stanza (arriva da /teams)
+let adminTeam = "Monkey D. United";
 
 // CAMBIA QUI IL CODICE (4 CIFRE)
 const ADMIN_PIN = "1937";
@@ -89,12 +96,15 @@ async function startAuction() {
   const team = getSelectedTeam();
   if (!player || !team) return;
 
-  const r = await postJson("/start", { player, team });
+  const r = await postJson(`${API}/start`, { player, team });
 
   if (!r.ok) {
     if (r.reason === "player_not_available") setMsg("Giocatore non disponibile (già assegnato o non in lista).");
     else if (r.reason === "insufficient_budget") setMsg(`Budget insufficiente: servono ${r.needed}, hai ${r.remaining}.`);
     else if (r.reason === "unknown_team") setMsg("Squadra non riconosciuta.");
+    else if (r.reason === "role_full") setMsg(`Hai già tutti i ${r.role} che ti servono.`);
+    else if (r.reason === "max_bid_exceeded") setMsg("Crediti insufficienti per completare la rosa (serve 1 credito per ogni posto vuoto).");
+    else if (r.reason === "rate_limited" || r.reason === "overloaded") setMsg(`Troppe richieste: riprova tra ${Math.ceil(r.retry_after)} s.`);
     else setMsg("Impossibile avviare l’asta.");
   } else {
     setMsg("");
@@ -103,16 +113,44 @@ async function startAuction() {
   await refreshBudget();
 }
 
+// Coda delle chiamate: il server apre da solo la prossima asta dopo CONFERMA/ANNULLA
+async function queuePlayer() {
+  const player = document.getElementById("player").value.trim();
+  const team = getSelectedTeam();
+  if (!player || !team) return;
+
+  const q = await (await fetch(`${API}/queue?team=${encodeURIComponent(team)}`)).json();
+  if (!q.ok) {
+    setMsg("Squadra non riconosciuta.");
+    return;
+  }
+  if (q.mine.includes(player)) return;
+  const r = await postJson(`${API}/queue/team`, { team, players: [...q.mine, player] });
+
+  if (!r.ok) setMsg("Impossibile mettere in coda.");
+  else if (r.skipped.includes(player)) setMsg("Giocatore non disponibile (già assegnato o non in lista).");
+  else if (r.started) setMsg(`Asta aperta per ${r.started}.`);
+  else setMsg(`In coda: ${r.queue.join(", ")}`);
+}
+
 async function bid(inc) {
   const team = getSelectedTeam();
   if (!team) return;
 
-  const r = await postJson("/bid", { team, inc });
+  const body = { team, inc };
+  if (lastStatus && lastStatus.active) body.expected = lastStatus.highest_bid;
+  const r = await postJson(`${API}/bid`, body);
 
   if (!r.ok) {
     if (r.reason === "insufficient_budget") setMsg(`Budget insufficiente: per rilanciare servono ${r.needed}, hai ${r.remaining}.`);
+    else if (r.reason === "stale_price") setMsg(`Qualcuno ha già rilanciato: ora l’offerta è ${r.current}.`);
     else if (r.reason === "auction_not_active") setMsg("Asta non attiva.");
+    else if (r.reason === "role_full") setMsg(`Hai già tutti i ${r.role} che ti servono.`);
+    else if (r.reason === "max_bid_exceeded") setMsg(`Puoi offrire al massimo ${r.max_bid}: devi tenere 1 credito per ogni posto vuoto in rosa.`);
+    else if (r.reason === "rate_limited" || r.reason === "overloaded") setMsg(`Troppe richieste: riprova tra ${Math.ceil(r.retry_after)} s.`);
     else setMsg("Rilancio non possibile.");
+  } else if (r.outbid) {
+    setMsg(`Superato subito da un’offerta automatica: ora l’offerta è ${r.current}.`);
   } else {
     setMsg("");
   }
@@ -120,9 +158,32 @@ async function bid(inc) {
   await refreshBudget();
 }
 
+// Offerta automatica: il server rilancia per noi fino al massimo indicato
+async function autoBid() {
+  const team = getSelectedTeam();
+  const input = document.getElementById("autoMax");
+  const max = parseInt(input ? input.value : "", 10);
+  if (!team || !(max > 0)) return;
+
+  const r = await postJson(`${API}/autobid`, { team, max });
+
+  if (!r.ok) {
+    if (r.reason === "max_too_low") setMsg(`Il massimo deve superare l’offerta attuale (${r.current}).`);
+    else if (r.reason === "auction_not_active") setMsg("Asta non attiva.");
+    else if (r.reason === "role_full") setMsg(`Hai già tutti i ${r.role} che ti servono.`);
+    else if (r.reason === "rate_limited" || r.reason === "overloaded") setMsg(`Troppe richieste: riprova tra ${Math.ceil(r.retry_after)} s.`);
+    else setMsg("Offerta automatica non possibile.");
+    return;
+  }
+
+  const capped = r.max < max ? ` (ridotto a ${r.max} per crediti/rosa)` : "";
+  const lead = r.leading_team === team ? "sei in testa" : `in testa ${r.leading_team}`;
+  setMsg(`Offerta automatica fino a ${r.max}${capped}: ${lead} a ${r.price}.`);
+}
+
 async function confirmWin() {
   const team = getSelectedTeam();
-  const r = await postJson("/confirm", { team });
+  const r = await postJson(`${API}/confirm`, { team });
 
   if (!r.ok) {
     setMsg("Conferma non riuscita (solo admin).");
@@ -137,14 +198,14 @@ async function confirmWin() {
 
 async function cancelAuction() {
   const team = getSelectedTeam();
-  await postJson("/cancel", { team });
+  await postJson(`${API}/cancel`, { team });
 }
 
 async function deleteHistoryItem(id) {
   const team = getSelectedTeam();
   if (!team) return;
 
-  const r = await postJson("/history/delete", { team, id });
+  const r = await postJson(`${API}/history/delete`, { team, id });
   if (r.ok) {
     setMsg("");
     await refreshHistory();
@@ -155,20 +216,68 @@ async function deleteHistoryItem(id) {
   }
 }
 
-async function loadPlayersDatalist() {
-  const res = await fetch("/players");
-  const data = await res.json();
+// Aggiorna i figli di `parent` perché siano, in ordine, i nodi delle chiavi `keys`:
+// crea solo i nodi nuovi (create(key)), toglie quelli spariti e sposta solo quelli fuori
+// posto. `nodes` (chiave -> nodo) resta tra una chiamata e l'altra.
+function reconcile(parent, keys, nodes, create) {
+  const keep = new Set(keys);
+  nodes.forEach((node, key) => {
+    if (!keep.has(key)) {
+      node.remove();
+      nodes.delete(key);
+    }
+  });
+
+  let next = parent.firstChild;
+  keys.forEach(key => {
+    let node = nodes.get(key);
+    if (!node) {
+      node = create(key);
+      nodes.set(key, node);
+    }
+    if (node === next) next = next.nextSibling;
+    else parent.insertBefore(node, next);
+  });
+}
 
-  const dl = document.getElementById("playersList");
-  dl.innerHTML = "";
+// Suggerimenti del campo giocatore: si chiede al server solo quello che si sta scrivendo
+const SEARCH_LIMIT = 20;
+const SEARCH_DEBOUNCE_MS = 120;
+let searchSeq = 0;
+let searchTimer = null;
+const playerOptions = new Map(); // nome -> <option> nella datalist
 
-  (data.players || []).forEach(name => {
+function renderPlayerOptions(names) {
+  reconcile(document.getElementById("playersList"), names, playerOptions, name => {
     const opt = document.createElement("option");
     opt.value = name;
-    dl.appendChild(opt);
+    return opt;
   });
 }
 
+async function loadPlayersDatalist() {
+  const input = document.getElementById("player");
+  const q = input ? input.value.trim() : "";
+  const seq = ++searchSeq;
+
+  if (!q) {
+    renderPlayerOptions([]);
+    return;
+  }
+
+  const res = await fetch(`${API}/players/search?q=${encodeURIComponent(q)}&limit=${SEARCH_LIMIT}`);
+  const data = await res.json();
+  if (seq !== searchSeq) return; // nel frattempo è partita una ricerca più recente
+
+  // scrivendo una lettera in più i risultati restano in gran parte gli stessi
+  renderPlayerOptions(data.players || []);
+}
+
+function schedulePlayersSearch() {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(loadPlayersDatalist, SEARCH_DEBOUNCE_MS);
+}
+
 function formatTs(ts) {
   try {
     const d = new Date(ts * 1000);
@@ -178,45 +287,112 @@ function formatTs(ts) {
   }
 }
 
+// Storico: righe per id, aggiornate per differenza. Dopo la prima lettura si chiedono solo
+// le aste aggiunte e gli id tolti (?since=), e all'inizio nel DOM ci sono solo le
+// HISTORY_WINDOW più recenti. "Mostra altre" ne aggiunge altre HISTORY_WINDOW, che restano:
+// non è una lista virtuale, un giro costa quanto le righe mostrate (poche, finché non si
+// preme), non quanto lo storico.
+const HISTORY_WINDOW = 50;
+let historyItems = []; // dalla più recente, come /history
+let historyVersion = null;
+let historyEpoch = null; // cambia se il server è ripartito: le versioni ricominciano da capo
+let historyShown = HISTORY_WINDOW;
+let historyAdmin = false; // le righe mostrano "Elimina"
+const historyRows = new Map(); // id -> riga
+
 async function refreshHistory() {
-  const box = document.getElementById("historyList");
-  const res = await fetch("/history");
+  const since = historyVersion === null ? "" : `?since=${historyVersion}`;
+  const res = await fetch(`${API}/history${since}`);
   const data = await res.json();
-  const history = data.history || [];
+  if (historyVersion !== null && data.epoch !== historyEpoch) {
+    // server ripartito: il delta è calcolato su versioni diverse da quelle che abbiamo
+    historyVersion = null;
+    if (!data.history) return refreshHistory();
+  } else if (historyVersion !== null && data.version < historyVersion) {
+    return; // risposta superata
+  }
 
-  if (history.length === 0) {
-    box.className = "muted";
-    box.innerText = "Nessuna asta conclusa";
-    return;
+  if (data.history) {
+    historyItems = data.history;
+  } else {
+    const removed = new Set(data.removed || []);
+    let added = data.added || [];
+    if (added.length || removed.size) {
+      // (due giri partiti insieme possono portare le stesse aggiunte)
+      const known = new Set(historyItems.map(item => item.id));
+      added = added.filter(item => !known.has(item.id));
+      historyItems = added.concat(historyItems.filter(item => !removed.has(item.id)));
+    }
   }
+  historyVersion = data.version;
+  historyEpoch = data.epoch;
+  renderHistory();
+}
 
-  // Elimina nello storico: resta legato all'admin vero (Monkey D. United) lato backend
-  const myTeam = getSelectedTeam();
-  const isAdminTeam = (myTeam === "Monkey D. United");
+function historyRow(item) {
+  const row = document.createElement("div");
+  row.className = "hist-item";
+
+  const left = document.createElement("div");
+  const when = item.ts ? ` <span class="muted">(${formatTs(item.ts)})</span>` : "";
+  left.innerHTML = `<b>${item.player}</b> → ${item.winner} — <b>${item.price}</b>${when}`;
+  row.appendChild(left);
+
+  if (item.id) {
+    const btn = document.createElement("button");
+    btn.className = "danger";
+    btn.textContent = "Elimina";
+    btn.hidden = !historyAdmin;
+    btn.onclick = () => deleteHistoryItem(item.id);
+    row.appendChild(btn);
+  }
+  return row;
+}
 
-  box.className = "";
-  box.innerHTML = "";
+function renderHistory() {
+  const box = document.getElementById("historyList");
+  const more = document.getElementById("historyMore");
 
-  history.forEach(item => {
-    const row = document.createElement("div");
-    row.className = "hist-item";
+  if (historyItems.length === 0) {
+    historyRows.clear();
+    box.className = "muted";
+    box.innerText = "Nessuna asta conclusa";
+    if (more) more.hidden = true;
+    return;
+  }
+  if (historyRows.size === 0) {
+    box.className = "";
+    box.innerHTML = "";
+  }
 
-    const left = document.createElement("div");
-    const when = item.ts ? ` <span class="muted">(${formatTs(item.ts)})</span>` : "";
-    left.innerHTML = `<b>${item.player}</b> → ${item.winner} — <b>${item.price}</b>${when}`;
+  // Elimina nello storico: resta legato all'admin della stanza lato backend
+  const isAdminTeam = (getSelectedTeam() === adminTeam);
+  if (isAdminTeam !== historyAdmin) {
+    historyAdmin = isAdminTeam;
+    historyRows.forEach(row => {
+      const btn = row.querySelector("button");
+      if (btn) btn.hidden = !isAdminTeam;
+    });
+  }
 
-    row.appendChild(left);
+  // una vendita non cambia dopo la conferma: le righe già nel DOM restano com'erano
+  let byId = null;
+  const ids = historyItems.slice(0, historyShown).map(item => item.id);
+  reconcile(box, ids, historyRows, id => {
+    byId = byId || new Map(historyItems.map(item => [item.id, item]));
+    return historyRow(byId.get(id));
+  });
 
-    if (isAdminTeam && item.id) {
-      const btn = document.createElement("button");
-      btn.className = "danger";
-      btn.textContent = "Elimina";
-      btn.onclick = () => deleteHistoryItem(item.id);
-      row.appendChild(btn);
-    }
+  if (more) {
+    const hidden = historyItems.length - ids.length;
+    more.hidden = hidden <= 0;
+    more.textContent = `Mostra altre (${hidden})`;
+  }
+}
 
-    box.appendChild(row);
-  });
+function showMoreHistory() {
+  historyShown += HISTORY_WINDOW;
+  renderHistory();
 }
 
 async function refreshBudget() {
@@ -229,19 +405,75 @@ async function refreshBudget() {
     return;
   }
 
-  const res = await fetch("/teams");
+  const res = await fetch(`${API}/teams`);
   const data = await res.json();
+  if (data.admin) adminTeam = data.admin;
 
   const remaining = (data.remaining && data.remaining[team] !== undefined) ? data.remaining[team] : "-";
   out.innerText = remaining;
+
+  // offerta massima per ruolo (crediti meno 1 per ogni altro posto vuoto in rosa)
+  const maxOut = document.getElementById("maxBid");
+  const maxBid = data.max_bid && data.max_bid[team];
+  if (maxOut) {
+    maxOut.innerText = maxBid
+      ? " · max " + Object.keys(maxBid).map(role => `${role} ${maxBid[role]}`).join(" / ")
+      : "";
+  }
 }
 
-async function refresh() {
-  const res = await fetch("/status");
-  const s = await res.json();
+// Countdown locale: lo stato arriva solo quando cambia (stream) con la scadenza nell'orologio
+// del server ("deadline"); convertita in performance.now() il timer scende qui, ad ogni frame
+let timerEndsAt = 0;
+let timerText = "";
+
+// Ultimo stato ricevuto: il rilancio manda il prezzo visto ("expected")
+let lastStatus = null;
+
+// Sincronizzazione dell'orologio (stile NTP) con /time: di CLOCK_SAMPLES ping si tiene
+// quello con andata e ritorno più breve, l'errore è al massimo metà di quel tempo
+const CLOCK_SAMPLES = 5;
+const CLOCK_RESYNC_MS = 60000;
+let clockOffset = null; // ms: orologio del server - performance.now()
+
+async function syncClock() {
+  let best = null;
+  for (let i = 0; i < CLOCK_SAMPLES; i++) {
+    const t0 = performance.now();
+    let data;
+    try {
+      data = await (await fetch(`${API}/time`, { cache: "no-store" })).json();
+    } catch {
+      continue;
+    }
+    const t1 = performance.now();
+    if (!best || t1 - t0 < best.rtt) best = { rtt: t1 - t0, offset: data.now * 1000 - (t0 + t1) / 2 };
+  }
+  if (!best) return;
+  clockOffset = best.offset;
+  if (lastStatus) renderStatus(lastStatus); // scadenza riconvertita con lo scarto nuovo
+}
 
+function renderTimer() {
+  let text = "";
+  if (timerEndsAt) {
+    // per eccesso ai decimi: "0.0" proprio alla scadenza
+    const left = Math.ceil(Math.max(0, timerEndsAt - performance.now()) / 100) / 10;
+    text = `⏱ Timer: ${left.toFixed(1)}s`;
+  }
+  if (text === timerText) return; // il DOM si tocca solo quando cambia il testo
+  timerText = text;
+  document.getElementById("timer").innerText = text;
+}
+
+function timerFrame() {
+  renderTimer();
+  requestAnimationFrame(timerFrame);
+}
+
+function renderStatus(s) {
   const view = document.getElementById("view");
-  const timer = document.getElementById("timer");
+  lastStatus = s;
 
   if (s.awaiting_confirmation) {
     view.innerText =
@@ -249,22 +481,107 @@ async function refresh() {
       `Giocatore: ${s.player || "-"}\n` +
       `Offerta: ${s.highest_bid}\n` +
       `Leader: ${s.leading_team || "-"}`;
-    timer.innerText = "";
+    timerEndsAt = 0;
   } else if (!s.active) {
     view.innerText = "Nessuna asta attiva";
-    timer.innerText = "";
+    timerEndsAt = 0;
   } else {
     view.innerText =
       `Giocatore: ${s.player}\n` +
       `Offerta: ${s.highest_bid}\n` +
       `Leader: ${s.leading_team || "-"}`;
-    timer.innerText = `⏱ Timer: ${s.time_left}s`;
+    // senza sincronizzazione (ancora in corso o /time non raggiungibile): secondi interi
+    timerEndsAt = (s.deadline != null && clockOffset !== null)
+      ? s.deadline * 1000 - clockOffset
+      : performance.now() + s.time_left * 1000;
   }
+  renderQueue(s.queue);
+  renderTimer();
 }
 
-document.addEventListener("DOMContentLoaded", () => {
+function renderQueue(q) {
+  const el = document.getElementById("queue");
+  if (!el || !q) return;
+  const parts = [];
+  if (q.next.length) parts.push("Prossime chiamate: " + q.next.map((n) => `${n.player} (${n.team})`).join(", "));
+  const waiting = Object.values(q.teams).reduce((a, b) => a + b, 0);
+  if (waiting) parts.push(`${waiting} in coda dalle squadre`);
+  if (q.paused) parts.push("coda in pausa");
+  el.innerText = parts.join(" · ");
+}
+
+async function refresh() {
+  const res = await fetch(`${API}/status`);
+  renderStatus(await res.json());
+}
+
+async function refreshAll() {
+  await refreshHistory();
+  await loadPlayersDatalist();
+  await refreshBudget();
+}
+
+// Polling di riserva: attivo solo se lo stream non è disponibile/cade
+let pollTimers = [];
+
+function startPolling() {
+  if (pollTimers.length) return;
+  pollTimers = [
+    setInterval(refresh, 300),
+    setInterval(refreshHistory, 3000),
+    setInterval(refreshBudget, 3000),
+  ];
+}
+
+function stopPolling() {
+  pollTimers.forEach(clearInterval);
+  pollTimers = [];
+}
+
+function connectStream() {
+  if (!window.EventSource) {
+    startPolling();
+    return;
+  }
+
+  const es = new EventSource(`${API}/stream`);
+  es.addEventListener("state", ev => renderStatus(JSON.parse(ev.data)));
+  es.addEventListener("history", () => refreshAll());
+  es.onopen = () => {
+    stopPolling();
+    syncClock(); // dopo una riconnessione la rete può essere cambiata
+    // eventi persi mentre eravamo scollegati
+    refreshAll();
+  };
+  // EventSource si riconnette da solo: nel frattempo si torna al polling
+  es.onerror = () => startPolling();
+}
+
+// Altre stanze: squadre e admin non sono quelli scritti nella pagina
+async function loadRoomTeams() {
+  const sel = document.getElementById("team");
+  const res = await fetch(`${API}/teams`);
+  const data = await res.json();
+  if (data.admin) adminTeam = data.admin;
+  if (!sel || !data.budgets) return;
+
+  sel.innerHTML = "";
+  const empty = document.createElement("option");
+  empty.value = "";
+  empty.textContent = "Scegli la tua squadra…";
+  sel.appendChild(empty);
+  Object.keys(data.budgets).forEach(name => {
+    const opt = document.createElement("option");
+    opt.textContent = name;
+    sel.appendChild(opt);
+  });
+}
+
+document.addEventListener("DOMContentLoaded", async () => {
   const teamSel = document.getElementById("team");
 
+  if (ROOM) await loadRoomTeams();
+
   if (teamSel) {
     loadTeam();
     lockTeamIfNeeded();
@@ -282,11 +599,14 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
-  loadPlayersDatalist();
+  const playerInput = document.getElementById("player");
+  if (playerInput) playerInput.addEventListener("input", schedulePlayersSearch);
+
   refreshHistory();
   refreshBudget();
 
-  setInterval(refresh, 300);
-  setInterval(refreshHistory, 3000);
-  setInterval(refreshBudget, 3000);
+  requestAnimationFrame(timerFrame);
+  syncClock();
+  setInterval(syncClock, CLOCK_RESYNC_MS);
+  connectStream();
 });
@@ -0,0 +1,881 @@
+# store.py
+# Dove vive lo stato della lega: asta in corso, storico, crediti residui, svincolati.
+#
+# auction.py lavora solo dentro `with store.transaction() as tx:` e usa l'interfaccia
+# comune di tx (attributi state/version/history_version/next_history_id + metodi sotto).
+#
+# - MemoryStore: tutto in memoria nel processo (un solo worker uvicorn), con il log
+#   eventi opzionale di journal.py per il ripristino.
+# - SqliteStore: file SQLite in WAL condiviso da più worker. Ogni transazione è un
+#   BEGIN IMMEDIATE, quindi controlli e aggiornamenti (rilanci, chiusura timer) sono
+#   atomici anche tra processi diversi.
+#
+# timer_end è in time.monotonic(): su Linux è lo stesso orologio per tutti i processi
+# della macchina, quindi i worker di SqliteStore devono girare sullo stesso host.
+
+import json
+import sqlite3
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+from catalog import AvailableIndex, Catalog, parse_player
+from history import HistoryIndex
+
+
+# Quante modifiche di storico/crediti/svincolati tenere per le risposte delta (?since=)
+CHANGELOG_SIZE = 1000
+
+
+def _idle_state() -> dict:
+    return {
+        "active": False,
+        "player": None,
+        "leading_team": None,
+        "highest_bid": 0,
+        "timer_end": 0.0,  # time.monotonic() di chiusura
+        "awaiting_confirmation": False,
+        "queue": empty_queue(),
+    }
+
+
+class RoleSpend:
+    """Spesa di una squadra in un ruolo, accanto al contatore di rosa (solo MemoryStore:
+    SQLite tiene lo stesso nelle tabelle roster e roster_prices). add() costa O(1); solo
+    quando se ne va l'ultimo giocatore pagato quanto il massimo si cerca il nuovo massimo
+    tra i prezzi diversi del ruolo, che sono al massimo quanti i posti."""
+
+    __slots__ = ("spent", "max_price", "prices")
+
+    def __init__(self):
+        self.spent = 0
+        self.max_price = 0
+        self.prices = {}  # prezzo -> giocatori pagati così
+
+    def add(self, price: int, delta: int):
+        n = self.prices.get(price, 0) + delta
+        if n > 0:
+            self.prices[price] = n
+        else:
+            self.prices.pop(price, None)
+        self.spent = max(0, self.spent + price * delta)
+        if delta > 0:
+            self.max_price = max(self.max_price, price)
+        elif price >= self.max_price and price not in self.prices:
+            self.max_price = max(self.prices, default=0)
+
+
+def empty_queue() -> dict:
+    # coda delle chiamate (vedi Room.set_nomination_order / set_team_queue in auction.py).
+    # Non si modifica mai sul posto: ogni cambio sostituisce il dict intero.
+    return {
+        "order": [],  # [[giocatore, squadra che lo chiama], ...] in ordine, decisi dall'admin
+        "teams": {},  # squadra -> [giocatori] che vuole chiamare, a turno tra le squadre
+        "turn": None,  # ultima squadra che ha chiamato dalla propria coda
+        "paused": False,
+    }
+
+
+@contextmanager
+def _timed(lock):
+    # attesa per entrare e durata della transazione, per /metrics
+    t0 = time.perf_counter()
+    t1 = None
+    try:
+        with lock:
+            t1 = time.perf_counter()
+            yield
+    finally:
+        if t1 is not None:
+            metrics.lock_wait_seconds.observe(t1 - t0)
+            metrics.lock_hold_seconds.observe(time.perf_counter() - t1)
+
+
+class MemoryStore:
+    IN_MEMORY = True  # lo stato cambia solo da questo processo, le transazioni non toccano il disco
+
+    # Un solo scrittore alla volta (il lock), letture senza lock: le transazioni (_MemoryTx)
+    # modificano le strutture qui sotto e alla fine pubblicano in self._view copie di quelle
+    # cambiate, che nessuno modifica più. Una lettura prende self._view una volta e usa
+    # sempre quella: un rilancio non aspetta mai una ricerca o una lista di svincolati.
+
+    def __init__(self, budgets: dict, catalog: Catalog):
+        self._budgets = dict(budgets)
+        self._catalog = catalog
+        self._lock = threading.Lock()
+        self._journal = None
+        # diverso ad ogni avvio, negli ETag e nelle risposte di /history: le versioni si
+        # ripristinano dal log, ma quelle date per eventi non ancora su disco al momento di
+        # un crash verranno riusate per modifiche diverse
+        self.epoch = format(time.time_ns(), "x")
+
+        # --- solo dentro una transazione ---
+        self.state = _idle_state()
+        self.version = 0  # cambia ad ogni modifica di state
+        self.history_version = 0  # cambia ad ogni modifica di storico/crediti/svincolati
+        self.next_history_id = 1
+        self._history = HistoryIndex()  # {"id": 1, "player": "...", "winner": "...", "price": 10, "ts": 1700000000}
+        self._remaining = dict(self._budgets)
+        self._available = AvailableIndex(catalog)
+        self._roster = {team: {} for team in self._budgets}  # squadra -> {ruolo: giocatori presi}
+        self._spend = {team: {} for team in self._budgets}  # squadra -> {ruolo: RoleSpend}
+        self._proxies = {}  # squadra -> (offerta massima, ordine di registrazione) per l'asta in corso
+        self._changes = deque(maxlen=CHANGELOG_SIZE)  # (history_version, modifica)
+
+        # --- per le letture ---
+        self._view = _View(self.version, dict(self.state), self.history_version, dict(self._remaining),
+                           {team: {} for team in self._budgets}, {team: {} for team in self._budgets},
+                           self._available.copy(), ())
+
+    @contextmanager
+    def transaction(self):
+        with _timed(self._lock) if metrics.ENABLED else self._lock:
+            tx = _MemoryTx(self)
+            try:
+                yield tx
+            finally:
+                # niente rollback in memoria: quello che è stato modificato si pubblica comunque
+                self._publish(tx)
+
+    def _publish(self, tx: "_MemoryTx"):
+        # copia solo quello che la transazione ha toccato (i crediti e le rose cambiano a
+        # ogni vendita, gli svincolati a ogni vendita e listone, lo stato a ogni rilancio)
+        view = self._view
+        roster, spend = view.roster, view.spend
+        if tx.teams:
+            roster, spend = dict(roster), dict(spend)
+            for team in tx.teams:
+                roster[team] = dict(self._roster[team])
+                spend[team] = {role: (s.spent, s.max_price) for role, s in self._spend[team].items() if s.prices}
+        self._view = _View(
+            self.version,
+            dict(self.state),
+            self.history_version,
+            dict(self._remaining) if tx.remaining_changed else view.remaining,
+            roster,
+            spend,
+            self._available.copy() if tx.available_changed else view.available,
+            tuple(self._changes) if tx.changes_changed else view.changes,
+        )
+
+    def watch(self, callback):
+        # nessun altro processo può cambiare lo stato in memoria
+        pass
+
+    @property
+    def journal(self):
+        """Log eventi collegato con attach_journal (None = niente log)."""
+        return self._journal
+
+    def snapshot(self) -> dict:
+        # (dentro una transazione, vedi _MemoryTx.record)
+        return {
+            "state": {k: v for k, v in self.state.items() if k != "timer_end"},
+            "history": list(self._history),  # le entry non vengono mai modificate
+            "next_history_id": self.next_history_id,
+            "proxies": {team: list(p) for team, p in self._proxies.items()},
+            "version": self.version,
+            "history_version": self.history_version,
+        }
+
+    # --- letture (da self._view e dallo storico, senza lock) ---
+
+    def read_status(self) -> tuple:
+        view = self._view
+        return view.version, dict(view.state)
+
+    def history(self) -> list:
+        # HistoryIndex si legge senza lock (vedi history.py)
+        return self._history.newest_first()
+
+    def history_page(self, cursor: int | None, limit: int, team: str | None = None,
+                     player: str | None = None) -> tuple:
+        return self._history.page(cursor, limit, team, player)
+
+    def history_after(self, after: int, limit: int) -> list:
+        return self._history.after(after, limit)
+
+    def budgets(self) -> dict:
+        return dict(self._budgets)
+
+    def versions(self) -> tuple:
+        view = self._view
+        return view.version, view.history_version
+
+    def changes_since(self, since: int) -> tuple:
+        """(history_version attuale, modifiche dopo `since`), oppure None al posto della
+        lista se non sono più tutte disponibili (il client deve ricaricare tutto)."""
+        view = self._view
+        return view.history_version, _contiguous(view.history_version, since, view.changes)
+
+    def remaining(self, team: str) -> int | None:
+        return self._view.remaining.get(team)
+
+    def remaining_all(self) -> dict:
+        return dict(self._view.remaining)
+
+    def roster(self, team: str) -> dict:
+        """{ruolo: giocatori presi} della squadra (da non modificare)."""
+        return self._view.roster.get(team, {})
+
+    def roster_all(self) -> dict:
+        return {team: dict(counts) for team, counts in self._view.roster.items()}
+
+    def spend(self, team: str) -> dict:
+        """{ruolo: (spesa, prezzo massimo)} della squadra, solo i ruoli con giocatori."""
+        return dict(self._view.spend.get(team, {}))
+
+    def spend_all(self) -> dict:
+        return {team: dict(roles) for team, roles in self._view.spend.items()}
+
+    def role(self, player: str) -> str:
+        return _role(self._catalog, player)
+
+    def is_available(self, player: str) -> bool:
+        return player in self._view.available
+
+    def sizes(self) -> tuple:
+        return len(self._history), len(self._view.available)
+
+    def prepare_catalog(self, catalog: Catalog) -> tuple:
+        """La parte lenta di replace_catalog (indice e ricerca degli svincolati del nuovo
+        listone), fuori dal lock: il server la fa nel threadpool, così lo scrittore della
+        stanza nell'event loop tiene il lock solo per lo scambio."""
+        view = self._view
+        # lo storico si legge senza lock: se una vendita arriva a metà cambia
+        # history_version e replace_catalog non usa il risultato
+        return (view.history_version, *_available_for(catalog, view.available, self._history))
+
+    def available_players(self, role: str | None = None, club: str | None = None) -> list:
+        return self._view.available.labels(role, club)
+
+    def search_players(self, query: str, limit: int) -> list:
+        return self._view.available.search(query, limit)
+
+
+class _View:
+    """Quello che le letture di MemoryStore vedono dell'ultima transazione (da non modificare)."""
+
+    __slots__ = ("version", "state", "history_version", "remaining", "roster", "spend", "available", "changes")
+
+    def __init__(self, version, state, history_version, remaining, roster, spend, available, changes):
+        self.version = version
+        self.state = state
+        self.history_version = history_version
+        self.remaining = remaining
+        self.roster = roster
+        self.spend = spend
+        self.available = available
+        self.changes = changes
+
+
+class _MemoryTx:
+    """Transazione di MemoryStore (dentro il lock): modifica lo store e segna cosa cambia,
+    per la copia che MemoryStore._publish fa per le letture."""
+
+    def __init__(self, store: MemoryStore):
+        self._store = store
+        self.state = store.state
+        self.teams = set()  # squadre con la rosa cambiata
+        self.remaining_changed = False
+        self.available_changed = False
+        self.changes_changed = False
+
+    # contatori: direttamente nello store (li legge anche lo snapshot del log)
+
+    @property
+    def version(self) -> int:
+        return self._store.version
+
+    @version.setter
+    def version(self, value: int):
+        self._store.version = value
+
+    @property
+    def history_version(self) -> int:
+        return self._store.history_version
+
+    @history_version.setter
+    def history_version(self, value: int):
+        self._store.history_version = value
+
+    @property
+    def next_history_id(self) -> int:
+        return self._store.next_history_id
+
+    @next_history_id.setter
+    def next_history_id(self, value: int):
+        self._store.next_history_id = value
+
+    def history_append(self, entry: dict):
+        self._store._history.append(entry)
+
+    def history_remove(self, history_id: int) -> dict | None:
+        return self._store._history.remove(history_id)
+
+    def history_get(self, history_id: int) -> dict | None:
+        return self._store._history.get(history_id)
+
+    def remaining(self, team: str) -> int | None:
+        return self._store._remaining.get(team)
+
+    def set_remaining(self, team: str, value: int):
+        if team in self._store._remaining:
+            self._store._remaining[team] = int(value)
+            self.remaining_changed = True
+
+    def is_available(self, player: str) -> bool:
+        return player in self._store._available
+
+    def set_available(self, player: str, available: bool):
+        # per identità (vedi Catalog.same_player): il venduto può avere un'etichetta vecchia
+        index = self._store._available
+        for p in self._store._catalog.same_player(player):
+            if available:
+                index.add(p.label)
+            else:
+                index.discard(p.label)
+        self.available_changed = True
+
+    def role(self, player: str) -> str:
+        return _role(self._store._catalog, player)
+
+    def roster(self, team: str) -> dict:
+        """{ruolo: giocatori presi} della squadra (da non modificare)."""
+        return self._store._roster.get(team, {})
+
+    def roster_add(self, team: str, player: str, delta: int, price: int) -> dict:
+        # +1 alla conferma, -1 quando l'asta viene cancellata dallo storico; la spesa del
+        # ruolo cambia insieme al contatore (vedi RoleSpend)
+        counts = self._store._roster.get(team)
+        if counts is None:
+            return {}
+        role = self.role(player)
+        counts[role] = max(0, counts.get(role, 0) + delta)
+        spend = self._store._spend[team].get(role)
+        if spend is None:
+            spend = self._store._spend[team][role] = RoleSpend()
+        spend.add(int(price), delta)
+        self.teams.add(team)
+        return counts
+
+    def proxies(self) -> dict:
+        """{squadra: (massimo, ordine)} (da non modificare: si cambia con set_proxy)."""
+        return self._store._proxies
+
+    def set_proxy(self, team: str, max_price: int, seq: int):
+        self._store._proxies[team] = (int(max_price), int(seq))
+
+    def clear_proxies(self):
+        self._store._proxies = {}
+
+    def replace_catalog(self, catalog: Catalog, prepared=None) -> tuple:
+        """Nuovo listone: svincolati = giocatori del listone non ancora venduti.
+        Ritorna (aggiunti, tolti) rispetto agli svincolati di prima.
+        prepared = prepare_catalog(catalog): se nel frattempo non è cambiato niente basta
+        sostituire l'indice, altrimenti si rifà tutto qui."""
+        store = self._store
+        if prepared is not None and prepared[0] == store.history_version:
+            _, available, added, removed = prepared
+        else:
+            available, added, removed = _available_for(catalog, store._available, store._history)
+        store._catalog = catalog
+        store._available = available
+        self.available_changed = True
+        return added, removed
+
+    def record_change(self, change: dict):
+        # nuova versione di storico/crediti/svincolati, con la modifica per i delta
+        self.history_version += 1
+        self._store._changes.append((self.history_version, change))
+        self.changes_changed = True
+
+    def record(self, event: dict):
+        journal = self._store._journal
+        if journal is None:
+            return
+        journal.append(event)
+        if journal.wants_snapshot():
+            journal.snapshot(self._store.snapshot())
+
+    # --- log eventi (solo memoria) ---
+
+    def load_snapshot(self, snap: dict):
+        # crediti, svincolati e rose non sono nello snapshot: si ricavano dallo storico
+        store = self._store
+        self.state.update(snap.get("state") or {})
+        store._history = HistoryIndex(snap.get("history") or [])
+        store.next_history_id = int(snap.get("next_history_id") or 1)
+        # le versioni continuano da dove erano: un client con ?since= o If-None-Match di
+        # prima del riavvio non deve trovare numeri già usati per uno stato diverso
+        store.version = int(snap.get("version") or 0)
+        store.history_version = int(snap.get("history_version") or 0)
+        store._proxies = {team: tuple(p) for team, p in (snap.get("proxies") or {}).items()}
+        store._remaining = dict(store._budgets)
+        store._roster = {team: {} for team in store._budgets}
+        store._spend = {team: {} for team in store._budgets}
+        store._available = _available_for(store._catalog, store._available, store._history)[0]
+        for entry in store._history:
+            winner = entry.get("winner")
+            if winner in store._remaining:
+                price = int(entry.get("price") or 0)
+                store._remaining[winner] = max(0, store._remaining[winner] - price)
+                self.roster_add(winner, entry.get("player"), 1, price)
+        self.remaining_changed = self.available_changed = True
+
+    def attach_journal(self, j):
+        self._store._journal = j
+
+
+def _available_for(catalog: Catalog, before: AvailableIndex, history) -> tuple:
+    # (indice degli svincolati di `catalog`, aggiunti, tolti rispetto a `before`)
+    old = set(before.labels())
+    sold = {p.rank for e in history for p in catalog.same_player(e["player"])}
+    available = AvailableIndex(catalog, [p.label for p in catalog.players if p.rank not in sold])
+    after = available.labels()
+    after_set = set(after)
+    return available, [p for p in after if p not in old], sorted(old - after_set)
+
+
+def _contiguous(current: int, since: int, changes) -> list | None:
+    if since == current:
+        return []
+    if since < 0 or since > current:
+        return None
+    out = [c for v, c in changes if v > since]
+    return out if len(out) == current - since else None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS auction (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    active INTEGER NOT NULL,
+    player TEXT,
+    leading_team TEXT,
+    highest_bid INTEGER NOT NULL,
+    timer_end REAL NOT NULL,
+    awaiting_confirmation INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    history_version INTEGER NOT NULL,
+    next_history_id INTEGER NOT NULL,
+    queue TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    winner TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_winner ON history (winner, id);
+CREATE INDEX IF NOT EXISTS history_player ON history (player, id);
+CREATE TABLE IF NOT EXISTS teams (
+    name TEXT PRIMARY KEY,
+    budget INTEGER NOT NULL,
+    remaining INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    available INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS roster (
+    team TEXT NOT NULL,
+    role TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    spent INTEGER NOT NULL DEFAULT 0,
+    max_price INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (team, role)
+);
+CREATE TABLE IF NOT EXISTS roster_prices (
+    team TEXT NOT NULL,
+    role TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (team, role, price)
+);
+CREATE TABLE IF NOT EXISTS proxies (
+    team TEXT PRIMARY KEY,
+    max_price INTEGER NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    version INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+_STATE_COLUMNS = (
+    "active", "player", "leading_team", "highest_bid", "timer_end", "awaiting_confirmation", "queue"
+)
+_COUNTER_COLUMNS = ("version", "history_version", "next_history_id")
+
+
+class _SqliteTx:
+    def __init__(self, conn: sqlite3.Connection, catalog: Catalog):
+        self._conn = conn
+        self._catalog = catalog
+        row = conn.execute(
+            f"SELECT {', '.join(_STATE_COLUMNS + _COUNTER_COLUMNS)} FROM auction WHERE id = 1"
+        ).fetchone()
+        self.state = _row_to_state(row)
+        self.version, self.history_version, self.next_history_id = row[len(_STATE_COLUMNS):]
+        self._original = (dict(self.state), self.version, self.history_version, self.next_history_id)
+
+    def _write_back(self):
+        current = (self.state, self.version, self.history_version, self.next_history_id)
+        if current == self._original:
+            return
+        s = self.state
+        self._conn.execute(
+            f"UPDATE auction SET {', '.join(c + ' = ?' for c in _STATE_COLUMNS + _COUNTER_COLUMNS)} WHERE id = 1",
+            (
+                int(s["active"]), s["player"], s["leading_team"], int(s["highest_bid"]),
+                float(s["timer_end"]), int(s["awaiting_confirmation"]), json.dumps(s["queue"]),
+                self.version, self.history_version, self.next_history_id,
+            ),
+        )
+
+    def history_append(self, entry: dict):
+        self._conn.execute(
+            "INSERT INTO history (id, player, winner, price, ts) VALUES (?, ?, ?, ?, ?)",
+            (entry["id"], entry["player"], entry["winner"], entry["price"], entry["ts"]),
+        )
+
+    def history_get(self, history_id: int) -> dict | None:
+        row = self._conn.execute(
+            "SELECT id, player, winner, price, ts FROM history WHERE id = ?", (history_id,)
+        ).fetchone()
+        return _row_to_entry(row) if row else None
+
+    def history_remove(self, history_id: int) -> dict | None:
+        entry = self.history_get(history_id)
+        if entry is not None:
+            self._conn.execute("DELETE FROM history WHERE id = ?", (history_id,))
+        return entry
+
+    def remaining(self, team: str) -> int | None:
+        row = self._conn.execute("SELECT remaining FROM teams WHERE name = ?", (team,)).fetchone()
+        return row[0] if row else None
+
+    def set_remaining(self, team: str, value: int):
+        self._conn.execute("UPDATE teams SET remaining = ? WHERE name = ?", (int(value), team))
+
+    def is_available(self, player: str) -> bool:
+        row = self._conn.execute("SELECT available FROM players WHERE name = ?", (player,)).fetchone()
+        return bool(row and row[0])
+
+    def set_available(self, player: str, available: bool):
+        # la riga del venduto più quelle dello stesso giocatore nel listone attuale (Catalog.same_player)
+        names = {player} | {p.label for p in self._catalog.same_player(player)}
+        self._conn.executemany("UPDATE players SET available = ? WHERE name = ?", [(int(available), n) for n in names])
+
+    def role(self, player: str) -> str:
+        return _role(self._catalog, player)
+
+    def roster(self, team: str) -> dict:
+        return dict(self._conn.execute("SELECT role, count FROM roster WHERE team = ?", (team,)))
+
+    def roster_add(self, team: str, player: str, delta: int, price: int) -> dict:
+        if self.remaining(team) is None:
+            return {}
+        role, price = self.role(player), int(price)
+        self._conn.execute(
+            "INSERT INTO roster_prices (team, role, price, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (team, role, price) DO UPDATE SET count = count + ?",
+            (team, role, price, delta, delta),
+        )
+        self._conn.execute(
+            "DELETE FROM roster_prices WHERE team = ? AND role = ? AND price = ? AND count <= 0", (team, role, price)
+        )
+        # il massimo dalla chiave primaria di roster_prices: una ricerca nell'indice, non nello storico
+        self._conn.execute(
+            "INSERT INTO roster (team, role, count, spent, max_price) VALUES (?, ?, MAX(0, ?), MAX(0, ?), ?) "
+            "ON CONFLICT (team, role) DO UPDATE SET count = MAX(0, count + ?), spent = MAX(0, spent + ?), "
+            "max_price = COALESCE((SELECT MAX(price) FROM roster_prices WHERE team = ? AND role = ?), 0)",
+            (team, role, delta, price * delta, price if delta > 0 else 0, delta, price * delta, team, role),
+        )
+        return self.roster(team)
+
+    def proxies(self) -> dict:
+        return {team: (m, seq) for team, m, seq in self._conn.execute("SELECT team, max_price, seq FROM proxies")}
+
+    def set_proxy(self, team: str, max_price: int, seq: int):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO proxies (team, max_price, seq) VALUES (?, ?, ?)", (team, int(max_price), int(seq))
+        )
+
+    def clear_proxies(self):
+        self._conn.execute("DELETE FROM proxies")
+
+    def replace_catalog(self, catalog: Catalog, prepared=None) -> tuple:
+        # i venduti restano nella tabella (available = 0) anche se spariscono dal listone, e
+        # bloccano lo stesso giocatore con un'etichetta nuova (Catalog.same_player);
+        # niente da preparare: lo scrittore di SqliteStore gira già fuori dall'event loop
+        current = dict(self._conn.execute("SELECT name, available FROM players"))
+        sold = {p.rank for name, available in current.items() if not available for p in catalog.same_player(name)}
+        labels = {p.label: p for p in catalog.players}
+        added = [p.label for p in catalog.players if p.label not in current and p.rank not in sold]
+        new_sold = [p.label for p in catalog.players if p.label not in current and p.rank in sold]
+        removed = sorted(name for name, available in current.items()
+                         if available and (name not in labels or labels[name].rank in sold))
+        self._conn.executemany("INSERT INTO players (name, available) VALUES (?, 1)", [(p,) for p in added])
+        self._conn.executemany("INSERT INTO players (name, available) VALUES (?, 0)", [(p,) for p in new_sold])
+        self._conn.executemany("DELETE FROM players WHERE name = ?", [(p,) for p in removed if p not in labels])
+        self._conn.executemany("UPDATE players SET available = 0 WHERE name = ?", [(p,) for p in removed if p in labels])
+        self._catalog = catalog
+        return added, removed
+
+    def record_change(self, change: dict):
+        self.history_version += 1
+        self._conn.execute(
+            "INSERT OR REPLACE INTO changes (version, data) VALUES (?, ?)",
+            (self.history_version, json.dumps(change)),
+        )
+        self._conn.execute("DELETE FROM changes WHERE version <= ?", (self.history_version - CHANGELOG_SIZE,))
+
+    def record(self, event: dict):
+        # SQLite è già durevole: niente log eventi
+        pass
+
+
+def _row_to_state(row) -> dict:
+    active, player, leading_team, highest_bid, timer_end, awaiting, queue = row[:len(_STATE_COLUMNS)]
+    return {
+        "active": bool(active),
+        "player": player,
+        "leading_team": leading_team,
+        "highest_bid": highest_bid,
+        "timer_end": timer_end,
+        "awaiting_confirmation": bool(awaiting),
+        "queue": {**empty_queue(), **json.loads(queue or "{}")},
+    }
+
+
+def _role(catalog: Catalog, player: str) -> str:
+    # un venduto può sparire dal listone ricaricato (o cambiare squadra, quindi etichetta):
+    # il ruolo si legge dall'etichetta dello storico, così una cancellazione scala lo
+    # stesso contatore che la conferma aveva incrementato
+    p = catalog.get(player)
+    return p.role if p is not None else parse_player(player).role
+
+
+def _row_to_entry(row) -> dict:
+    return {"id": row[0], "player": row[1], "winner": row[2], "price": row[3], "ts": row[4]}
+
+
+class SqliteStore:
+    IN_MEMORY = False
+    epoch = ""  # le versioni stanno nel database, con i dati che descrivono
+    journal = None  # il commit è già su disco
+    WATCH_INTERVAL = 0.02  # secondi tra un controllo e l'altro delle modifiche degli altri worker
+
+    def __init__(self, path: str, budgets: dict, catalog: Catalog):
+        self.path = path
+        self._catalog = catalog
+        self._local = threading.local()
+        self._watch_thread = None
+
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        if "queue" not in {r[1] for r in conn.execute("PRAGMA table_info(auction)")}:
+            # database nato prima della coda delle chiamate
+            conn.execute("ALTER TABLE auction ADD COLUMN queue TEXT NOT NULL DEFAULT '{}'")
+        with self._write(conn):
+            idle = _idle_state()
+            conn.execute(
+                f"INSERT OR IGNORE INTO auction (id, {', '.join(_STATE_COLUMNS + _COUNTER_COLUMNS)}) "
+                "VALUES (1, ?, ?, ?, ?, ?, ?, ?, 0, 0, 1)",
+                (*(idle[c] for c in _STATE_COLUMNS[:-1]), json.dumps(idle["queue"])),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO teams (name, budget, remaining) VALUES (?, ?, ?)",
+                [(team, int(b), int(b)) for team, b in budgets.items()],
+            )
+            # listone dell'avvio (può essere cambiato dall'ultima volta): come un ricaricamento
+            known = conn.execute("SELECT 1 FROM players LIMIT 1").fetchone()
+            tx = _SqliteTx(conn, catalog)
+            added, removed = tx.replace_catalog(catalog)
+            if known and (added or removed):
+                tx.record_change({"players_added": added, "players_removed": removed})
+                tx._write_back()
+            if "spent" not in {r[1] for r in conn.execute("PRAGMA table_info(roster)")}:
+                # database nato prima della spesa per ruolo: contatori rifatti dallo storico qui sotto
+                conn.execute("ALTER TABLE roster ADD COLUMN spent INTEGER NOT NULL DEFAULT 0")
+                conn.execute("ALTER TABLE roster ADD COLUMN max_price INTEGER NOT NULL DEFAULT 0")
+                conn.execute("DELETE FROM roster")
+            if not conn.execute("SELECT 1 FROM roster LIMIT 1").fetchone():
+                # database nato prima dei contatori per ruolo: si ricavano dallo storico
+                conn.execute("DELETE FROM roster_prices")
+                for player, winner, price in conn.execute("SELECT player, winner, price FROM history").fetchall():
+                    tx.roster_add(winner, player, 1, price)
+
+    def _conn(self) -> sqlite3.Connection:
+        # una connessione per thread (sqlite3 non le condivide tra thread)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self, conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def transaction(self):
+        conn = self._conn()
+        lock = self._write(conn)
+        with _timed(lock) if metrics.ENABLED else lock:
+            tx = _SqliteTx(conn, self._catalog)
+            yield tx
+            tx._write_back()
+        self._catalog = tx._catalog  # (cambia solo con replace_catalog)
+
+    def watch(self, callback):
+        """Chiama callback(version, history_version) quando un commit (anche di altri
+        processi) cambia i contatori."""
+        if self._watch_thread is not None:
+            return
+
+        def loop():
+            last = None
+            while True:
+                try:
+                    row = self._conn().execute(
+                        "SELECT version, history_version FROM auction WHERE id = 1"
+                    ).fetchone()
+                    if row != last:
+                        last = row
+                        callback(row[0], row[1])
+                except Exception:
+                    traceback.print_exc()
+                time.sleep(self.WATCH_INTERVAL)
+
+        self._watch_thread = threading.Thread(target=loop, name="sqlite-watch", daemon=True)
+        self._watch_thread.start()
+
+    # --- letture (snapshot WAL, non bloccano gli scrittori) ---
+
+    def read_status(self) -> tuple:
+        row = self._conn().execute(
+            f"SELECT {', '.join(_STATE_COLUMNS)}, version FROM auction WHERE id = 1"
+        ).fetchone()
+        return row[-1], _row_to_state(row)
+
+    def history(self) -> list:
+        rows = self._conn().execute("SELECT id, player, winner, price, ts FROM history ORDER BY id DESC")
+        return [_row_to_entry(r) for r in rows]
+
+    def history_page(self, cursor: int | None, limit: int, team: str | None = None,
+                     player: str | None = None) -> tuple:
+        where, args = ["id < ?"], [cursor if cursor is not None else 2**62]
+        if team is not None:
+            where.append("winner = ?")
+            args.append(team)
+        if player is not None:
+            where.append("player = ?")
+            args.append(player)
+        rows = self._conn().execute(
+            f"SELECT id, player, winner, price, ts FROM history WHERE {' AND '.join(where)} "
+            "ORDER BY id DESC LIMIT ?",
+            (*args, limit),
+        ).fetchall()
+        out = [_row_to_entry(r) for r in rows]
+        return out, (out[-1]["id"] if len(out) == limit else None)
+
+    def history_after(self, after: int, limit: int) -> list:
+        rows = self._conn().execute(
+            "SELECT id, player, winner, price, ts FROM history WHERE id > ? ORDER BY id LIMIT ?", (after, limit)
+        )
+        return [_row_to_entry(r) for r in rows]
+
+    def budgets(self) -> dict:
+        return dict(self._conn().execute("SELECT name, budget FROM teams"))
+
+    def versions(self) -> tuple:
+        return self._conn().execute("SELECT version, history_version FROM auction WHERE id = 1").fetchone()
+
+    def changes_since(self, since: int) -> tuple:
+        conn = self._conn()
+        conn.execute("BEGIN")  # versione e modifiche dallo stesso snapshot
+        try:
+            current = conn.execute("SELECT history_version FROM auction WHERE id = 1").fetchone()[0]
+            rows = conn.execute(
+                "SELECT version, data FROM changes WHERE version > ? ORDER BY version", (since,)
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return current, _contiguous(current, since, ((v, json.loads(d)) for v, d in rows))
+
+    def remaining_all(self) -> dict:
+        return dict(self._conn().execute("SELECT name, remaining FROM teams"))
+
+    def prepare_catalog(self, catalog: Catalog):
+        # vedi _SqliteTx.replace_catalog
+        return None
+
+    def roster_all(self) -> dict:
+        out = {team: {} for team in self.budgets()}
+        for team, role, count in self._conn().execute("SELECT team, role, count FROM roster"):
+            out.setdefault(team, {})[role] = count
+        return out
+
+    def roster(self, team: str) -> dict:
+        return dict(self._conn().execute("SELECT role, count FROM roster WHERE team = ?", (team,)))
+
+    def spend(self, team: str) -> dict:
+        rows = self._conn().execute("SELECT role, spent, max_price FROM roster WHERE team = ? AND count > 0", (team,))
+        return {role: (spent, m) for role, spent, m in rows}
+
+    def spend_all(self) -> dict:
+        out = {team: {} for team in self.budgets()}
+        for team, role, spent, m in self._conn().execute(
+            "SELECT team, role, spent, max_price FROM roster WHERE count > 0"
+        ):
+            out.setdefault(team, {})[role] = (spent, m)
+        return out
+
+    def role(self, player: str) -> str:
+        return _role(self._catalog, player)
+
+    def sizes(self) -> tuple:
+        return self._conn().execute(
+            "SELECT (SELECT COUNT(*) FROM history), (SELECT COUNT(*) FROM players WHERE available = 1)"
+        ).fetchone()
+
+    def available_players(self, role: str | None = None, club: str | None = None) -> list:
+        # l'ordine viene dal listone già ordinato: basta saltare i venduti
+        sold = {r[0] for r in self._conn().execute("SELECT name FROM players WHERE available = 0")}
+        ranks = (p.rank for p in self._catalog.players if p.label not in sold)
+        return self._catalog.select(ranks, role, club)
+
+    def search_players(self, query: str, limit: int) -> list:
+        sold = {r[0] for r in self._conn().execute("SELECT name FROM players WHERE available = 0")}
+        found = self._catalog.words.search(query)
+        out = []
+        for r in found:
+            label = self._catalog.players[r].label
+            if label not in sold:
+                out.append(label)
+                if len(out) >= limit:
+                    break
+        return out
+
+    def is_available(self, player: str) -> bool:
+        row = self._conn().execute("SELECT available FROM players WHERE name = ?", (player,)).fetchone()
+        return bool(row and row[0])
+
+    def remaining(self, team: str) -> int | None:
+        row = self._conn().execute("SELECT remaining FROM teams WHERE name = ?", (team,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,53 @@
+# tests/test_assets.py
+# Codifica dei file statici (assets.Asset.pick) scelta da Accept-Encoding, q-values
+# compresi: q=0 vuol dire "non mandarla", a q diversi vince la preferita dal client.
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import assets  # noqa: E402
+
+BODY = b"function f() { return 1; }\n" * 100
+
+
+def make_asset() -> assets.Asset:
+    asset = assets.Asset("app.js", BODY)
+    # brotli potrebbe non esserci: una versione "br" più piccola di gzip per le prove
+    asset.bodies["br"] = asset.bodies["gzip"][: len(asset.bodies["gzip"]) // 2]
+    return asset
+
+
+def test_smallest_accepted_encoding():
+    asset = make_asset()
+    assert asset.pick("") == "identity"
+    assert asset.pick("gzip") == "gzip"
+    assert asset.pick("gzip, deflate, br") == "br"
+    assert asset.pick("GZIP ; Q=1") == "gzip"
+
+
+def test_q_zero_is_never_sent():
+    asset = make_asset()
+    assert asset.pick("gzip, br;q=0") == "gzip"
+    assert asset.pick("br;q=0.0, gzip;q=0") == "identity"
+    assert asset.pick("*;q=0, gzip") == "gzip"
+    assert asset.pick("*") == "br"
+    assert asset.pick("*, br;q=0") == "gzip"
+    # niente di accettabile: il file com'è
+    assert asset.pick("identity;q=0") == "identity"
+
+
+def test_higher_q_wins_over_size():
+    asset = make_asset()
+    assert asset.pick("gzip;q=1, br;q=0.5") == "gzip"
+    assert asset.pick("gzip;q=0.5, br;q=0.5") == "br"
+    assert asset.pick("identity, gzip;q=0.9") == "identity"
+
+
+def test_invalid_q_drops_only_that_entry():
+    asset = make_asset()
+    assert asset.pick("br;q=abc, gzip") == "gzip"
+    assert asset.pick("br;q=2, gzip;q=0.3") == "gzip"
@@ -0,0 +1,95 @@
+# tests/test_autobid.py
+# Offerte automatiche (Room.set_autobid, _resolve_proxies in auction.py): vince il massimo
+# più alto, a parità chi l'ha registrato prima, e paga il secondo massimo più
+# AUTOBID_INCREMENT; il massimo registrato non supera crediti e offerta massima di rosa.
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYER = "Ali - INT (POR)"
+
+
+def open_auction(budgets=None, limits=None) -> auction.Room:
+    budgets = budgets or {"A": 100, "B": 100, "C": 100}
+    catalog = Catalog([PLAYER, "Bea - MIL (DIF)"])
+    room = auction.Room("r", "A", MemoryStore(budgets, catalog), limits, clock=VirtualClock())
+    assert room.nominate(PLAYER, "A")["ok"]
+    return room
+
+
+def leader(room: auction.Room) -> tuple:
+    st = room.get_status()
+    return st["leading_team"], st["highest_bid"]
+
+
+def test_highest_max_pays_second_max_plus_increment():
+    room = open_auction()
+    assert room.set_autobid("B", 20)["ok"]
+    assert leader(room) == ("B", 1 + auction.AUTOBID_INCREMENT)
+    assert room.set_autobid("C", 12) == {"ok": True, "max": 12, "price": 12 + auction.AUTOBID_INCREMENT,
+                                         "leading_team": "B"}
+    assert leader(room) == ("B", 12 + auction.AUTOBID_INCREMENT)
+
+
+def test_winner_never_pays_more_than_its_max():
+    room = open_auction()
+    room.set_autobid("B", 20)
+    room.set_autobid("C", 20 - auction.AUTOBID_INCREMENT + 1)
+    # secondo massimo + incremento supera il massimo del primo: paga il suo massimo
+    assert leader(room) == ("B", 20)
+
+
+def test_tie_goes_to_the_first_registered_max():
+    room = open_auction()
+    room.set_autobid("B", 15)
+    room.set_autobid("C", 15)
+    assert leader(room) == ("B", 15)
+    # un rilancio a mano allo stesso massimo non scavalca chi l'aveva prima
+    room = open_auction()
+    room.set_autobid("C", 15)
+    result = room.place_bid("B", 15 - leader(room)[1])
+    assert result["ok"] and result["outbid"] and result["leading_team"] == "C"
+    assert leader(room) == ("C", 15)
+
+
+def test_manual_bid_above_every_max_leads():
+    room = open_auction()
+    room.set_autobid("B", 20)
+    assert room.place_bid("C", 25 - 2)["ok"]
+    assert leader(room) == ("C", 25)
+    result = room.place_bid("A", 2)
+    assert result == {"ok": True, "price": 27}
+
+
+def test_max_is_capped_by_budget():
+    room = open_auction({"A": 100, "B": 10, "C": 100})
+    assert room.set_autobid("B", 50)["max"] == 10
+    room.set_autobid("C", 30)
+    assert leader(room) == ("C", 11)
+
+
+def test_max_is_capped_by_max_bid():
+    # 100 crediti, 3 posti vuoti: per il portiere al massimo 100 - 2
+    limits = {"POR": 1, "DIF": 2}
+    room = open_auction(limits=limits)
+    result = room.set_autobid("B", 500)
+    assert result["max"] == auction.max_bid(limits, 100, {}, "POR") == 98
+    room.set_autobid("C", 500)
+    assert leader(room) == ("B", 98)
+
+
+def test_max_below_the_price_is_refused():
+    room = open_auction()
+    room.set_autobid("B", 20)
+    result = room.set_autobid("C", 2)
+    assert result["ok"] is False and result["reason"] == "max_too_low"
+    assert leader(room) == ("B", 2)
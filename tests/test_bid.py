@@ -0,0 +1,69 @@
+# tests/test_bid.py
+# Rilancio atomico (Room.place_bid): prezzo atteso e crediti si controllano nella stessa
+# transazione che aggiorna il prezzo, quindi un rilancio rifiutato non cambia niente e
+# tra rilanci concorrenti sullo stesso prezzo ne passa uno solo.
+#
+#   python -m pytest -q
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYER = "Ali - INT (POR)"
+
+
+def open_auction(budgets: dict) -> auction.Room:
+    room = auction.Room("r", "A", MemoryStore(budgets, Catalog([PLAYER])), clock=VirtualClock())
+    assert room.nominate(PLAYER, "A")["ok"]
+    return room
+
+
+def test_stale_price_is_refused_without_changes():
+    room = open_auction({"A": 100, "B": 100, "C": 100})
+    assert room.place_bid("B", 1, expected_price=1) == {"ok": True, "price": 2}
+    before = room.get_status()
+
+    assert room.place_bid("C", 1, expected_price=1) == {"ok": False, "reason": "stale_price", "current": 2}
+    assert room.get_status() == before
+    assert room.place_bid("C", 1, expected_price=2) == {"ok": True, "price": 3}
+
+
+def test_insufficient_budget_is_refused_without_changes():
+    room = open_auction({"A": 100, "B": 3})
+    assert room.place_bid("B", 2)["ok"]
+    before = room.get_status()
+
+    result = room.place_bid("B", 1)
+    assert result == {"ok": False, "reason": "insufficient_budget", "needed": 4, "remaining": 3}
+    assert room.get_status() == before
+    assert room.place_bid("A", 1)["ok"]
+
+
+def test_concurrent_bids_on_the_same_price_only_one_passes():
+    teams = {f"T{i}": 100 for i in range(16)}
+    room = open_auction({"A": 100, **teams})
+    start = threading.Barrier(len(teams))
+    results = {}
+
+    def bid(team):
+        start.wait()
+        results[team] = room.place_bid(team, 1, expected_price=1)
+
+    threads = [threading.Thread(target=bid, args=(t,)) for t in teams]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    winners = [t for t, r in results.items() if r["ok"]]
+    assert len(winners) == 1
+    assert all(r["reason"] == "stale_price" for t, r in results.items() if t not in winners)
+    st = room.get_status()
+    assert (st["leading_team"], st["highest_bid"]) == (winners[0], 2)
@@ -0,0 +1,148 @@
+# tests/test_catalog_reload.py
+# Listone ricaricato dopo una vendita: il venduto resta venduto anche se nel nuovo listone
+# ha un'altra etichetta, e se la vendita si cancella dallo storico posto in rosa e
+# giocatore tornano liberi.
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore, SqliteStore  # noqa: E402
+
+LIMITS = {"POR": 1, "DIF": 1, "CEN": 1, "ATT": 1}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(budgets, catalog):
+        if request.param == "sqlite":
+            return SqliteStore(str(tmp_path / "asta.db"), budgets, catalog)
+        return MemoryStore(budgets, catalog)
+    return make
+
+
+def sell(room: auction.Room, clock: VirtualClock, player: str):
+    assert room.start_auction(player, "A")
+    clock.advance(60)
+    clock.run_timers()
+    return room.confirm("A")
+
+
+def test_delete_after_reload_frees_the_slot(make_store):
+    clock = VirtualClock()
+    store = make_store({"A": 100}, Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)"]))
+    room = auction.Room("r", "A", store, LIMITS, clock=clock)
+    entry = sell(room, clock, "Bea - MIL (DIF)")
+    assert room.max_bid_for("A", "Cid - JUV (DIF)") is None
+
+    # Bea cambia squadra nel nuovo listone: l'etichetta venduta non c'è più
+    room.replace_catalog(Catalog(["Bea - INT (DIF)", "Cid - JUV (DIF)"]))
+    room.delete_history(entry["id"])
+
+    assert room.get_roster_all()["A"].get("DIF", 0) == 0
+    assert room.max_bid_for("A", "Cid - JUV (DIF)") == 97
+    assert room.start_auction("Cid - JUV (DIF)", "A")
+
+
+def test_summary_agrees_with_bid_limits_after_reload(make_store):
+    clock = VirtualClock()
+    store = make_store({"A": 100}, Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)"]))
+    room = auction.Room("r", "A", store, LIMITS, clock=clock)
+    entry = sell(room, clock, "Bea - MIL (DIF)")
+    room.replace_catalog(Catalog(["Bea - INT (DIF)", "Cid - JUV (DIF)"]))
+
+    dif = room.get_team_summary("A")["roles"]["DIF"]
+    assert (dif["players"], dif["slots_left"], dif["max_bid"]) == (1, 0, 0)
+    assert room.max_bid_for("A", "Cid - JUV (DIF)") is None
+
+    room.delete_history(entry["id"])
+    dif = room.get_team_summary("A")["roles"]["DIF"]
+    assert (dif["players"], dif["slots_left"], dif["max_bid"]) == (0, 1, room.max_bid_for("A", "Cid - JUV (DIF)"))
+
+
+def test_prepared_catalog_is_redone_after_a_sale(make_store):
+    # il listone si prepara fuori dal lock: una vendita nel frattempo non deve tornare svincolata
+    clock = VirtualClock()
+    store = make_store({"A": 100}, Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)"]))
+    room = auction.Room("r", "A", store, LIMITS, clock=clock)
+    catalog = Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)", "Dan - ROM (CEN)"])
+    prepared = room.prepare_catalog(catalog)
+    sell(room, clock, "Bea - MIL (DIF)")
+
+    added, removed = room.replace_catalog(catalog, prepared)
+    assert (added, removed) == (["Dan - ROM (CEN)"], [])
+    assert not room.is_available("Bea - MIL (DIF)")
+    assert room.get_available_players() == ["Cid - JUV (DIF)", "Dan - ROM (CEN)"]
+
+
+def test_sold_player_stays_sold_under_a_new_label(make_store):
+    # Bea venduta con il MIL, nel nuovo listone è all'INT: è sempre lei, non torna svincolata
+    clock = VirtualClock()
+    store = make_store({"A": 100, "B": 100}, Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)"]))
+    room = auction.Room("r", "A", store, clock=clock)
+    entry = sell(room, clock, "Bea - MIL (DIF)")
+
+    added, removed = room.replace_catalog(Catalog(["Bea - INT (DIF)", "Cid - JUV (DIF)"]))
+    assert (added, removed) == ([], [])
+    assert not room.is_available("Bea - INT (DIF)")
+    assert room.get_available_players() == ["Cid - JUV (DIF)"]
+    assert room.search_players("bea") == []
+    assert room.nominate("Bea - INT (DIF)", "B")["reason"] == "player_not_available"
+
+    # cancellata la vendita torna svincolata con l'etichetta del listone attuale
+    room.delete_history(entry["id"])
+    assert room.is_available("Bea - INT (DIF)")
+    assert room.get_available_players() == ["Bea - INT (DIF)", "Cid - JUV (DIF)"]
+
+
+def test_sold_player_stays_sold_after_restart_with_a_new_listone(make_store, tmp_path):
+    clock = VirtualClock()
+    store = make_store({"A": 100}, Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)"]))
+    sell(auction.Room("r", "A", store, clock=clock), clock, "Bea - MIL (DIF)")
+
+    catalog = Catalog(["Bea - INT (DIF)", "Cid - JUV (DIF)"])
+    if isinstance(store, SqliteStore):
+        store = SqliteStore(store.path, {"A": 100}, catalog)
+    else:
+        snap = store.snapshot()
+        store = MemoryStore({"A": 100}, catalog)
+        with store.transaction() as tx:
+            tx.load_snapshot(snap)
+    room = auction.Room("r", "A", store, clock=clock)
+    assert not room.is_available("Bea - INT (DIF)")
+    assert room.get_available_players() == ["Cid - JUV (DIF)"]
+
+
+
+def test_spend_by_role_follows_confirm_and_delete(make_store):
+    # spesa e massimo per ruolo tenuti dallo store accanto ai contatori di rosa
+    store = make_store({"A": 100, "B": 100}, Catalog(["Bea - MIL (DIF)", "Cid - JUV (DIF)", "Dan - ROM (CEN)"]))
+    room = auction.Room("r", "A", store, clock=VirtualClock())
+    sales = [("Bea - MIL (DIF)", "A", 9), ("Cid - JUV (DIF)", "A", 4), ("Dan - ROM (CEN)", "B", 6)]
+    with store.transaction() as tx:
+        for i, (player, winner, price) in enumerate(sales, 1):
+            entry = {"id": i, "player": player, "winner": winner, "price": price, "ts": 0}
+            auction._apply(tx, {"type": "confirm", "entry": entry}, 0.0)
+
+    def roles(team):
+        return {r: (v["players"], v["spent"], v["max_price"]) for r, v in room.get_team_summary(team)["roles"].items()
+                if v["players"]}
+
+    assert roles("A") == {"DIF": (2, 13, 9)} and roles("B") == {"CEN": (1, 6, 6)}
+    # via la vendita più cara: il massimo del ruolo torna quello dell'altra
+    room.delete_history(1)
+    assert roles("A") == {"DIF": (1, 4, 4)}
+    assert room.get_team_summary("A")["roles"]["DIF"]["avg_price"] == 4
+
+    league = room.get_league_summary()
+    assert (league["players"], league["spent"], league["max_price"]) == (2, 10, 6)
+    assert [t["spent"] for t in league["teams"]] == [4, 6]
+    assert all("roster" not in t for t in league["teams"])
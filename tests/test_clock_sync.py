@@ -0,0 +1,74 @@
+# tests/test_clock_sync.py
+# Scadenza decisa dal server (auction.py, _status_payload) e sincronizzazione del client
+# (static/app.js): con le risposte vere di /time e /status, lo stesso calcolo del client
+# (scarto dal ping con il ritorno più corto, deadline - scarto) deve dare il tempo che
+# manca davvero, anche con l'orologio del client spostato di parecchio.
+#
+#   python -m pytest -q
+
+import os
+import sys
+import time
+import warnings
+
+os.environ.setdefault("FANTA_DATA_DIR", "")  # niente log eventi nella cartella vera
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+ROOM = "clock-sync"
+TEAMS = {"A": 100, "B": 100}
+SAMPLES = 5  # come CLOCK_SAMPLES in app.js
+SKEW = 12_345.678  # orologio del client avanti di così rispetto a quello del server
+
+
+def client_clock() -> float:
+    return time.monotonic() + SKEW
+
+
+def sync_offset(c: TestClient, url: str) -> float:
+    # come syncClock() in app.js: scarto del ping con il ritorno più corto
+    best = None
+    for _ in range(SAMPLES):
+        t0 = client_clock()
+        res = c.get(f"{url}/time")
+        t1 = client_clock()
+        assert res.status_code == 200 and res.headers["cache-control"] == "no-store"
+        if best is None or t1 - t0 < best[0]:
+            best = (t1 - t0, res.json()["now"] - (t0 + t1) / 2)
+    return best[1]
+
+
+def test_deadline_converts_to_the_client_clock():
+    if main.auction.get_room(ROOM) is None:
+        main.open_room(ROOM, "A", TEAMS, {})
+    url = f"/rooms/{ROOM}"
+    player = main.CATALOG.players[0].label
+    c = TestClient(main.app)
+    offset = sync_offset(c, url)
+    assert abs(offset + SKEW) < 0.5
+
+    assert c.post(f"{url}/start", json={"player": player, "team": "A"}).json()["ok"]
+    status = c.get(f"{url}/status").json()
+    assert status["active"] and status["deadline"] is not None
+    left = (status["deadline"] - offset) - client_clock()
+    assert main.auction.TIMER_SECONDS - 1 < left <= main.auction.TIMER_SECONDS
+    assert status["time_left"] in (main.auction.TIMER_SECONDS - 1, main.auction.TIMER_SECONDS)
+
+    # un rilancio sposta la scadenza: di nuovo il timer pieno da adesso, nell'orologio del client
+    time.sleep(0.3)
+    assert c.post(f"{url}/bid", json={"team": "B", "inc": 1}).json()["ok"]
+    moved = c.get(f"{url}/status").json()
+    assert moved["deadline"] >= status["deadline"] + 0.3
+    left = (moved["deadline"] - offset) - client_clock()
+    assert main.auction.TIMER_SECONDS - 1 < left <= main.auction.TIMER_SECONDS
+
+    # la scadenza è assoluta: la stessa risposta (anche dalla cache, a versione ferma) vale dopo
+    time.sleep(0.3)
+    again = c.get(f"{url}/status").json()
+    assert again["deadline"] == moved["deadline"]
+    assert (again["deadline"] - offset) - client_clock() < left
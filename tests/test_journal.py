@@ -0,0 +1,157 @@
+# tests/test_journal.py
+# Ripristino dal log eventi (journal.py): dopo un riavvio lo stato è quello di prima e le
+# versioni ripartono da dopo quelle già date ai client.
+#
+#   python -m pytest -q
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+import journal  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYERS = ["Ali - INT (POR)", "Bea - MIL (DIF)", "Cid - JUV (DIF)", "Dan - ROM (CEN)"]
+BUDGETS = {"A": 100, "B": 100}
+
+
+def open_room(directory, snapshot_every: int | None = None, players=PLAYERS) -> auction.Room:
+    room = auction.Room("r", "A", MemoryStore(BUDGETS, Catalog(players)), clock=VirtualClock())
+    room.restore(journal.Journal(str(directory), snapshot_every))
+    return room
+
+
+def close_room(room: auction.Room):
+    room.store._journal.close()
+
+
+def sell(room: auction.Room, player: str, winner: str, price: int) -> dict:
+    assert room.start_auction(player, "A")
+    if winner != "A" or price > 1:
+        assert room.place_bid(winner, price - 1)["ok"]
+    room.clock.advance(60)
+    room.clock.run_timers()
+    return room.confirm("A")
+
+
+def test_versions_continue_after_restart(tmp_path):
+    room = open_room(tmp_path, snapshot_every=3)
+    sell(room, "Ali - INT (POR)", "B", 5)
+    entry = sell(room, "Bea - MIL (DIF)", "A", 3)
+    room.delete_history(entry["id"])
+    room.replace_catalog(Catalog(PLAYERS + ["Eva - NAP (ATT)"]))
+    before = room.get_versions()
+    epoch = room.epoch
+    close_room(room)
+
+    room = open_room(tmp_path, players=PLAYERS + ["Eva - NAP (ATT)"])
+    version, history_version = room.get_versions()
+    assert version > before[0] and history_version > before[1]
+    assert room.epoch != epoch
+    # nessuna modifica nel registro tra le versioni di prima e quella nuova: risposta completa
+    assert room.get_history_delta(before[1]) is None
+    close_room(room)
+
+
+def test_versions_never_repeat_across_restarts_without_snapshot(tmp_path):
+    # anche il riavvio è nel log: senza snapshot in mezzo le versioni date dopo un
+    # riavvio non tornano al riavvio successivo
+    room = open_room(tmp_path)
+    sell(room, "Ali - INT (POR)", "B", 5)
+    seen = [room.get_versions()]
+    for _ in range(3):
+        close_room(room)
+        room = open_room(tmp_path)
+        seen.append(room.get_versions())
+    assert all(a[0] < b[0] and a[1] < b[1] for a, b in zip(seen, seen[1:]))
+    close_room(room)
+
+
+def test_read_leaves_the_directory_alone(tmp_path):
+    room = open_room(tmp_path, snapshot_every=4)
+    sell(room, "Ali - INT (POR)", "B", 5)
+    sell(room, "Bea - MIL (DIF)", "A", 3)
+    close_room(room)
+    before = sorted(os.listdir(tmp_path))
+
+    snap, tail = journal.read(str(tmp_path))
+    assert snap is not None and tail
+    assert sorted(os.listdir(tmp_path)) == before
+    assert journal.read(str(tmp_path / "manca")) == (None, [])
+    assert not (tmp_path / "manca").exists()
+
+
+def test_wait_returns_once_the_event_is_on_disk(tmp_path, monkeypatch):
+    release = threading.Event()
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        release.wait(5)
+        fsync(fd)
+
+    room = open_room(tmp_path)
+    monkeypatch.setattr(journal.os, "fsync", slow_fsync)
+    entry = sell(room, "Ali - INT (POR)", "B", 5)
+    j = room.store.journal
+    seq = j.seq
+    assert not j.wait(seq, 0.05)
+    assert not asyncio.run(room.wait_durable(0.05))
+
+    release.set()
+    assert asyncio.run(room.wait_durable())
+    assert j.wait(seq, 0)
+    monkeypatch.setattr(journal.os, "fsync", fsync)
+    close_room(room)
+    _, tail = journal.read(str(tmp_path))
+    assert [e["entry"] for e in tail if e["type"] == "confirm"] == [entry]
+
+
+def capture(room: auction.Room) -> dict:
+    _, state = room.store.read_status()
+    return {
+        "history": room.get_history(),
+        "remaining": room.get_remaining_all(),
+        "roster": {t: {r: n for r, n in counts.items() if n} for t, counts in room.get_roster_all().items()},
+        "available": room.get_available_players(),
+        "state": {k: v for k, v in state.items() if k != "timer_end"},  # il timer riparte pieno
+        "proxies": dict(room.store._proxies),
+        "summary": room.get_league_summary(),
+        "versions": room.get_versions(),
+    }
+
+
+@pytest.mark.parametrize("snapshot_every", [1000, 2, 5])
+def test_restore_round_trip(tmp_path, snapshot_every):
+    # 1000: solo eventi; 2 e 5: snapshot a punti diversi, con eventi dopo l'ultimo
+    room = open_room(tmp_path, snapshot_every)
+    sell(room, "Ali - INT (POR)", "B", 5)
+    entry = sell(room, "Bea - MIL (DIF)", "A", 3)
+    sell(room, "Cid - JUV (DIF)", "B", 7)
+    room.delete_history(entry["id"])
+    # asta ancora aperta, con offerte automatiche in gioco
+    assert room.start_auction("Dan - ROM (CEN)", "A")
+    assert room.set_autobid("A", 9)["ok"]
+    assert room.set_autobid("B", 6)["ok"]
+    before = capture(room)
+    assert before["proxies"] and before["state"]["active"]
+    close_room(room)
+
+    room = open_room(tmp_path)
+    after = capture(room)
+    # versioni nuove, subito dopo quelle date prima del riavvio
+    assert after.pop("versions") == (before["versions"][0] + 1, before["versions"][1] + 1)
+    before.pop("versions")
+    assert after == before
+
+    # e l'asta riprende da dove era: chi rilancia trova le stesse offerte automatiche
+    result = room.place_bid("B", 1)
+    assert result["ok"] and result["leading_team"] == "A" and result["current"] == 9
+    close_room(room)
@@ -0,0 +1,48 @@
+# tests/test_nomination.py
+# Chiamate di un'asta: chi chiama offre 1 credito, sia da /start sia dalla coda.
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYERS = ["Ali - INT (POR)", "Bea - MIL (DIF)"]
+
+
+def make_room(budgets: dict, limits: dict | None = None) -> auction.Room:
+    return auction.Room("r", "A", MemoryStore(budgets, Catalog(PLAYERS)), limits or {}, clock=VirtualClock())
+
+
+def test_queue_skips_team_without_credits():
+    room = make_room({"A": 100, "Z": 0})
+    room.set_team_queue("Z", ["Bea - MIL (DIF)"])
+    assert not room.get_status()["active"]
+    assert room.nominate("Bea - MIL (DIF)", "Z") == {
+        "ok": False, "reason": "insufficient_budget", "needed": 1, "remaining": 0
+    }
+
+
+def test_nominate_reasons():
+    room = make_room({"A": 100}, {"POR": 0, "DIF": 1})
+    assert room.nominate("Nessuno - XXX (ATT)", "A")["reason"] == "player_not_available"
+    assert room.nominate("Bea - MIL (DIF)", "B")["reason"] == "unknown_team"
+    assert room.nominate("Ali - INT (POR)", "A") == {"ok": False, "reason": "role_full", "role": "POR"}
+    assert room.nominate("Bea - MIL (DIF)", "A") == {"ok": True}
+
+
+def test_queue_is_private_to_its_team():
+    room = make_room({"A": 100, "B": 100, "C": 100})
+    room.set_nomination_order("A", paused=True)
+    assert room.set_team_queue("B", ["Bea - MIL (DIF)"])["queue"] == ["Bea - MIL (DIF)"]
+    assert room.get_queue("B")["mine"] == ["Bea - MIL (DIF)"]
+    assert room.get_queue("C")["mine"] == []
+    assert room.get_queue("") == room.get_queue("Z") == {"ok": False, "reason": "unknown_team"}
+    # nello stato pubblico solo quanti giocatori ha in coda ogni squadra
+    assert room.get_status()["queue"]["teams"] == {"B": 1}
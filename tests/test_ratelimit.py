@@ -0,0 +1,72 @@
+# tests/test_ratelimit.py
+# Limiti sulle rotte di scrittura (throttle in main.py): chi copia il nome di una squadra da
+# un altro indirizzo non ne consuma i gettoni, e una lega intera dietro allo stesso
+# indirizzo ha abbastanza gettoni per client.
+#
+#   python -m pytest -q
+
+import os
+import sys
+import warnings
+
+os.environ.setdefault("FANTA_DATA_DIR", "")  # niente log eventi nella cartella vera
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+ROOM = main.auction.DEFAULT_ROOM
+
+
+def client(host: str) -> TestClient:
+    return TestClient(main.app, client=(host, 50000))
+
+
+def fresh_limits(**cfg):
+    # limiti nuovi (e con il tempo fermo) per la stanza di default, senza riaprirla
+    saved = main.LIMITERS.get(ROOM)
+    room = main.auction.get_room(ROOM)
+    main.LIMITERS[ROOM] = main.make_limiters(room.budgets, cfg, clock=lambda: 0.0)
+    return saved
+
+
+def bid(c: TestClient, team: str) -> int:
+    return c.post("/bid", json={"team": team, "inc": 1}).status_code
+
+
+def test_spoofed_team_does_not_drain_the_real_team():
+    saved = fresh_limits(rate=1, burst=2)
+    try:
+        team = main.ADMIN_TEAM
+        attacker, owner = client("10.0.0.9"), client("10.0.0.2")
+        assert [bid(attacker, team) for _ in range(3)] == [200, 200, 429]
+        assert [bid(owner, team) for _ in range(2)] == [200, 200]
+    finally:
+        main.LIMITERS[ROOM] = saved
+
+
+def test_whole_league_behind_one_address_is_not_throttled():
+    saved = fresh_limits(rate=1, burst=2)
+    try:
+        c = client("192.168.1.1")
+        for team in main.TEAM_BUDGETS:
+            assert [bid(c, team) for _ in range(2)] == [200, 200], team
+        # gettoni del client finiti insieme a quelli delle squadre
+        assert bid(c, main.ADMIN_TEAM) == 429
+    finally:
+        main.LIMITERS[ROOM] = saved
+
+
+def test_client_limit_is_checked_before_the_team():
+    saved = fresh_limits(rate=1, burst=5, client_rate=1, client_burst=2)
+    try:
+        c = client("10.0.0.7")
+        assert [bid(c, main.ADMIN_TEAM) for _ in range(3)] == [200, 200, 429]
+        # la richiesta rifiutata dal client non ha consumato il gettone della squadra
+        team_bucket = main.LIMITERS[ROOM][0]._buckets[(main.ADMIN_TEAM, "10.0.0.7")]
+        assert team_bucket.tokens == 3.0
+    finally:
+        main.LIMITERS[ROOM] = saved
@@ -0,0 +1,68 @@
+# tests/test_roster_limits.py
+# Vincoli di rosa (max_bid in auction.py): con un ruolo pieno la squadra non può chiamare,
+# rilanciare né registrare un'offerta automatica per quel ruolo, e per gli altri può
+# offrire i crediti meno 1 per ogni altro posto ancora vuoto.
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+LIMITS = {"POR": 1, "DIF": 2, "CEN": 2}
+PLAYERS = ["Ali - INT (POR)", "Ugo - LAZ (POR)", "Bea - MIL (DIF)", "Cid - JUV (DIF)", "Dan - ROM (CEN)"]
+
+
+def test_max_bid_counts_the_other_empty_slots():
+    assert auction.max_bid(LIMITS, 50, {}, "DIF") == 50 - 4
+    assert auction.max_bid(LIMITS, 50, {"POR": 1, "DIF": 1}, "CEN") == 50 - 2
+    assert auction.max_bid(LIMITS, 50, {"POR": 1, "DIF": 2, "CEN": 1}, "CEN") == 50
+    # un ruolo fuori dai vincoli non occupa posti: restano tutti quelli vuoti
+    assert auction.max_bid(LIMITS, 50, {}, "ATT") == 50 - 5
+    assert auction.max_bid(LIMITS, 3, {}, "POR") == 0
+    assert auction.max_bid({}, 50, {"POR": 9}, "POR") == 50
+
+
+def test_max_bid_is_none_for_a_full_role():
+    assert auction.max_bid(LIMITS, 50, {"POR": 1}, "POR") is None
+    assert auction.max_bid(LIMITS, 50, {"DIF": 3}, "DIF") is None
+    assert auction.max_bid(LIMITS, 50, {"POR": 1, "DIF": 2, "CEN": 2}, "CEN") is None
+
+
+def sell(room: auction.Room, clock: VirtualClock, player: str, team: str):
+    assert room.nominate(player, team)["ok"]
+    clock.advance(60)
+    clock.run_timers()
+    assert room.confirm("A")["winner"] == team
+
+
+def test_full_role_blocks_nominate_bid_and_autobid():
+    clock = VirtualClock()
+    room = auction.Room("r", "A", MemoryStore({"A": 50, "B": 50}, Catalog(PLAYERS)), LIMITS, clock=clock)
+    sell(room, clock, "Ali - INT (POR)", "B")
+
+    assert room.max_bid_for("B", "Ugo - LAZ (POR)") is None
+    assert room.max_bids(room.get_remaining_all(), room.get_roster_all())["B"] == {"POR": 0, "DIF": 46, "CEN": 46}
+    assert room.nominate("Ugo - LAZ (POR)", "B") == {"ok": False, "reason": "role_full", "role": "POR"}
+
+    assert room.nominate("Ugo - LAZ (POR)", "A")["ok"]
+    assert room.place_bid("B", 1) == {"ok": False, "reason": "role_full", "role": "POR"}
+    assert room.set_autobid("B", 10) == {"ok": False, "reason": "role_full", "role": "POR"}
+    st = room.get_status()
+    assert (st["leading_team"], st["highest_bid"]) == ("A", 1)
+
+
+def test_bid_over_max_bid_is_refused():
+    clock = VirtualClock()
+    room = auction.Room("r", "A", MemoryStore({"A": 50, "B": 10}, Catalog(PLAYERS)), LIMITS, clock=clock)
+    assert room.nominate("Bea - MIL (DIF)", "A")["ok"]
+    # 10 crediti, 4 altri posti vuoti: al massimo 6
+    assert room.place_bid("B", 5) == {"ok": True, "price": 6}
+    assert room.place_bid("A", 1)["ok"]
+    assert room.place_bid("B", 1) == {"ok": False, "reason": "max_bid_exceeded", "needed": 8, "max_bid": 6}
@@ -0,0 +1,68 @@
+# tests/test_search.py
+# Ricerca per prefisso (catalog.WordIndex): prima chi ha la prima parola del nome che
+# combacia, poi le altre parole del nome, poi la squadra, ognuno in ordine di listone;
+# con `limit` i risultati sono i primi `limit` di quell'ordine anche se un giocatore ha
+# più parole con lo stesso prefisso.
+#
+#   python -m pytest -q
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from catalog import Catalog  # noqa: E402
+
+LABELS = [
+    "Candè - VEN (DIF)",
+    "De Rossi De Santis - ROM (DIF)",
+    "Bastoni - INT (DIF)",
+    "Dimarco - INT (DIF)",
+    "Rossi - DEN (CEN)",
+    "Leão Rafael - MIL (ATT)",
+    "Lautaro Martinez - INT (ATT)",
+]
+
+
+def search(catalog: Catalog, query: str, limit=None) -> list:
+    return [catalog.players[r].label for r in catalog.words.search(query, limit)]
+
+
+def test_first_name_word_first_then_other_words_then_club():
+    c = Catalog(LABELS)
+    assert search(c, "d") == [
+        "De Rossi De Santis - ROM (DIF)", "Dimarco - INT (DIF)",  # prima parola del nome
+        "Rossi - DEN (CEN)",  # solo la squadra
+    ]
+    assert search(c, "ro") == ["Rossi - DEN (CEN)", "De Rossi De Santis - ROM (DIF)"]
+    assert search(c, "cande") == search(c, "Candè") == ["Candè - VEN (DIF)"]
+    assert search(c, "") == search(c, "zzz") == []
+
+
+def test_limit_keeps_the_order_and_counts_players_once():
+    c = Catalog(LABELS)
+    full = search(c, "d")
+    for limit in range(1, len(full) + 2):
+        assert search(c, "d", limit) == full[:limit]
+    # "de" due volte nel nome: un giocatore solo
+    assert search(c, "de", 2) == ["De Rossi De Santis - ROM (DIF)", "Rossi - DEN (CEN)"]
+
+
+def test_every_query_word_must_match():
+    c = Catalog(LABELS)
+    assert search(c, "int d") == ["Dimarco - INT (DIF)"]
+    assert search(c, "int ma", 1) == ["Lautaro Martinez - INT (ATT)"]
+    assert search(c, "rossi san") == ["De Rossi De Santis - ROM (DIF)"]
+    assert search(c, "rossi mil") == []
+
+
+def test_discard_and_add():
+    c = Catalog(LABELS)
+    index = c.words.copy()
+    dimarco = c.get("Dimarco - INT (DIF)")
+    index.discard(dimarco)
+    assert [c.players[r].label for r in index.search("d")] == [
+        "De Rossi De Santis - ROM (DIF)", "Rossi - DEN (CEN)"]
+    assert search(c, "d", 2) == ["De Rossi De Santis - ROM (DIF)", "Dimarco - INT (DIF)"]  # l'originale non cambia
+    index.add(dimarco)
+    assert index.search("d") == c.words.search("d")
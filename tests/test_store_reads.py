@@ -0,0 +1,69 @@
+# tests/test_store_reads.py
+# Le letture di MemoryStore non prendono il lock dello scrittore: rispondono anche mentre
+# una transazione è aperta, con lo stato dell'ultima transazione chiusa.
+#
+#   python -m pytest -q
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import auction  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYERS = ["Ali - INT (POR)", "Bea - MIL (DIF)", "Cid - JUV (DIF)"]
+
+
+def read_all(room: auction.Room) -> dict:
+    return {
+        "status": room.store.read_status()[1]["player"],
+        "versions": room.get_versions(),
+        "available": room.get_available_players(),
+        "search": room.search_players("bea"),
+        "remaining": room.get_remaining_all(),
+        "roster": room.get_roster_all(),
+        "delta": room.get_players_delta(0),
+        "is_available": room.is_available("Bea - MIL (DIF)"),
+    }
+
+
+def test_reads_do_not_wait_for_an_open_transaction():
+    clock = VirtualClock()
+    room = auction.Room("r", "A", MemoryStore({"A": 100}, Catalog(PLAYERS)), clock=clock)
+    room.start_auction("Bea - MIL (DIF)", "A")
+    clock.advance(60)
+    clock.run_timers()
+    before = read_all(room)
+
+    inside, release = threading.Event(), threading.Event()
+
+    def writer():
+        # conferma a metà: storico e svincolati già cambiati, transazione ancora aperta
+        with room.store.transaction() as tx:
+            auction._apply(tx, {"type": "confirm", "entry": {
+                "id": 1, "player": "Bea - MIL (DIF)", "winner": "A", "price": 1, "ts": 0}}, 0.0)
+            inside.set()
+            release.wait(5)
+
+    t = threading.Thread(target=writer)
+    t.start()
+    assert inside.wait(5)
+    try:
+        reads = []
+        reader = threading.Thread(target=lambda: reads.append(read_all(room)))
+        reader.start()
+        reader.join(1)
+        assert not reader.is_alive(), "una lettura aspetta il lock dello scrittore"
+        assert reads == [before]
+    finally:
+        release.set()
+        t.join()
+
+    after = read_all(room)
+    assert after["available"] == ["Ali - INT (POR)", "Cid - JUV (DIF)"]
+    assert after["remaining"] == {"A": 99} and after["roster"] == {"A": {"DIF": 1}}
+    assert after["delta"]["removed"] == ["Bea - MIL (DIF)"]
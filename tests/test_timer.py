@@ -0,0 +1,93 @@
+# tests/test_timer.py
+# Timer a scadenza (scheduler.py) in tempo vero: la callback arriva dopo la scadenza e
+# non molto dopo. Soglie larghe apposta (macchine lente, CI con un solo core): qui si
+# cercano i difetti grossi, come un ritorno al polling o un arm() che non sveglia
+# nessuno; le misure fini sono in bench/timer_jitter.py.
+#
+#   python -m pytest -q
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scheduler import DeadlineTimer, LoopTimer  # noqa: E402
+
+DELAY = 0.05
+ROUNDS = 5
+MAX_LATE = 0.25  # secondi, per la peggiore delle chiusure
+MEDIAN_LATE = 0.05
+
+
+def check(lateness: list):
+    assert len(lateness) == ROUNDS
+    assert min(lateness) >= 0, "callback prima della scadenza"
+    assert sorted(lateness)[ROUNDS // 2] < MEDIAN_LATE
+    assert max(lateness) < MAX_LATE
+
+
+def test_deadline_timer_fires_on_time():
+    fired = threading.Event()
+    timer = DeadlineTimer(fired.set, name="test-timer")
+    lateness = []
+    for _ in range(ROUNDS):
+        fired.clear()
+        deadline = time.monotonic() + DELAY
+        timer.arm(deadline)
+        assert fired.wait(2)
+        lateness.append(time.monotonic() - deadline)
+    check(lateness)
+
+
+def test_deadline_timer_follows_moved_and_cancelled_deadlines():
+    fired = []
+    timer = DeadlineTimer(lambda: fired.append(time.monotonic()), name="test-timer")
+    start = time.monotonic()
+    timer.arm(start + 1.0)
+    timer.arm(start + DELAY)  # anticipata (es. scadenza nuova più vicina): deve svegliarsi
+    time.sleep(DELAY + MAX_LATE)
+    assert len(fired) == 1 and fired[0] >= start + DELAY
+
+    timer.arm(time.monotonic() + DELAY)
+    timer.cancel()
+    time.sleep(DELAY + MAX_LATE)
+    assert len(fired) == 1
+
+
+def test_loop_timer_fires_on_time():
+    async def main():
+        loop = asyncio.get_running_loop()
+        fired = asyncio.Event()
+        timer = LoopTimer(fired.set, loop)
+        lateness = []
+        for i in range(ROUNDS):
+            fired.clear()
+            deadline = time.monotonic() + DELAY
+            if i % 2:
+                # arm() da un altro thread, come lo scrittore di SqliteStore
+                await asyncio.to_thread(timer.arm, deadline)
+            else:
+                timer.arm(deadline)
+            await asyncio.wait_for(fired.wait(), 2)
+            lateness.append(time.monotonic() - deadline)
+        return lateness
+
+    check(asyncio.run(main()))
+
+
+def test_loop_timer_cancel():
+    async def main():
+        fired = []
+        timer = LoopTimer(lambda: fired.append(1), asyncio.get_running_loop())
+        timer.arm(time.monotonic() + DELAY)
+        timer.arm(time.monotonic() + 2 * DELAY)  # un rilancio la sposta: una sola chiamata
+        await asyncio.sleep(3 * DELAY + MAX_LATE)
+        timer.arm(time.monotonic() + DELAY)
+        timer.cancel()
+        await asyncio.sleep(DELAY + MAX_LATE)
+        return fired
+
+    assert asyncio.run(main()) == [1]
@@ -0,0 +1,85 @@
+# tests/test_versioned.py
+# Letture con ETag (main.versioned): la versione si rilegge dopo aver costruito il corpo,
+# quindi una scrittura arrivata a metà non finisce in cache (né al client) con l'ETag
+# della versione prima.
+#
+#   python -m pytest -q
+
+import json
+import os
+import sys
+import warnings
+
+os.environ.setdefault("FANTA_DATA_DIR", "")  # niente log eventi nella cartella vera
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from starlette.requests import Request  # noqa: E402
+
+import auction  # noqa: E402
+import main  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from store import MemoryStore  # noqa: E402
+
+PLAYERS = ["Ali - INT (POR)", "Bo - MIL (DIF)"]
+
+
+def sold_room() -> auction.Room:
+    room = auction.Room("versioned", "A", MemoryStore({"A": 100, "B": 100}, Catalog(PLAYERS)), clock=VirtualClock())
+    for player in PLAYERS:
+        assert room.nominate(player, "A")["ok"]
+        room.clock.advance(auction.TIMER_SECONDS + 1)
+        assert room.confirm("A") is not None
+    return room
+
+
+def request(path: str, etag: str = "") -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers})
+
+
+def history_body(room: auction.Room, version: int) -> dict:
+    return {"history": room.get_history(), "version": version}
+
+
+def test_write_during_build_is_not_served_with_the_old_etag():
+    room = sold_room()
+    _, before = room.get_versions()
+    builds = []
+
+    def build(version):
+        builds.append(version)
+        if len(builds) == 1:
+            room.delete_history(room.get_history()[0]["id"])  # arriva mentre si costruisce
+        return history_body(room, version)
+
+    res = main.versioned(request("/versioned/history"), room, "h", build)
+    _, after = room.get_versions()
+    assert after == before + 1
+    assert builds == [before, after]
+    assert res.headers["etag"] == main.etag(room, f"h{after}")
+    assert json.loads(res.body) == history_body(room, after)
+
+    # in cache c'è solo la versione nuova: il client con l'ETag vecchio riceve il corpo nuovo
+    stale = main.etag(room, f"h{before}")
+    res = main.versioned(request("/versioned/history", stale), room, "h", lambda v: history_body(room, v))
+    assert res.status_code == 200 and res.headers["etag"] == main.etag(room, f"h{after}")
+
+
+def test_writes_on_every_build_give_up_without_etag():
+    room = sold_room()
+
+    def build(version):
+        history = room.get_history()
+        if history:
+            room.delete_history(history[0]["id"])
+        else:
+            assert room.nominate(PLAYERS[0], "A")["ok"]
+            room.clock.advance(auction.TIMER_SECONDS + 1)
+            room.confirm("A")
+        return history_body(room, version)
+
+    res = main.versioned(request("/versioned/history"), room, "h", build)
+    assert res.status_code == 200 and "etag" not in res.headers
@@ -0,0 +1,63 @@
+# writer.py
+# Un solo scrittore per stanza: le rotte di scrittura (/start, /bid, /autobid, conferme,
+# code, storico) e la scadenza del timer diventano comandi in una asyncio.Queue, eseguiti
+# uno alla volta da un task dell'event loop.
+#
+# - Le letture non passano di qui e non prendono il lock dello store: /status legge
+#   l'ultimo stato pubblicato da Room (vedi Room.get_status), le altre le copie che
+#   MemoryStore pubblica a fine transazione. Girano nel threadpool, quindi un rilancio
+#   non aspetta mai dietro ai poll né dietro a una ricerca.
+# - Niente threadpool per i rilanci. Con MemoryStore il comando gira subito, nel loop,
+#   dentro la rotta (microsecondi, tutto in memoria): il loop è un solo thread, quindi è
+#   già un solo scrittore, e senza passare dalla coda non si aspetta un giro di loop in
+#   più (sotto carico un giro sono centinaia di richieste). Con SqliteStore (commit su
+#   disco) il comando va in coda e gira in un thread, uno alla volta e in ordine.
+# - Il lock dello store resta: bench, simulate.py e gli altri worker di SqliteStore
+#   chiamano Room senza passare dal writer.
+
+import asyncio
+import traceback
+
+
+class Writer:
+    def __init__(self, inline: bool = True):
+        self._inline = inline
+        self._queue = asyncio.Queue()
+        self._task = None if inline else asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, fn, *args):
+        """Esegue fn(*args) nel turno dello scrittore e ne ritorna il risultato."""
+        if self._inline:
+            return fn(*args)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fn, args, future))
+        return await future
+
+    def post(self, fn, *args):
+        """Come submit() senza aspettare il risultato (dal loop, es. la scadenza del timer)."""
+        if self._inline:
+            try:
+                fn(*args)
+            except Exception:
+                traceback.print_exc()
+            return
+        self._queue.put_nowait((fn, args, None))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _run(self):
+        while True:
+            fn, args, future = await self._queue.get()
+            if future is not None and future.cancelled():
+                continue  # il client se n'è andato prima del suo turno
+            try:
+                result = await asyncio.to_thread(fn, *args)
+            except Exception as e:
+                if future is None:
+                    traceback.print_exc()
+                elif not future.cancelled():
+                    future.set_exception(e)
+                continue
+            if future is not None and not future.cancelled():
+                future.set_result(result)